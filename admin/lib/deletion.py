@@ -0,0 +1,92 @@
+from django.db import connection, models, transaction
+
+
+class PendingDeleteManagerMixin:
+    """
+    Manager mixin hiding the rows marked as pending deletion, until they are purged by purge_pending_deletes
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(pending_delete=False)
+
+
+class PendingDeleteManager(PendingDeleteManagerMixin, models.Manager):
+    pass
+
+
+def get_reverse_relations(model):
+    """
+    Relations of the rows of other models (and of the subclass and many to many tables) pointing to the model
+    """
+    return [
+        relation for relation in model._meta.get_fields(include_parents=False, include_hidden=True)
+        if relation.auto_created and not relation.concrete and (relation.one_to_many or relation.one_to_one)
+    ]
+
+
+def delete_rows(queryset, files, ancestors=()):
+    """
+    Delete the rows of the queryset and, first, the rows depending on them (following their on_delete),
+    with one set based statement per table and relation, without loading them and without signals.
+    The names of the files of the deleted rows are added to files, to be deleted from their storage.
+    """
+    model = queryset.model
+    if model in ancestors:
+        raise ValueError(f'Cyclic cascade on {model.__name__}')
+
+    for relation in get_reverse_relations(model):
+        field = relation.field
+        related_rows = relation.related_model._base_manager.filter(**{
+            f'{field.name}__in': queryset.values(field.target_field.attname)
+        })
+        if relation.on_delete == models.CASCADE:
+            delete_rows(related_rows, files, (*ancestors, model))
+        elif relation.on_delete == models.SET_NULL:
+            related_rows.update(**{field.name: None})
+        elif relation.on_delete != models.DO_NOTHING:
+            raise NotImplementedError(f'{relation.on_delete.__name__} deletion of {relation.related_model.__name__}')
+
+    for field in model._meta.get_fields(include_parents=False):
+        if isinstance(field, models.FileField):
+            files.extend((field.storage, name) for name in queryset.values_list(field.attname, flat=True) if name)
+
+    select_sql, params = queryset.values('pk').query.sql_with_params()
+    query = 'DELETE FROM {table} WHERE {pk} IN ({select})'.format(
+        table=connection.ops.quote_name(model._meta.db_table),
+        pk=connection.ops.quote_name(model._meta.pk.column),
+        select=select_sql
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.rowcount
+
+
+def delete_files(files):
+    """
+    Delete the (storage, name) files, ignoring the missing ones
+    """
+    for storage, name in files:
+        try:
+            storage.delete(name)
+        except FileNotFoundError:
+            pass
+
+
+def purge_pending_deletes(model, chunk_size=100, progress=None):
+    """
+    Delete the rows of the model marked as pending deletion, with all the rows depending on them,
+    chunk_size rows (and their dependencies) per transaction. Their files are deleted once each chunk is committed.
+    progress is called after each chunk with the number of rows purged so far.
+    Returns the number of purged rows.
+    """
+    purged_count = 0
+    while True:
+        pks = list(model._base_manager.filter(pending_delete=True).values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return purged_count
+        files = []
+        with transaction.atomic():
+            purged_count += delete_rows(model._base_manager.filter(pk__in=pks), files)
+            transaction.on_commit(lambda files=files: delete_files(files))
+        if progress:
+            progress(purged_count)
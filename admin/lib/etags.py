@@ -0,0 +1,27 @@
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def compute_etag(*watermark):
+    """
+    Strong ETag of a representation, from the values identifying its version (watermark)
+    """
+    return '"{}"'.format(hashlib.md5(repr(watermark).encode()).hexdigest())
+
+
+def is_not_modified(request, etag):
+    """
+    Whether the If-None-Match header of the request matches the etag (weak comparison)
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    etags = [value[2:] if value.startswith('W/') else value for value in parse_etags(if_none_match)]
+    return '*' in etags or etag in etags
+
+
+def not_modified_response(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
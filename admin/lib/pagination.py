@@ -0,0 +1,24 @@
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Opt-in keyset pagination: lists are only paginated when the request has a cursor or
+    page_size query parameter, otherwise the whole list is returned as before.
+    Pages are ordered by the `ordering` of the view if any, by id otherwise.
+    """
+
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params \
+                and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        self.ordering = getattr(view, 'ordering', None) or self.ordering
+        return super().get_ordering(request, queryset, view)
@@ -1,6 +1,11 @@
+from collections import OrderedDict
 from enum import Enum
 
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Manager, Model, QuerySet, prefetch_related_objects
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.serializers import LIST_SERIALIZER_KWARGS
 
 
 class PolymorphicSerializer(serializers.ModelSerializer):
@@ -20,25 +25,64 @@ class PolymorphicSerializer(serializers.ModelSerializer):
         """
         raise NotImplementedError
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """
+        Serialize lists with a PolymorphicListSerializer
+        """
+        list_kwargs = {key: kwargs.pop(key) for key in ('allow_empty', 'max_length', 'min_length') if key in kwargs}
+        child = cls(*args, **kwargs)
+        list_kwargs.update({key: value for key, value in kwargs.items() if key in LIST_SERIALIZER_KWARGS})
+        return PolymorphicListSerializer(*args, child=child, **list_kwargs)
+
+    def downcast(self, objs):
+        """
+        Replace the instances of the base model by their subclass instances, loaded in one query.
+        Already downcast instances are kept.
+        """
+        model = getattr(self.Meta, 'model', None)
+        if model is None or not hasattr(model.objects, 'select_subclasses') or model.__name__ in self.get_serializer_map():
+            return objs
+        base_pks = [obj.pk for obj in objs if type(obj) is model]
+        if not base_pks:
+            return objs
+        sub_objs = model.objects.select_subclasses().in_bulk(base_pks)
+        downcasts = get_root_cache(self)['downcasts']
+        for pk, sub_obj in sub_objs.items():
+            downcasts[(model, pk)] = sub_obj
+        return [sub_objs.get(obj.pk, obj) if type(obj) is model else obj for obj in objs]
+
+    def get_child_serializer(self, type_str):
+        """
+        Serializer of the type, created once and bound to this serializer (they share the same root)
+        """
+        if not hasattr(self, '_child_serializers'):
+            self._child_serializers = {}
+        if type_str not in self._child_serializers:
+            try:
+                serializer = self.get_serializer_map()[type_str]
+            except KeyError:
+                raise ValueError(
+                    'Serializer for "{}" does not exist'.format(type_str), )
+            child_serializer = serializer(context=self.context, partial=self.partial)
+            child_serializer.bind(field_name='', parent=self)
+            self._child_serializers[type_str] = child_serializer
+        return self._child_serializers[type_str]
+
     def to_representation(self, obj):
         """
         Translate object to internal data representation
         Override to allow polymorphism
         """
+        obj = self.downcast([obj])[0]
         if hasattr(obj, 'get_type'):
             type_str = obj.get_type()
             if isinstance(type_str, Enum):
                 type_str = type_str.value
         else:
             type_str = obj.__class__.__name__
-        try:
-            serializer = self.get_serializer_map()[type_str]
-        except KeyError:
-            raise ValueError(
-                'Serializer for "{}" does not exist'.format(type_str), )
 
-        data = serializer(obj, context=self.context,
-                          partial=self.partial).to_representation(obj)
+        data = self.get_child_serializer(type_str).to_representation(obj)
         # data['type'] = type_str
         return data
 
@@ -81,11 +125,120 @@ class PolymorphicSerializer(serializers.ModelSerializer):
         return serializer(context=self.context, partial=self.partial).update(instance, validated_data)
 
 
+class PolymorphicListSerializer(serializers.ListSerializer):
+    """
+    List serializer of a PolymorphicSerializer, downcasting all the
+    instances of the list at once before serializing them
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        return super().to_representation(self.child.downcast(list(iterable)))
+
+
+def get_root_path(serializer):
+    """
+    Root serializer of a nested serializer, and the source attributes leading from
+    the root instances to the instances of the nested serializer
+    """
+    path = []
+    node = serializer
+    while node.parent is not None:
+        # The children of list serializers have no field name
+        if node.field_name:
+            path = node.source_attrs + path
+        node = node.parent
+    return node, path
+
+
+def get_relation_field(model, attr):
+    """
+    Relation field of the model read through the attribute (forward field or reverse accessor), None if there is none
+    """
+    try:
+        field = model._meta.get_field(attr)
+        if field.is_relation and not field.auto_created:
+            return field
+    except FieldDoesNotExist:
+        pass
+    return next((rel for rel in model._meta.related_objects if rel.get_accessor_name() == attr), None)
+
+
+def get_loaded_attribute(instance, attr):
+    """
+    Value of a relation of the instance if it is already loaded (cached or prefetched),
+    raise LookupError if reading it would query the database
+    """
+    field = get_relation_field(type(instance), attr) if isinstance(instance, Model) else None
+    if field is None:
+        raise LookupError(attr)
+    if field.many_to_many or field.one_to_many:
+        queryset = getattr(instance, attr).get_queryset()
+        if queryset._result_cache is None:
+            raise LookupError(attr)
+        return list(queryset)
+    if not field.is_cached(instance):
+        raise LookupError(attr)
+    return getattr(instance, attr)
+
+
+def get_loaded_instances(root, path):
+    """
+    Instances reached from the root serializer instances through the path, without querying the database.
+    Return None if some relation on the path is not loaded.
+    """
+    instances = root.instance
+    if instances is None or isinstance(instances, Manager):
+        return None
+    instances = list(instances) if isinstance(instances, (list, tuple, QuerySet)) else [instances]
+    # Instances downcast by the PolymorphicSerializers
+    downcasts = get_root_cache(root)['downcasts']
+    instances = [downcasts.get((type(instance), getattr(instance, 'pk', None)), instance) for instance in instances]
+    for attr in path:
+        related_instances = []
+        for instance in instances:
+            try:
+                value = get_loaded_attribute(instance, attr)
+            except LookupError:
+                return None
+            if isinstance(value, list):
+                related_instances.extend(value)
+            elif value is not None:
+                related_instances.append(value)
+        instances = [downcasts.get((type(instance), getattr(instance, 'pk', None)), instance) for instance in related_instances]
+    return instances
+
+
+def get_root_cache(field):
+    """
+    Cache of the representations of the NestedRelatedFields (and of the instances downcast
+    by the PolymorphicSerializers), shared by all the fields under the same root
+    """
+    root = field.root
+    if not hasattr(root, '_nested_related_cache'):
+        root._nested_related_cache = {'paths': set(), 'representations': {}, 'downcasts': {}, 'instances': {}}
+    return root._nested_related_cache
+
+
+class NestedManyRelatedField(serializers.ManyRelatedField):
+    """
+        ManyRelatedField prefetching its relation on all the sibling
+        instances of the root serializer, before reading it.
+    """
+
+    def get_attribute(self, instance):
+        self.child_relation.parent_instance = instance
+        self.child_relation.prefetch_siblings(instance)
+        return super().get_attribute(instance)
+
+
 class NestedRelatedField(serializers.PrimaryKeyRelatedField):
     """
         Model identical to PrimaryKeyRelatedField but its
         representation will be nested and its input will
         be a primary key.
+        Related instances are resolved and serialized in bulk, for all
+        the instances serialized under the same root serializer.
     """
 
     def __init__(self, **kwargs):
@@ -93,14 +246,146 @@ class NestedRelatedField(serializers.PrimaryKeyRelatedField):
         self.model = kwargs.pop('model', None)
         self.serializer_class = kwargs.pop('serializer_class', None)
         self.queryset = self.model.objects.all()
+        # Instance holding the relation being serialized
+        self.parent_instance = None
         super().__init__(**kwargs)
 
-    def to_representation(self, data):
-        pk = super(NestedRelatedField, self).to_representation(data)
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return NestedManyRelatedField(**list_kwargs)
+
+    def get_attribute(self, instance):
+        self.parent_instance = instance
+        # Reuse the related instance when it is already loaded (select_related)
+        if self.source_attrs and not isinstance(instance, dict):
+            try:
+                value = get_loaded_attribute(instance, self.source_attrs[-1])
+            except LookupError:
+                pass
+            else:
+                if value is None or isinstance(value, self.model):
+                    return value
+        return super().get_attribute(instance)
+
+    def get_siblings(self, instance):
+        """
+        Instances serialized with this field under the same root serializer,
+        only the given one if they are not loaded yet
+        """
+        field = self.parent if isinstance(self.parent, serializers.ManyRelatedField) else self
+        if field.parent is None:
+            return [instance]
+        root, path = get_root_path(field.parent)
+        instances = get_loaded_instances(root, path)
+        if not instances or instance not in instances:
+            return [instance]
+        return [sibling for sibling in instances if type(sibling) is type(instance)]
+
+    def prefetch_siblings(self, instance):
+        """
+        Prefetch the (many) relation read by this field, on all its sibling instances at once
+        """
+        if not isinstance(instance, Model) or len(self.source_attrs) != 1 or instance.pk is None:
+            return
+        cache = get_root_cache(self)
+        key = (type(instance), id(self))
+        if key in cache['paths']:
+            return
+        cache['paths'].add(key)
         try:
-            return self.serializer_class(self.model.objects.get(pk=pk)).data
-        except self.model.DoesNotExist:
+            prefetch_related_objects(self.get_siblings(instance), self.source_attrs[0])
+        except (AttributeError, ValueError):
+            pass
+
+    def get_sibling_related(self, instance):
+        """
+        Related instances (or their primary keys if they are not loaded) of the siblings
+        """
+        related = []
+        if not isinstance(instance, Model) or len(self.source_attrs) != 1:
+            return related
+        field_name = self.source_attrs[0]
+        field = get_relation_field(type(instance), field_name)
+        if field is None:
+            return related
+        for sibling in self.get_siblings(instance):
+            try:
+                value = get_loaded_attribute(sibling, field_name)
+            except LookupError:
+                if field.many_to_one or (field.one_to_one and field.concrete):
+                    related.append(getattr(sibling, field.attname))
+                continue
+            related.extend(value if isinstance(value, list) else [value])
+        return [value for value in related if value is not None]
+
+    def to_representation(self, data):
+        """
+        Nested representation of the related instance. On the first miss, the related instances
+        of all the siblings are loaded in one query and serialized at once, and their
+        representations are cached on the root serializer.
+        """
+        pk = data.pk if isinstance(data, Model) else super(NestedRelatedField, self).to_representation(data)
+        representations = get_root_cache(self)['representations'].setdefault((self.model, self.serializer_class), {})
+        if pk not in representations:
+            instances = {}
+            pks = {pk}
+            for value in [data, *self.get_sibling_related(self.parent_instance)]:
+                if isinstance(value, self.model):
+                    instances[value.pk] = value
+                else:
+                    pks.add(getattr(value, 'pk', value))
+            pks.difference_update(instances, representations)
+            if pks:
+                loaded = self.model.objects.in_bulk(pks)
+                instances.update(loaded)
+                representations.update({missing_pk: None for missing_pk in pks if missing_pk not in loaded})
+            instances = [instance for instance_pk, instance in instances.items() if instance_pk not in representations]
+            representations.update(zip(
+                [instance.pk for instance in instances], self.serializer_class(instances, many=True).data
+            ))
+        representation = representations[pk]
+        return None if representation is None else OrderedDict(representation)
+
+    def get_sibling_pks(self):
+        """
+        Primary keys given for this field in all the items of the root list serializer data,
+        None if the field is not directly under a list of items
+        """
+        root = self.root
+        if not isinstance(root, serializers.ListSerializer) or self.parent is not root.child:
+            return None
+        if not isinstance(root.initial_data, list):
             return None
+        pk_field = self.get_queryset().model._meta.pk
+        pks = set()
+        for item in root.initial_data:
+            if not isinstance(item, dict) or isinstance(item.get(self.field_name), bool):
+                continue
+            try:
+                pks.add(pk_field.to_python(item.get(self.field_name)))
+            except (TypeError, ValueError, DjangoValidationError):
+                continue
+        pks.discard(None)
+        return pks
 
     def to_internal_value(self, data):
+        """
+        Related instance of the primary key. When validating a list of items, the instances of
+        all the items are loaded in one query on the first call, and cached on the root serializer.
+        """
+        instances = get_root_cache(self)['instances']
+        if id(self) not in instances:
+            pks = self.get_sibling_pks()
+            instances[id(self)] = self.get_queryset().in_bulk(pks) if pks else {}
+        if not isinstance(data, bool):
+            try:
+                instance = instances[id(self)].get(self.get_queryset().model._meta.pk.to_python(data))
+            except (TypeError, ValueError, DjangoValidationError):
+                instance = None
+            if instance is not None:
+                return instance
         return serializers.PrimaryKeyRelatedField.to_internal_value(self, data)
@@ -108,7 +108,7 @@ WSGI_APPLICATION = 'admin.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -116,6 +116,37 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+# Local memory cache of each process, use a shared backend (file, redis...) when running several processes
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'assessment-tool',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000
+        }
+    }
+}
+
+# Cached dashboard responses: lifetime in seconds and maximum size in bytes
+DASHBOARD_CACHE_TIMEOUT = 60 * 60
+DASHBOARD_CACHE_MAX_ENTRY_SIZE = 1024 * 1024
+
+# Maximum number of answers rescored within a rescore request, larger rescores are run by a background rescore job
+RESCORE_REQUEST_MAX_ANSWERS = 10000
+
+# Authentication tokens cache of each process: maximum number of tokens and lifetime in seconds
+# (the changes of the users and tokens made by other processes are only seen once expired)
+TOKEN_AUTH_CACHE_MAX_ENTRIES = 10000
+TOKEN_AUTH_CACHE_TIMEOUT = 30
+
+# Answer keys cache of each process: maximum number of questions and lifetime in seconds
+# (the changes of the questions made by other processes are only seen once expired)
+ANSWER_KEYS_CACHE_MAX_ENTRIES = 1024
+ANSWER_KEYS_CACHE_TIMEOUT = 60
+
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
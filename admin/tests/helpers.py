@@ -0,0 +1,40 @@
+from datetime import date
+
+from answers.models import ANSWER_TYPE_MODELS, AnswerSession, QuestionSetAnswer
+from assessments.models import Question, QuestionSetAccess
+from django.db import connection
+from visualization.utils import append_answer_facts
+
+
+def create_answers(student_id, question_set_id):
+    """
+    Create the access and a complete question_set answer of the student to the question_set,
+    with one answer per question, their score summary and answer facts.
+    Returns the question_set answer and the ids of the answers.
+    """
+    access = QuestionSetAccess.objects.create(
+        student_id=student_id, question_set_id=question_set_id, start_date=date.today(), end_date=date.today()
+    )
+    session = AnswerSession.objects.create(student_id=student_id)
+    question_set_answer = QuestionSetAnswer.objects.create(question_set_access=access, session=session)
+    answers = [
+        ANSWER_TYPE_MODELS[question.question_type].objects.create(
+            question_set_answer=question_set_answer, question=question, valid=False
+        )
+        for question in Question.objects.filter(question_set=question_set_id)
+    ]
+    question_set_answer.complete = True
+    question_set_answer.save()
+    append_answer_facts(answers)
+    return question_set_answer, [answer.id for answer in answers]
+
+
+def count_rows(model, ids):
+    """
+    Number of rows of the model table (without joining its parent tables) with the given primary keys
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {model._meta.db_table} WHERE {model._meta.pk.column} = ANY(%s)', [ids]
+        )
+        return cursor.fetchone()[0]
@@ -0,0 +1,111 @@
+from admin.lib.serializers import NestedRelatedField
+from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from users.models import Country, Group, Language, User
+from users.serializers import CountrySerializer, GroupSerializer, LanguageSerializer, UserSerializer
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class StudentSerializer(serializers.ModelSerializer):
+
+    language = NestedRelatedField(
+        model=Language, serializer_class=LanguageSerializer)
+    country = NestedRelatedField(
+        model=Country, serializer_class=CountrySerializer)
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'language', 'country']
+
+
+class GroupStudentsSerializer(serializers.ModelSerializer):
+
+    students = NestedRelatedField(
+        source='student_group', many=True, model=User, serializer_class=StudentSerializer)
+
+    class Meta:
+        model = Group
+        fields = ['id', 'name', 'students']
+
+
+class GroupNestedStudentsSerializer(serializers.ModelSerializer):
+
+    students = StudentSerializer(source='student_group', many=True)
+
+    class Meta:
+        model = Group
+        fields = ['id', 'name', 'students']
+
+
+class NestedRelatedFieldTests(TestCase):
+    """
+    NestedRelatedField representation tests.
+    """
+    fixtures = ['languages_countries.json', 'users.json']
+
+    def setUp(self):
+        """
+        Put the students in two groups (the third one has none).
+        """
+        supervisor = User.objects.get(username='supervisor')
+        self.groups = [Group.objects.create(name=name, supervisor=supervisor) for name in ('A', 'B', 'C')]
+        User.objects.filter(id__in=[1, 2]).update(group=self.groups[0])
+        User.objects.filter(id=3).update(group=self.groups[1])
+
+    def test_single(self):
+        """
+        Ensure that a related instance is represented with its serializer.
+        """
+        user = User.objects.get(id=2)
+        data = UserSerializer(user).data
+        self.assertEqual(data['language'], LanguageSerializer(Language.objects.get(code='ENG')).data)
+        self.assertEqual(data['country'], CountrySerializer(Country.objects.get(code='JOR')).data)
+        self.assertEqual(render(data['group']), render(GroupSerializer(self.groups[0]).data))
+
+    def test_null(self):
+        """
+        Ensure that a missing related instance is represented as null.
+        """
+        user = User.objects.get(id=4)
+        self.assertIsNone(UserSerializer(user).data['group'])
+
+    def test_many(self):
+        """
+        Ensure that many related instances are represented with their serializer.
+        """
+        data = GroupStudentsSerializer(self.groups[0]).data
+        self.assertEqual(
+            sorted(data['students'], key=lambda student: student['id']),
+            StudentSerializer(User.objects.filter(id__in=[1, 2]).order_by('id'), many=True).data
+        )
+        self.assertEqual(GroupStudentsSerializer(self.groups[2]).data['students'], [])
+
+    def test_in_list(self):
+        """
+        Ensure that the related instances of a list are represented as when serialized one by one,
+        with one query per field whatever the number of instances.
+        """
+        users = list(User.objects.order_by('id'))
+        with self.assertNumQueries(3):
+            data = UserSerializer(users, many=True).data
+        self.assertEqual(render(data), render([UserSerializer(user).data for user in users]))
+        self.assertEqual([item['group'] and item['group']['id'] for item in data], [
+            self.groups[0].id, self.groups[0].id, self.groups[1].id, None, None
+        ])
+
+    def test_many_in_list(self):
+        """
+        Ensure that the many related instances of a list, and the related instances of nested lists,
+        are represented as when serialized one by one.
+        """
+        groups = list(Group.objects.order_by('id'))
+        for serializer_class in (GroupStudentsSerializer, GroupNestedStudentsSerializer):
+            data = serializer_class(groups, many=True).data
+            self.assertEqual(data, [serializer_class(group).data for group in groups])
+            students = [{student['id']: student for student in item['students']} for item in data]
+            self.assertEqual([sorted(item_students) for item_students in students], [[1, 2], [3], []])
+            self.assertEqual(students[0][2]['language']['code'], 'ENG')
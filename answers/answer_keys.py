@@ -0,0 +1,198 @@
+import operator
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.db import transaction
+
+from assessments.models import (DominoOption, DraggableOption, Question, QuestionCalcul, QuestionDomino,
+                                QuestionDragAndDrop, QuestionSelect, QuestionSort, SelectOption, SortOption)
+
+OPERATORS = {
+    QuestionCalcul.OperatorType.ADDITION: operator.add,
+    QuestionCalcul.OperatorType.SUBTRACTION: operator.sub,
+    QuestionCalcul.OperatorType.MULTIPLICATION: operator.mul
+}
+
+
+def compute_operation(first_value, second_value, operator_type):
+    """
+    Integer result of a calcul operation, None if there is none (division by zero or with a remainder)
+    """
+    if first_value is None or second_value is None:
+        return None
+    if operator_type == QuestionCalcul.OperatorType.DIVISION:
+        if second_value == 0 or first_value % second_value:
+            return None
+        return first_value // second_value
+    if operator_type in OPERATORS:
+        return OPERATORS[operator_type](first_value, second_value)
+    return None
+
+
+class AnswerKey:
+    """
+    Correct answer of a question, compiled from the question and its options.
+    """
+
+    def __init__(self, question):
+        self.question_id = question.id
+        self.question_type = type(question).__name__
+        # QuestionInput
+        self.valid_answer = getattr(question, 'valid_answer', None)
+        # QuestionNumberLine and QuestionDomino
+        self.expected_value = getattr(question, 'expected_value', None)
+        # QuestionCalcul and QuestionCustomizedDragAndDrop
+        self.first_value = getattr(question, 'first_value', None)
+        self.second_value = getattr(question, 'second_value', None)
+        self.expected_result = compute_operation(
+            self.first_value, self.second_value, getattr(question, 'operator', None)
+        )
+        # QuestionSelect and QuestionDomino
+        self.valid_select_options = frozenset()
+        self.valid_domino_options = frozenset()
+        # QuestionSort: category name per category field, and sort options ids per category name
+        self.categories = {}
+        self.sort_options = {}
+        # QuestionDragAndDrop: expected area of each draggable option
+        self.draggable_areas = {}
+
+
+class AnswerKeyCache:
+    """
+    Bounded LRU cache of the answer keys, per question id, each entry expiring after timeout seconds.
+    Entries are invalidated by the answers signals when a question or one of its options changes.
+    The cache is local to each process: the other processes see the changes once their entries expire.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        # (expiry time, answer key) per question id
+        self._answer_keys = OrderedDict()
+        self._lock = Lock()
+        # Incremented on invalidation, so that keys loaded meanwhile are not cached
+        self._generation = 0
+
+    def get(self, question_id):
+        return self.get_many([question_id]).get(question_id)
+
+    def get_many(self, question_ids):
+        """
+        Answer keys of the questions, missing ones are loaded with a fixed number of queries.
+        Unknown question ids are left out of the result.
+        """
+        answer_keys = {}
+        missing_ids = set()
+        now = time.monotonic()
+        with self._lock:
+            for question_id in question_ids:
+                entry = self._answer_keys.get(question_id)
+                if entry is not None and entry[0] >= now:
+                    self._answer_keys.move_to_end(question_id)
+                    answer_keys[question_id] = entry[1]
+                else:
+                    missing_ids.add(question_id)
+            generation = self._generation
+
+        if missing_ids:
+            loaded_answer_keys = load_answer_keys(missing_ids)
+            expires_at = time.monotonic() + self.timeout
+            with self._lock:
+                if generation != self._generation:
+                    return {**answer_keys, **loaded_answer_keys}
+                for question_id, answer_key in loaded_answer_keys.items():
+                    self._answer_keys[question_id] = (expires_at, answer_key)
+                    self._answer_keys.move_to_end(question_id)
+                while len(self._answer_keys) > self.size:
+                    self._answer_keys.popitem(last=False)
+            answer_keys.update(loaded_answer_keys)
+
+        return answer_keys
+
+    def invalidate(self, question_id):
+        """
+        Remove the answer key of the question, now and once the current transaction is committed
+        (a key loaded meanwhile by another thread would still be the previous one).
+        """
+        self._remove(question_id)
+        transaction.on_commit(lambda: self._remove(question_id))
+
+    def clear(self):
+        """
+        Remove all the answer keys, now and once the current transaction is committed.
+        """
+        self._remove_all()
+        transaction.on_commit(self._remove_all)
+
+    def _remove(self, question_id):
+        with self._lock:
+            self._generation += 1
+            self._answer_keys.pop(question_id, None)
+
+    def _remove_all(self):
+        with self._lock:
+            self._generation += 1
+            self._answer_keys.clear()
+
+
+def load_answer_keys(question_ids):
+    """
+    Compile the answer keys of the questions from the database.
+    """
+    questions = Question.objects.filter(id__in=question_ids).select_subclasses()
+    answer_keys = {question.id: AnswerKey(question) for question in questions}
+
+    select_ids = [key.question_id for key in answer_keys.values() if key.question_type == QuestionSelect.__name__]
+    if select_ids:
+        valid_options = {}
+        for question_id, option_id in SelectOption.objects.filter(
+            question_select__in=select_ids, valid=True
+        ).values_list('question_select', 'id'):
+            valid_options.setdefault(question_id, set()).add(option_id)
+        for question_id in select_ids:
+            answer_keys[question_id].valid_select_options = frozenset(valid_options.get(question_id, ()))
+
+    drag_and_drop_ids = [
+        key.question_id for key in answer_keys.values() if key.question_type == QuestionDragAndDrop.__name__
+    ]
+    if drag_and_drop_ids:
+        for question_id, option_id, area_id in DraggableOption.objects.filter(
+            question_drag_and_drop__in=drag_and_drop_ids
+        ).values_list('question_drag_and_drop', 'id', 'area_option'):
+            answer_keys[question_id].draggable_areas[option_id] = area_id
+
+    domino_ids = [key.question_id for key in answer_keys.values() if key.question_type == QuestionDomino.__name__]
+    if domino_ids:
+        valid_options = {}
+        for question_id, option_id in DominoOption.objects.filter(
+            question_domino__in=domino_ids, valid=True
+        ).values_list('question_domino', 'id'):
+            valid_options.setdefault(question_id, set()).add(option_id)
+        for question_id in domino_ids:
+            answer_keys[question_id].valid_domino_options = frozenset(valid_options.get(question_id, ()))
+
+    sort_questions = [question for question in questions if isinstance(question, QuestionSort)]
+    if sort_questions:
+        for question in sort_questions:
+            answer_keys[question.id].categories = {
+                'category_A': question.category_A,
+                'category_B': question.category_B
+            }
+        # Sort options are matched by category name, across the questions
+        category_names = {name for question in sort_questions for name in (question.category_A, question.category_B)}
+        options = {}
+        for category_name, option_id in SortOption.objects.filter(
+            category__in=category_names
+        ).values_list('category', 'id'):
+            options.setdefault(category_name, set()).add(option_id)
+        for question in sort_questions:
+            answer_keys[question.id].sort_options = {
+                name: frozenset(options.get(name, ())) for name in (question.category_A, question.category_B)
+            }
+
+    return answer_keys
+
+
+answer_keys = AnswerKeyCache(settings.ANSWER_KEYS_CACHE_MAX_ENTRIES, settings.ANSWER_KEYS_CACHE_TIMEOUT)
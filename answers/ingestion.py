@@ -0,0 +1,309 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection, transaction
+from rest_framework import serializers
+
+from assessments.models import Question, SortOption
+from visualization.cache import bump_students_data_versions
+from visualization.utils import append_answer_facts, refresh_question_set_score_summaries
+
+from .answer_keys import answer_keys
+from .models import (Answer, AnswerCalcul, AnswerCustomizedDragAndDrop, AnswerDomino, AnswerDragAndDrop,
+                     AnswerInput, AnswerNumberLine, AnswerSEL, AnswerSelect, AnswerSort, DragAndDropAreaEntry,
+                     QuestionSetAnswer, get_answer_type, get_duration_ms)
+from .scoring import SORT_CATEGORIES, PreparedAnswer, score_answers
+
+# Answer model to create for each type of question
+ANSWER_MODELS = {
+    'QuestionInput': AnswerInput,
+    'QuestionNumberLine': AnswerNumberLine,
+    'QuestionSelect': AnswerSelect,
+    'QuestionSort': AnswerSort,
+    'QuestionDragAndDrop': AnswerDragAndDrop,
+    'QuestionSEL': AnswerSEL,
+    'QuestionDomino': AnswerDomino,
+    'QuestionCalcul': AnswerCalcul,
+    'QuestionCustomizedDragAndDrop': AnswerCustomizedDragAndDrop
+}
+
+# Number of rows written per INSERT
+BATCH_SIZE = 1000
+
+
+class PreparedQuestionSetAnswer:
+    """
+    Validated question_set answer, not saved yet, with its prepared answers.
+    """
+
+    def __init__(self, instance, answers):
+        self.instance = instance
+        self.answers = answers
+
+
+def _get_pk(value):
+    """
+    Primary key of a related value given as an instance or as a primary key
+    """
+    return getattr(value, 'pk', value)
+
+
+def _to_pk(model, value):
+    """
+    Primary key of the model for a related value, None if it is not a valid primary key
+    """
+    try:
+        return model._meta.pk.to_python(_get_pk(value))
+    except DjangoValidationError:
+        return None
+
+
+def _add_related_value(related_values, model, pk, path):
+    """
+    Record a related value to check, with the path of the field it was read from in the data
+    """
+    related_values.setdefault(model, {}).setdefault(pk, []).append(path)
+
+
+def _set_field_values(instance, data, related_values, path, exclude=()):
+    """
+    Set the concrete fields of the instance from the raw data, in memory.
+    Related values are only recorded in related_values ({model: {pk: paths}}, see _add_related_value),
+    their existence is checked afterwards in bulk.
+    """
+    related_fields = []
+    errors = {}
+    for field in instance._meta.concrete_fields:
+        if field.primary_key or field.name in exclude:
+            continue
+        try:
+            if field.is_relation:
+                related_fields.append(field.name)
+                if data.get(field.name) is not None:
+                    pk = field.target_field.to_python(_get_pk(data[field.name]))
+                    setattr(instance, field.attname, pk)
+                    _add_related_value(related_values, field.related_model, pk, (*path, field.name))
+            elif field.name in data:
+                setattr(instance, field.attname, field.to_python(data[field.name]))
+        except DjangoValidationError as error:
+            errors[field.name] = error.messages
+    if errors:
+        raise DjangoValidationError(errors)
+    instance.clean_fields(exclude=[*exclude, *related_fields])
+
+
+def _prepare_answer(data, questions_answer_keys, related_values, path):
+    """
+    Validate the raw data of an answer (at the given path of the data) and build its (unsaved) instance.
+    """
+    answer_key = questions_answer_keys.get(_to_pk(Question, data.get('question')))
+    if answer_key is None:
+        raise DjangoValidationError({'question': f'Invalid pk "{data.get("question")}" - object does not exist.'})
+
+    model = ANSWER_MODELS.get(answer_key.question_type)
+    if model is None:
+        raise DjangoValidationError({'type': 'This field is required'})
+
+    answer = model(question_id=answer_key.question_id, answer_type=get_answer_type(model))
+    _set_field_values(
+        answer, data, related_values, path, exclude=('question', 'question_set_answer', 'answer_type', 'duration_ms')
+    )
+    answer.duration_ms = get_duration_ms(answer.start_datetime, answer.end_datetime)
+
+    categories = {}
+    if model is AnswerSort:
+        for category in SORT_CATEGORIES:
+            try:
+                categories[category] = {SortOption._meta.pk.to_python(_get_pk(pk)) for pk in data.get(category) or []}
+            except DjangoValidationError as error:
+                raise DjangoValidationError({category: error.messages})
+            for pk in categories[category]:
+                _add_related_value(related_values, SortOption, pk, (*path, category))
+
+    area_entries = []
+    if model is AnswerDragAndDrop:
+        for index, area_entry_data in enumerate(data.get('answers_per_area') or []):
+            if area_entry_data.get('area') is None:
+                raise DjangoValidationError({'answers_per_area': {index: {'area': ['This field is required.']}}})
+            area_entry = DragAndDropAreaEntry()
+            _set_field_values(
+                area_entry, area_entry_data, related_values, (*path, 'answers_per_area', index), exclude=('answer',)
+            )
+            area_entries.append(area_entry)
+
+    return PreparedAnswer(answer, categories, area_entries)
+
+
+def _check_related_values(related_values, errors):
+    """
+    Check that all the related values exist, with one query per related model.
+    The errors are added to the errors of each question_set answer, at the path of the field.
+    """
+    for model, paths in related_values.items():
+        existing_pks = set(model.objects.filter(pk__in=paths).values_list('pk', flat=True))
+        for pk in sorted(paths.keys() - existing_pks):
+            for index, *keys, field_name in paths[pk]:
+                field_errors = errors[index]
+                for key in keys:
+                    field_errors = field_errors.setdefault(key, {})
+                field_errors.setdefault(field_name, []).append(f'Invalid pk "{pk}" - object does not exist.')
+
+
+def prepare_answers(answers_data):
+    """
+    Validate a list of raw answers in memory: the referenced questions are all resolved
+    with a single query, and the related values checked with one query per related model.
+    Returns the prepared (unsaved) answers.
+    """
+    try:
+        prepared_question_set_answers = prepare_question_set_answers(
+            [{'answers': answers_data}], build_question_set_answers=False
+        )
+    except serializers.ValidationError as error:
+        if isinstance(error.detail, list):
+            raise serializers.ValidationError(error.detail[0])
+        raise
+    return prepared_question_set_answers[0].answers
+
+
+def prepare_question_set_answers(question_set_answers_data, build_question_set_answers=True):
+    """
+    Validate a list of raw question_set answers (with their answers) in memory, with a
+    fixed number of queries. The questions are read from the answer keys cache.
+    Returns the prepared (unsaved) question_set answers, without instance if
+    build_question_set_answers is False (only the answers are validated).
+    """
+    question_ids = {
+        _to_pk(Question, answer_data.get('question'))
+        for question_set_answer_data in question_set_answers_data
+        for answer_data in question_set_answer_data.get('answers') or []
+    }
+    questions_answer_keys = answer_keys.get_many(question_ids - {None})
+
+    related_values = {}
+    prepared_question_set_answers = []
+    errors = []
+    for question_set_answer_index, question_set_answer_data in enumerate(question_set_answers_data):
+        answers_errors = {}
+        question_set_answer = None
+        try:
+            if build_question_set_answers:
+                question_set_answer = QuestionSetAnswer()
+                _set_field_values(
+                    question_set_answer, question_set_answer_data, related_values, (question_set_answer_index,),
+                    exclude=('session',)
+                )
+            prepared_answers = []
+            for index, answer_data in enumerate(question_set_answer_data.get('answers') or []):
+                try:
+                    prepared_answers.append(_prepare_answer(
+                        answer_data, questions_answer_keys, related_values, (question_set_answer_index, 'answers', index)
+                    ))
+                except DjangoValidationError as error:
+                    answers_errors[index] = error.message_dict
+        except DjangoValidationError as error:
+            errors.append(error.message_dict)
+            continue
+        errors.append({'answers': answers_errors} if answers_errors else {})
+        prepared_question_set_answers.append(PreparedQuestionSetAnswer(question_set_answer, prepared_answers))
+
+    if not any(errors):
+        _check_related_values(related_values, errors)
+    if any(errors):
+        raise serializers.ValidationError(errors)
+
+    # The answers signals, which score the answers, are not sent by the bulk inserts
+    score_answers(
+        [answer for question_set_answer in prepared_question_set_answers for answer in question_set_answer.answers]
+    )
+    return prepared_question_set_answers
+
+
+def _insert_answers(answers):
+    """
+    Insert the answers of all types: the base answers rows with a bulk_create, then
+    the rows of each answer subclass with a multi-row INSERT per subclass (bulk_create
+    does not support multi-table inheritance).
+    """
+    base_answers = [
+        Answer(**{field.attname: getattr(answer, field.attname) for field in Answer._meta.concrete_fields})
+        for answer in answers
+    ]
+    Answer.objects.bulk_create(base_answers, batch_size=BATCH_SIZE)
+
+    answers_per_model = {}
+    for answer, base_answer in zip(answers, base_answers):
+        answer.id = answer.answer_ptr_id = base_answer.id
+        answers_per_model.setdefault(type(answer), []).append(answer)
+
+    quote_name = connection.ops.quote_name
+    for model, model_answers in answers_per_model.items():
+        fields = model._meta.local_concrete_fields
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        query = f'INSERT INTO {quote_name(model._meta.db_table)} ({columns}) VALUES '
+        row_placeholders = f'({", ".join(["%s"] * len(fields))})'
+        for start in range(0, len(model_answers), BATCH_SIZE):
+            batch = model_answers[start:start + BATCH_SIZE]
+            with connection.cursor() as cursor:
+                cursor.execute(query + ', '.join([row_placeholders] * len(batch)), [
+                    field.get_db_prep_save(getattr(answer, field.attname), connection)
+                    for answer in batch for field in fields
+                ])
+        for answer in model_answers:
+            answer._state.adding = False
+            answer._state.db = connection.alias
+
+
+def save_question_set_answers(prepared_question_set_answers, session=None):
+    """
+    Save prepared question_set answers and all their answers in a single transaction,
+    with bulk inserts (a fixed number of queries per answer type).
+    The question_set answers that were built from the data are created in the given session.
+    """
+    with transaction.atomic():
+        new_question_set_answers = [
+            prepared.instance for prepared in prepared_question_set_answers if prepared.instance.pk is None
+        ]
+        for question_set_answer in new_question_set_answers:
+            question_set_answer.session = session
+        QuestionSetAnswer.objects.bulk_create(new_question_set_answers, batch_size=BATCH_SIZE)
+
+        answers = []
+        for prepared in prepared_question_set_answers:
+            for answer in prepared.answers:
+                answer.instance.question_set_answer = prepared.instance
+                answers.append(answer)
+        _insert_answers([answer.instance for answer in answers])
+
+        categories_through = []
+        for category in SORT_CATEGORIES:
+            field = AnswerSort._meta.get_field(category)
+            through_model = field.remote_field.through
+            through_rows = [
+                through_model(**{
+                    f'{field.m2m_field_name()}_id': answer.instance.pk,
+                    f'{field.m2m_reverse_field_name()}_id': pk
+                }) for answer in answers for pk in answer.categories.get(category, ())
+            ]
+            categories_through.append((through_model, through_rows))
+        for through_model, through_rows in categories_through:
+            through_model.objects.bulk_create(through_rows, batch_size=BATCH_SIZE)
+
+        area_entries = []
+        for answer in answers:
+            for area_entry in answer.area_entries:
+                area_entry.answer = answer.instance
+                area_entries.append(area_entry)
+        DragAndDropAreaEntry.objects.bulk_create(area_entries, batch_size=BATCH_SIZE)
+
+        # The question_set answers post_save signal is not sent by the bulk inserts
+        refresh_question_set_score_summaries({
+            prepared.instance.question_set_access_id for prepared in prepared_question_set_answers
+            if prepared.instance.question_set_access_id
+        })
+        append_answer_facts([answer.instance for answer in answers])
+
+    # The answers signals are not sent either
+    bump_students_data_versions(questionsetaccess__in={
+        prepared.instance.question_set_access_id for prepared in prepared_question_set_answers
+    })
+
+    return [prepared.instance for prepared in prepared_question_set_answers]
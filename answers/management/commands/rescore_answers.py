@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from answers.models import RescoreJob
+from answers.scoring import rescore_questions, run_rescore_job
+from assessments.models import Question
+
+
+class Command(BaseCommand):
+    """
+    Recompute the validity of the existing answers against the answer keys of their questions.
+    """
+
+    help = 'Rescore the answers to all (or the given) questions and refresh the score summaries of the changed ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assessment', type=int, action='append', dest='assessments',
+                            help='Only rescore the answers to the questions of this assessment (can be repeated)')
+        parser.add_argument('--question-set', type=int, action='append', dest='question_sets',
+                            help='Only rescore the answers to the questions of this question_set (can be repeated)')
+        parser.add_argument('--question', type=int, action='append', dest='questions',
+                            help='Only rescore the answers to this question (can be repeated)')
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Number of answers rescored per transaction')
+        parser.add_argument('--jobs', action='store_true',
+                            help='Run the rescore jobs left pending or running (by a stopped server) instead')
+
+    def handle(self, *args, **options):
+        def progress(rescored_count, changed_count):
+            self.stdout.write(f'{rescored_count} answers rescored, {changed_count} changed')
+
+        if options['jobs']:
+            for job_id in RescoreJob.objects.filter(
+                status__in=[RescoreJob.Status.PENDING, RescoreJob.Status.RUNNING]
+            ).order_by('id').values_list('id', flat=True):
+                changed_count = run_rescore_job(job_id, chunk_size=options['chunk_size'], progress=progress)
+                self.stdout.write(self.style.SUCCESS(f'Rescore job {job_id} done, {changed_count} changed'))
+            return
+
+        questions = Question.objects.all()
+        if options['assessments']:
+            questions = questions.filter(question_set__assessment__in=options['assessments'])
+        if options['question_sets']:
+            questions = questions.filter(question_set__in=options['question_sets'])
+        if options['questions']:
+            questions = questions.filter(id__in=options['questions'])
+
+        changed_count = rescore_questions(
+            questions.values_list('id', flat=True), chunk_size=options['chunk_size'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(f'Answers rescored, {changed_count} changed'))
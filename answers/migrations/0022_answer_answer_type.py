@@ -0,0 +1,41 @@
+# Generated by Django 4.0.5 on 2026-10-17 20:41
+# Migration adding the answer type discriminator, backfilled from the answer subclass tables
+
+from django.db import migrations, models
+
+
+# Answer subclass model of each answer type
+ANSWER_TYPE_MODELS = {
+    'SEL': 'AnswerSEL',
+    'INPUT': 'AnswerInput',
+    'SELECT': 'AnswerSelect',
+    'SORT': 'AnswerSort',
+    'DOMINO': 'AnswerDomino',
+    'NUMBER_LINE': 'AnswerNumberLine',
+    'DRAG_AND_DROP': 'AnswerDragAndDrop',
+    'CUSTOMIZED_DRAG_AND_DROP': 'AnswerCustomizedDragAndDrop',
+    'CALCUL': 'AnswerCalcul',
+    'FIND_HOTSPOT': 'AnswerFindHotspot'
+}
+
+
+class Migration(migrations.Migration):
+
+    def set_answer_types(apps, schema):
+        Answer = apps.get_model('answers', 'Answer')
+        for answer_type, model_name in ANSWER_TYPE_MODELS.items():
+            model = apps.get_model('answers', model_name)
+            Answer.objects.filter(id__in=model.objects.values('answer_ptr')).update(answer_type=answer_type)
+
+    dependencies = [
+        ('answers', '0021_rename_topic_answer_answer_question_set_answer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='answer_type',
+            field=models.CharField(blank=True, choices=[('SEL', 'Social and Emotional Learning'), ('INPUT', 'Input'), ('SELECT', 'Select'), ('SORT', 'Sort'), ('DOMINO', 'Domino'), ('NUMBER_LINE', 'Number line'), ('DRAG_AND_DROP', 'Drag and Drop'), ('CUSTOMIZED_DRAG_AND_DROP', 'Customized Drag and Drop'), ('CALCUL', 'Calcul'), ('FIND_HOTSPOT', 'Find hotspot')], editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(set_answer_types, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.5 on 2026-10-17 20:46
+# Migration adding the answer duration, backfilled from the start and end datetimes of the answers
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('answers', '0022_answer_answer_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='duration_ms',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        # Durations are whole milliseconds, rounded down (timestamps have a microsecond precision)
+        migrations.RunSQL(
+            """
+            UPDATE answers_answer
+            SET duration_ms = FLOOR(ROUND((EXTRACT(EPOCH FROM end_datetime - start_datetime) * 1000000)::numeric) / 1000)
+            WHERE start_datetime IS NOT NULL AND end_datetime IS NOT NULL
+            """,
+            migrations.RunSQL.noop
+        ),
+    ]
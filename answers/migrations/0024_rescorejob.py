@@ -0,0 +1,31 @@
+# Generated by Django 4.0.5 on 2026-10-17 21:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('answers', '0023_answer_duration_ms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RescoreJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_ids', models.JSONField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=32)),
+                ('answers_count', models.IntegerField()),
+                ('rescored_count', models.IntegerField(default=0)),
+                ('changed_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rescore_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
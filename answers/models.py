@@ -1,6 +1,9 @@
+import datetime
+
 from django.db import models
+from django.db.models.query import ModelIterable
 from django.utils import timezone
-from model_utils.managers import InheritanceManager
+from model_utils.managers import InheritanceManager, InheritanceQuerySet
 from users.models import User
 
 
@@ -65,12 +68,117 @@ class QuestionSetAnswer(models.Model):
         return self.session.student
 
 
+def downcast_answers(answers, queryset):
+    """
+    Subclass instances of the base answers, read with one query per answer type present
+    (on the subclass table only). Answers without answer type are downcast by joining
+    all the subclass tables.
+    """
+    answers_per_type = {}
+    for answer in answers:
+        answers_per_type.setdefault(answer.answer_type, []).append(answer)
+
+    db = queryset.db
+    annotations = [*queryset.query.annotation_select, *queryset.query.extra_select]
+    sub_answers = {}
+    for answer_type, type_answers in answers_per_type.items():
+        model = ANSWER_TYPE_MODELS.get(answer_type)
+        pks = [answer.pk for answer in type_answers]
+        if model is None:
+            sub_answers.update(
+                (sub_answer.pk, sub_answer) for sub_answer in
+                Answer.objects.using(db).filter(pk__in=pks).select_subclasses(*ANSWER_TYPE_MODELS.values())
+            )
+            continue
+        answers_by_pk = {answer.pk: answer for answer in type_answers}
+        local_attnames = [field.attname for field in model._meta.local_concrete_fields]
+        if local_attnames == [model._meta.pk.attname]:
+            # Nothing to read from the subclass table
+            rows = [(pk,) for pk in pks]
+        else:
+            rows = model._base_manager.using(db).filter(pk__in=pks).values_list(*local_attnames)
+        for row in rows:
+            local_values = dict(zip(local_attnames, row))
+            answer = answers_by_pk[local_values[model._meta.pk.attname]]
+            sub_answers[answer.pk] = model.from_db(db, [field.attname for field in model._meta.concrete_fields], [
+                local_values[field.attname] if field.attname in local_values else getattr(answer, field.attname)
+                for field in model._meta.concrete_fields
+            ])
+
+    for answer in answers:
+        sub_answer = sub_answers.get(answer.pk)
+        if sub_answer is None:
+            yield answer
+            continue
+        # Keep the related instances (select_related) and the annotations of the base answer
+        sub_answer._state.fields_cache.update(answer._state.fields_cache)
+        for name in annotations:
+            setattr(sub_answer, name, getattr(answer, name))
+        yield sub_answer
+
+
+class AnswerTypeIterable(ModelIterable):
+    """
+    Iterable of the answers downcast to their subclass, without joining all the subclass tables:
+    the subclass rows are read by answer type, for each chunk of base answers.
+    """
+
+    def __iter__(self):
+        answers = ModelIterable(self.queryset, chunked_fetch=self.chunked_fetch, chunk_size=self.chunk_size)
+        if not self.chunked_fetch:
+            yield from downcast_answers(list(answers), self.queryset)
+            return
+        chunk = []
+        for answer in answers:
+            chunk.append(answer)
+            if len(chunk) == self.chunk_size:
+                yield from downcast_answers(chunk, self.queryset)
+                chunk = []
+        yield from downcast_answers(chunk, self.queryset)
+
+
+class AnswerQuerySet(InheritanceQuerySet):
+    """
+    Answers queryset, selecting all the subclasses by answer type.
+    """
+
+    def select_subclasses(self, *subclasses):
+        """
+        Without given subclasses, downcast the answers with the answer_type discriminator
+        (one query per answer type present) instead of joining all the subclass tables.
+        """
+        if subclasses:
+            return super().select_subclasses(*subclasses)
+        queryset = self._chain()
+        queryset._iterable_class = AnswerTypeIterable
+        return queryset
+
+
+class AnswerManager(InheritanceManager):
+    _queryset_class = AnswerQuerySet
+
+
 class Answer(models.Model):
     """
     Answer answer model.
     """
 
-    objects = InheritanceManager()
+    class AnswerType(models.TextChoices):
+        """
+        Answer type enumeration.
+        """
+        SEL = 'SEL', 'Social and Emotional Learning'
+        INPUT = 'INPUT', 'Input'
+        SELECT = 'SELECT', 'Select'
+        SORT = 'SORT', 'Sort'
+        DOMINO = 'DOMINO', 'Domino'
+        NUMBER_LINE = 'NUMBER_LINE', 'Number line'
+        DRAG_AND_DROP = 'DRAG_AND_DROP', 'Drag and Drop'
+        CUSTOMIZED_DRAG_AND_DROP = 'CUSTOMIZED_DRAG_AND_DROP', 'Customized Drag and Drop'
+        CALCUL = 'CALCUL', 'Calcul'
+        FIND_HOTSPOT = 'FIND_HOTSPOT', 'Find hotspot'
+
+    objects = AnswerManager()
 
     question_set_answer = models.ForeignKey(
         'QuestionSetAnswer',
@@ -97,6 +205,22 @@ class Answer(models.Model):
         null=True
     )
 
+    # Duration between the start and the end of the answer in milliseconds, set on save
+    duration_ms = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    # Type of the answer subclass, set on save
+    answer_type = models.CharField(
+        max_length=32,
+        choices=AnswerType.choices,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     @property
     def date(self):
         """
@@ -114,6 +238,12 @@ class Answer(models.Model):
     def __str__(self):
         return f'Answer by {self.student} for {self.question}'
 
+    def save(self, *args, **kwargs):
+        if self.answer_type is None:
+            self.answer_type = get_answer_type(type(self))
+        self.duration_ms = get_duration_ms(self.start_datetime, self.end_datetime)
+        super().save(*args, **kwargs)
+
 
 class AnswerInput(Answer):
     """
@@ -260,4 +390,87 @@ class AnswerCustomizedDragAndDrop(Answer):
 
     right_value = models.IntegerField()
 
-    final_value = models.IntegerField()
\ No newline at end of file
+    final_value = models.IntegerField()
+
+
+# Answer subclass of each answer type
+ANSWER_TYPE_MODELS = {
+    Answer.AnswerType.SEL: AnswerSEL,
+    Answer.AnswerType.INPUT: AnswerInput,
+    Answer.AnswerType.SELECT: AnswerSelect,
+    Answer.AnswerType.SORT: AnswerSort,
+    Answer.AnswerType.DOMINO: AnswerDomino,
+    Answer.AnswerType.NUMBER_LINE: AnswerNumberLine,
+    Answer.AnswerType.DRAG_AND_DROP: AnswerDragAndDrop,
+    Answer.AnswerType.CUSTOMIZED_DRAG_AND_DROP: AnswerCustomizedDragAndDrop,
+    Answer.AnswerType.CALCUL: AnswerCalcul,
+    Answer.AnswerType.FIND_HOTSPOT: AnswerFindHotspot
+}
+
+
+def get_duration_ms(start_datetime, end_datetime):
+    """
+    Duration between two datetimes in (whole) milliseconds, None if one of them is missing
+    """
+    if start_datetime is None or end_datetime is None:
+        return None
+    return (end_datetime - start_datetime) // datetime.timedelta(milliseconds=1)
+
+
+def get_answer_type(model):
+    """
+    Answer type of an answer model, None for the base Answer model
+    """
+    return next((answer_type for answer_type, type_model in ANSWER_TYPE_MODELS.items() if type_model is model), None)
+
+
+class RescoreJob(models.Model):
+    """
+    Rescore job model.
+    Rescore of the answers to some questions too large to be done within a request, run in
+    the background with its progress, so that supervisors can follow it until it is done.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        DONE = 'DONE', 'Done'
+        FAILED = 'FAILED', 'Failed'
+
+    question_ids = models.JSONField()
+
+    status = models.CharField(
+        max_length=32,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+
+    # Number of answers to the questions when the job was created
+    answers_count = models.IntegerField()
+
+    rescored_count = models.IntegerField(
+        default=0
+    )
+
+    changed_count = models.IntegerField(
+        default=0
+    )
+
+    created_by = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        related_name='rescore_jobs',
+        null=True,
+        blank=True
+    )
+
+    created_at = models.DateTimeField(
+        default=timezone.now
+    )
+
+    updated_at = models.DateTimeField(
+        default=timezone.now
+    )
+
+    def __str__(self):
+        return f'Rescore job {self.id} ({self.status})'
@@ -0,0 +1,381 @@
+import threading
+
+from assessments.models import (DominoOption, DraggableOption, Question, QuestionCalcul, QuestionCustomizedDragAndDrop,
+                                QuestionDomino, QuestionDragAndDrop, QuestionInput, QuestionNumberLine, QuestionSelect,
+                                QuestionSort, SelectOption, SortOption)
+from django.db import connection, transaction
+from django.utils import timezone
+from visualization.cache import bump_students_data_versions
+from visualization.utils import refresh_answer_facts_validity, refresh_question_set_score_summaries
+
+from .answer_keys import answer_keys
+from .models import (Answer, AnswerCalcul, AnswerCustomizedDragAndDrop, AnswerDomino, AnswerDragAndDrop, AnswerInput,
+                     AnswerNumberLine, AnswerSelect, AnswerSort, DragAndDropAreaEntry, QuestionSetAnswer, RescoreJob)
+
+SORT_CATEGORIES = ('category_A', 'category_B')
+
+
+class PreparedAnswer:
+    """
+    Answer with its many-to-many and drop area values, which are needed to score it
+    and are not set on the instance while it is not saved.
+    """
+
+    def __init__(self, instance, categories=None, area_entries=None):
+        self.instance = instance
+        self.categories = categories or {}
+        self.area_entries = area_entries or []
+
+
+def score_input_answers(answers, keys):
+    return [keys[answer.instance.question_id].valid_answer == answer.instance.value for answer in answers]
+
+
+def score_number_line_answers(answers, keys):
+    return [keys[answer.instance.question_id].expected_value == answer.instance.value for answer in answers]
+
+
+def score_select_answers(answers, keys):
+    return [
+        answer.instance.selected_option_id in keys[answer.instance.question_id].valid_select_options
+        for answer in answers
+    ]
+
+
+def score_domino_answers(answers, keys):
+    return [
+        answer.instance.selected_domino_id in keys[answer.instance.question_id].valid_domino_options
+        for answer in answers
+    ]
+
+
+def score_calcul_answers(answers, keys):
+    """
+    Operations without an integer result keep their validity.
+    """
+    results = []
+    for answer in answers:
+        key = keys[answer.instance.question_id]
+        if key.expected_result is None:
+            results.append(answer.instance.valid)
+        else:
+            results.append(key.expected_result == answer.instance.value)
+    return results
+
+
+def score_customized_drag_and_drop_answers(answers, keys):
+    """
+    Both operands and the result must be the ones of the question.
+    Operations without an integer result keep their validity.
+    """
+    results = []
+    for answer in answers:
+        key = keys[answer.instance.question_id]
+        if key.expected_result is None:
+            results.append(answer.instance.valid)
+        else:
+            results.append(
+                (answer.instance.left_value, answer.instance.right_value, answer.instance.final_value)
+                == (key.first_value, key.second_value, key.expected_result)
+            )
+    return results
+
+
+def score_sort_answers(answers, keys):
+    """
+    A sort category is valid when all the sort options of its category are selected,
+    the last non empty category decides the validity (as when the categories are added one after the other).
+    Answers without any category keep their validity.
+    """
+    results = []
+    for answer in answers:
+        key = keys[answer.instance.question_id]
+        valid = answer.instance.valid
+        for category in SORT_CATEGORIES:
+            selected_options = answer.categories.get(category)
+            if selected_options:
+                category_options = key.sort_options.get(key.categories.get(category), frozenset())
+                valid = len(category_options.intersection(selected_options)) == len(category_options)
+        results.append(valid)
+    return results
+
+
+def score_drag_and_drop_answers(answers, keys):
+    """
+    A drag and drop answer is valid when every draggable option is dropped on its area
+    (and only there). Questions without any expected area keep the validity of their answers.
+    """
+    results = []
+    for answer in answers:
+        key = keys[answer.instance.question_id]
+        expected = {(option_id, area_id) for option_id, area_id in key.draggable_areas.items() if area_id is not None}
+        dropped = {
+            (area_entry.selected_draggable_option_id, area_entry.area_id)
+            for area_entry in answer.area_entries if area_entry.selected_draggable_option_id is not None
+        }
+        results.append(dropped == expected if expected else answer.instance.valid)
+    return results
+
+
+# Scoring function of each answer type, taking the answers of this type and their answer keys.
+# Answers of the other types (SEL, find hotspot) have no answer key, their validity is kept.
+SCORERS = {
+    AnswerInput: score_input_answers,
+    AnswerNumberLine: score_number_line_answers,
+    AnswerSelect: score_select_answers,
+    AnswerDomino: score_domino_answers,
+    AnswerCalcul: score_calcul_answers,
+    AnswerCustomizedDragAndDrop: score_customized_drag_and_drop_answers,
+    AnswerSort: score_sort_answers,
+    AnswerDragAndDrop: score_drag_and_drop_answers
+}
+
+
+def score_answers(answers):
+    """
+    Set the validity of a batch of prepared answers of mixed types, in memory.
+    The answers are grouped per type and compared to the answer keys of their questions,
+    which are loaded once for the whole batch.
+    Returns the answers instances whose validity changed.
+    """
+    answers_per_model = {}
+    for answer in answers:
+        if type(answer.instance) in SCORERS and answer.instance.question_id is not None:
+            answers_per_model.setdefault(type(answer.instance), []).append(answer)
+
+    keys = answer_keys.get_many({
+        answer.instance.question_id for model_answers in answers_per_model.values() for answer in model_answers
+    })
+
+    changed = []
+    for model, model_answers in answers_per_model.items():
+        model_answers = [answer for answer in model_answers if answer.instance.question_id in keys]
+        for answer, valid in zip(model_answers, SCORERS[model](model_answers, keys)):
+            if answer.instance.valid != valid:
+                answer.instance.valid = valid
+                changed.append(answer.instance)
+    return changed
+
+
+def score_answer(instance, categories=None, area_entries=None):
+    """
+    Set the validity of a single answer, in memory.
+    Returns True if it changed.
+    """
+    return bool(score_answers([PreparedAnswer(instance, categories, area_entries)]))
+
+
+def _sort_category_validity(category):
+    """
+    SQL validity of a sort answer category: all the sort options of the category are selected
+    """
+    field = AnswerSort._meta.get_field(category)
+    through_table = connection.ops.quote_name(field.remote_field.through._meta.db_table)
+    answer_column = field.m2m_column_name()
+    option_column = field.m2m_reverse_name()
+    category_column = connection.ops.quote_name(QuestionSort._meta.get_field(category).column)
+    return f"""(
+        SELECT COUNT(*) FROM {through_table} selected
+        INNER JOIN {SortOption._meta.db_table} sort_option ON sort_option.id = selected.{option_column}
+        WHERE selected.{answer_column} = answer.id AND sort_option.category = question.{category_column}
+    ) = (
+        SELECT COUNT(*) FROM {SortOption._meta.db_table} sort_option
+        WHERE sort_option.category = question.{category_column}
+    )"""
+
+
+def _sort_category_selected(category):
+    field = AnswerSort._meta.get_field(category)
+    return f"""EXISTS (
+        SELECT 1 FROM {connection.ops.quote_name(field.remote_field.through._meta.db_table)} selected
+        WHERE selected.{field.m2m_column_name()} = answer.id
+    )"""
+
+
+def _operation_result():
+    """
+    SQL integer result of the operation of a calcul question (NULL if there is none)
+    """
+    return f"""CASE question.operator
+        WHEN '{QuestionCalcul.OperatorType.ADDITION}' THEN question.first_value + question.second_value
+        WHEN '{QuestionCalcul.OperatorType.SUBTRACTION}' THEN question.first_value - question.second_value
+        WHEN '{QuestionCalcul.OperatorType.MULTIPLICATION}' THEN question.first_value * question.second_value
+        WHEN '{QuestionCalcul.OperatorType.DIVISION}' THEN CASE
+            WHEN question.second_value <> 0 AND MOD(question.first_value, question.second_value) = 0
+            THEN question.first_value / question.second_value
+        END
+    END"""
+
+
+def _drag_and_drop_validity():
+    expected_areas = f"""
+        SELECT draggable_option.id, draggable_option.area_option_id
+        FROM {DraggableOption._meta.db_table} draggable_option
+        WHERE draggable_option.question_drag_and_drop_id = answer.question_id
+            AND draggable_option.area_option_id IS NOT NULL
+    """
+    dropped_areas = f"""
+        SELECT area_entry.selected_draggable_option_id, area_entry.area_id
+        FROM {DragAndDropAreaEntry._meta.db_table} area_entry
+        WHERE area_entry.answer_id = answer.id AND area_entry.selected_draggable_option_id IS NOT NULL
+    """
+    return f"""CASE WHEN EXISTS ({expected_areas}) THEN (
+        NOT EXISTS ({expected_areas} EXCEPT {dropped_areas}) AND NOT EXISTS ({dropped_areas} EXCEPT {expected_areas})
+    ) ELSE answer.valid END"""
+
+
+def get_rescore_validity_sql():
+    """
+    Set based version of the scorers: SQL validity of the answers of each type, from the answer
+    (answer), its answer type row (typed_answer) and its question type row (question).
+    Same rules as the scorers, and the answers without answer key keep their validity.
+    """
+    return {
+        AnswerInput: (QuestionInput, 'typed_answer.value IS NOT DISTINCT FROM question.valid_answer'),
+        AnswerNumberLine: (QuestionNumberLine, 'typed_answer.value IS NOT DISTINCT FROM question.expected_value'),
+        AnswerSelect: (QuestionSelect, f"""COALESCE((
+            SELECT select_option.valid FROM {SelectOption._meta.db_table} select_option
+            WHERE select_option.id = typed_answer.selected_option_id
+                AND select_option.question_select_id = answer.question_id
+        ), FALSE)"""),
+        AnswerDomino: (QuestionDomino, f"""COALESCE((
+            SELECT domino_option.valid FROM {DominoOption._meta.db_table} domino_option
+            WHERE domino_option.id = typed_answer.selected_domino_id
+                AND domino_option.question_domino_id = answer.question_id
+        ), FALSE)"""),
+        AnswerCalcul: (QuestionCalcul, f'COALESCE(typed_answer.value = ({_operation_result()}), answer.valid)'),
+        AnswerCustomizedDragAndDrop: (QuestionCustomizedDragAndDrop, f"""COALESCE(
+            (typed_answer.left_value, typed_answer.right_value, typed_answer.final_value)
+            = (question.first_value, question.second_value, ({_operation_result()})),
+            answer.valid
+        )"""),
+        # The last non empty category decides the validity
+        AnswerSort: (QuestionSort, f"""CASE
+            WHEN {_sort_category_selected('category_B')} THEN {_sort_category_validity('category_B')}
+            WHEN {_sort_category_selected('category_A')} THEN {_sort_category_validity('category_A')}
+            ELSE answer.valid
+        END"""),
+        AnswerDragAndDrop: (QuestionDragAndDrop, _drag_and_drop_validity())
+    }
+
+
+def _rescore_answers_chunk(answer_model, question_model, validity, answer_ids):
+    """
+    Update the validity of the given answers of one type, with a single UPDATE statement.
+    Only the answers whose validity changed are written.
+    Returns the ids and question_set answers of the changed answers.
+    """
+    query = f"""
+        UPDATE {Answer._meta.db_table} target
+        SET valid = scored.valid
+        FROM (
+            SELECT answer.id, {validity} AS valid
+            FROM {Answer._meta.db_table} answer
+            INNER JOIN {answer_model._meta.db_table} typed_answer ON typed_answer.answer_ptr_id = answer.id
+            INNER JOIN {question_model._meta.db_table} question ON question.question_ptr_id = answer.question_id
+            WHERE answer.id = ANY(%s)
+        ) scored
+        WHERE target.id = scored.id AND target.valid IS DISTINCT FROM scored.valid
+        RETURNING target.id, target.question_set_answer_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, [answer_ids])
+        return cursor.fetchall()
+
+
+def rescore_questions(question_ids, chunk_size=10000, progress=None):
+    """
+    Recompute the validity of all the saved answers to the given questions, with set based
+    UPDATE statements (one per answer type) on chunks of chunk_size answers (the next answer ids
+    after the previous chunk), each chunk in its own transaction. The score summaries, facts
+    and cached dashboards of the changed answers are refreshed.
+    progress is called after each chunk with the number of answers rescored and changed so far.
+    Returns the number of answers whose validity changed.
+    """
+    question_ids = set(question_ids)
+    # Rescoring follows answer keys edits, the cached ones may be outdated
+    for question_id in question_ids:
+        answer_keys.invalidate(question_id)
+
+    question_ids_per_model = {}
+    for question in Question.objects.filter(id__in=question_ids).select_subclasses():
+        question_ids_per_model.setdefault(type(question), []).append(question.id)
+
+    answers = Answer.objects.filter(question__in=question_ids).order_by('id')
+    validity_sql = get_rescore_validity_sql()
+    rescored_count = 0
+    changed_count = 0
+    last_answer_id = 0
+    while True:
+        answer_ids = list(answers.filter(id__gt=last_answer_id).values_list('id', flat=True)[:chunk_size])
+        if not answer_ids:
+            break
+        last_answer_id = answer_ids[-1]
+
+        with transaction.atomic():
+            changed_answers = []
+            for answer_model, (question_model, validity) in validity_sql.items():
+                if question_ids_per_model.get(question_model):
+                    changed_answers += _rescore_answers_chunk(answer_model, question_model, validity, answer_ids)
+            if changed_answers:
+                refresh_question_set_score_summaries(set(QuestionSetAnswer.objects.filter(
+                    id__in={question_set_answer_id for _, question_set_answer_id in changed_answers},
+                    question_set_access__isnull=False
+                ).values_list('question_set_access', flat=True)))
+                refresh_answer_facts_validity([answer_id for answer_id, _ in changed_answers])
+        if changed_answers:
+            bump_students_data_versions(questionsetaccess__question_set_answers__in={
+                question_set_answer_id for _, question_set_answer_id in changed_answers
+            })
+        rescored_count += len(answer_ids)
+        changed_count += len(changed_answers)
+        if progress is not None:
+            progress(rescored_count, changed_count)
+
+    return changed_count
+
+
+def start_rescore_job(question_ids, user=None):
+    """
+    Create a rescore job of the answers to the given questions, run in a background thread once the
+    current transaction is committed. Jobs left pending or running when the process stops are run
+    again by rescore_answers --jobs.
+    """
+    question_ids = list(question_ids)
+    job = RescoreJob.objects.create(
+        question_ids=question_ids, created_by=user,
+        answers_count=Answer.objects.filter(question__in=question_ids).count()
+    )
+
+    def run():
+        try:
+            run_rescore_job(job.id)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
+    return job
+
+
+def run_rescore_job(job_id, chunk_size=10000, progress=None):
+    """
+    Run the rescore job, recording its status and its progress after each chunk.
+    progress is also called after each chunk, as by rescore_questions.
+    Returns the number of answers whose validity changed.
+    """
+    jobs = RescoreJob.objects.filter(id=job_id)
+    question_ids = jobs.values_list('question_ids', flat=True).get()
+    jobs.update(status=RescoreJob.Status.RUNNING, rescored_count=0, changed_count=0, updated_at=timezone.now())
+
+    def record_progress(rescored_count, changed_count):
+        jobs.update(rescored_count=rescored_count, changed_count=changed_count, updated_at=timezone.now())
+        if progress is not None:
+            progress(rescored_count, changed_count)
+
+    try:
+        changed_count = rescore_questions(question_ids, chunk_size=chunk_size, progress=record_progress)
+    except Exception:
+        jobs.update(status=RescoreJob.Status.FAILED, updated_at=timezone.now())
+        raise
+    jobs.update(status=RescoreJob.Status.DONE, updated_at=timezone.now())
+    return changed_count
@@ -5,15 +5,21 @@ from assessments.serializers import (QuestionSetAccessSerializer,
                                      SortOptionSerializer,
                                      DraggableOptionSerializer,
                                      AreaOptionSerializer)
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 from users.models import User
 from users.serializers import UserSerializer
 
 from admin.lib.serializers import NestedRelatedField, PolymorphicSerializer
 
+from .ingestion import (ANSWER_MODELS, PreparedQuestionSetAnswer, prepare_answers, prepare_question_set_answers,
+                        save_question_set_answers)
+
 from .models import (Answer, AnswerCalcul, AnswerDomino, AnswerInput, AnswerNumberLine, AnswerSEL,
                      AnswerSelect, AnswerSession, AnswerSort, DragAndDropAreaEntry,
-                     AnswerDragAndDrop, QuestionSetAnswer, AnswerCustomizedDragAndDrop)
+                     AnswerDragAndDrop, QuestionSetAnswer, AnswerCustomizedDragAndDrop, RescoreJob)
+from .scoring import score_answer
 
 
 class QuestionSetAnswerSerializer(serializers.ModelSerializer):
@@ -61,33 +67,12 @@ class AnswerSerializer(PolymorphicSerializer):
     def to_internal_value(self, data):
         data = data.copy()
         question = Question.objects.get_subclass(id=data['question'])
-        question_type = type(question).__name__
-        if question_type == 'QuestionInput':
-            data['type'] = 'AnswerInput'
-        elif question_type == 'QuestionNumberLine':
-            data['type'] = 'AnswerNumberLine'
-        elif question_type == 'QuestionSelect':
-            data['type'] = 'AnswerSelect'
-        elif question_type == 'QuestionSort':
-            data['type'] = 'AnswerSort'
-        elif question_type == 'QuestionDragAndDrop':
-            data['type'] = 'AnswerDragAndDrop'
-        elif question_type == 'QuestionSEL':
-            data['type'] = 'AnswerSEL'
-        elif question_type == 'QuestionDomino':
-            data['type'] = 'AnswerDomino'
-        elif question_type == 'QuestionCalcul':
-            data['type'] = 'AnswerCalcul'
-        elif question_type == 'QuestionCustomizedDragAndDrop':
-            data['type'] = 'AnswerCustomizedDragAndDrop'
+        answer_model = ANSWER_MODELS.get(type(question).__name__)
+        if answer_model is not None:
+            data['type'] = answer_model.__name__
         return super().to_internal_value(data)
 
 
-    def to_representation(self, obj):
-        sub_obj = Answer.objects.get_subclass(id=obj.id)
-        return super().to_representation(sub_obj)
-
-
 class AbstractAnswerSerializer(serializers.ModelSerializer):
     """
     Abstract serializer for Answer models.
@@ -223,6 +208,9 @@ class AnswerDragAndDropSerializer(AbstractAnswerSerializer):
                 area_entry_serializer.is_valid(raise_exception=True)
                 area_entry_serializer.save()
 
+            if score_answer(instance, area_entries=instance.draganddropareaentry_set.all()):
+                Answer.objects.filter(id=instance.id).update(valid=instance.valid)
+
         return instance
 
 class AnswerSELSerializer(AbstractAnswerSerializer):
@@ -246,43 +234,48 @@ class AnswerDominoSerializer(AbstractAnswerSerializer):
 class QuestionSetAnswerFullSerializer(serializers.ModelSerializer):
     """
     Question set answer serializer.
+    The answers are validated and created in bulk (see answers.ingestion).
     """
 
     question_set_access = NestedRelatedField(
         model=QuestionSetAccess, serializer_class=QuestionSetAccessSerializer)
-    answers = AnswerSerializer(many=True)
+    answers = AnswerSerializer(many=True, read_only=True)
 
     class Meta:
         model = QuestionSetAnswer
         fields = '__all__'
         extra_kwargs = {'session': {'required': False}}
 
+    def validate(self, attrs):
+        """
+        Validate all the answers at once.
+        """
+        if 'answers' not in self.initial_data:
+            raise serializers.ValidationError({'answers': 'This field is required.'})
+        attrs['answers'] = prepare_answers(self.initial_data['answers'])
+        return attrs
+
     def create(self, validated_data):
         """
         Create assessment question set answer with answers.
         """
+        answers = validated_data.pop('answers')
 
-        if 'answers' in validated_data:
-            validated_data.pop('answers')
-            answers = self.initial_data['answers']
-
-        question_set_answer = super().create(validated_data)
+        with transaction.atomic():
+            question_set_answer = super().create(validated_data)
+            save_question_set_answers([PreparedQuestionSetAnswer(question_set_answer, answers)])
 
-        if answers is not None:
-            for answer in answers:
-                answer_serializer = AnswerSerializer(
-                    data={**answer, 'question_set_answer': question_set_answer.id})
-                answer_serializer.is_valid(raise_exception=True)
-                answer_serializer.save()
-
-        return question_set_answer
+        return QuestionSetAnswer.objects.prefetch_related(
+            Prefetch('answers', queryset=Answer.objects.select_subclasses())
+        ).get(pk=question_set_answer.pk)
 
 
 class AnswerSessionFullSerializer(serializers.ModelSerializer):
     """
     Answer session full serializer (with question set and answers).
+    The question set answers and their answers are validated and created in bulk (see answers.ingestion).
     """
-    question_set_answers = QuestionSetAnswerFullSerializer(many=True)
+    question_set_answers = QuestionSetAnswerFullSerializer(many=True, read_only=True)
     student = NestedRelatedField(
         model=User, serializer_class=UserSerializer)
 
@@ -290,22 +283,39 @@ class AnswerSessionFullSerializer(serializers.ModelSerializer):
         model = AnswerSession
         fields = '__all__'
 
+    def validate(self, attrs):
+        """
+        Validate all the question set answers and their answers at once.
+        """
+        if 'question_set_answers' not in self.initial_data:
+            raise serializers.ValidationError({'question_set_answers': 'This field is required.'})
+        try:
+            attrs['question_set_answers'] = prepare_question_set_answers(self.initial_data['question_set_answers'])
+        except serializers.ValidationError as error:
+            raise serializers.ValidationError({'question_set_answers': error.detail})
+        return attrs
+
     def create(self, validated_data):
         """
         Create session with assessment question set answers.
         """
-        if 'question_set_answers' in validated_data:
-            validated_data.pop('question_set_answers')
-            question_set_answers = self.initial_data['question_set_answers']
+        question_set_answers = validated_data.pop('question_set_answers')
 
-        session = super().create(validated_data)
+        with transaction.atomic():
+            session = super().create(validated_data)
+            save_question_set_answers(question_set_answers, session=session)
 
-        if question_set_answers is not None:
-            for question_set_answer in question_set_answers:
-                question_set_answer_serializer = QuestionSetAnswerFullSerializer(
-                    data={**question_set_answer, 'session': session.id})
-                question_set_answer_serializer.is_valid(raise_exception=True)
-                question_set_answer_serializer.save()
+        return AnswerSession.objects.prefetch_related(
+            Prefetch('question_set_answers__answers', queryset=Answer.objects.select_subclasses())
+        ).get(pk=session.pk)
 
-        return session
 
+class RescoreJobSerializer(serializers.ModelSerializer):
+    """
+    Rescore job serializer.
+    """
+
+    class Meta:
+        model = RescoreJob
+        fields = ['id', 'question_ids', 'status', 'answers_count', 'rescored_count', 'changed_count',
+                  'created_at', 'updated_at']
@@ -1,58 +1,86 @@
-from assessments.models import Question, SelectOption, SortOption
+from assessments.models import DominoOption, DraggableOption, Question, SelectOption, SortOption
 from django.conf import settings
-from django.db.models.signals import m2m_changed, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import AnswerInput, AnswerNumberLine, AnswerSelect, AnswerSort
+from .answer_keys import answer_keys
+from .models import (Answer, AnswerCalcul, AnswerCustomizedDragAndDrop, AnswerDomino, AnswerInput, AnswerNumberLine,
+                     AnswerSelect, AnswerSort)
+from .scoring import score_answer
 
 
 @receiver(pre_save, sender=AnswerInput)
-def check_answer_input_validity(sender, instance=None, **kwargs):
-    """
-    Check answer validity for question input.
-    """
-    question_answer = Question.objects.get_subclass(
-        id=instance.question_id).valid_answer
-    if question_answer == instance.value:
-        instance.valid = True
-    else:
-        instance.valid = False
-
-
 @receiver(pre_save, sender=AnswerNumberLine)
-def check_answer_number_line_validity(sender, instance=None, **kwargs):
+@receiver(pre_save, sender=AnswerSelect)
+@receiver(pre_save, sender=AnswerDomino)
+@receiver(pre_save, sender=AnswerCalcul)
+@receiver(pre_save, sender=AnswerCustomizedDragAndDrop)
+def check_answer_validity(sender, instance=None, **kwargs):
     """
-    Check answer validity for question input.
+    Check answer validity against the answer key of the question.
+    Sort and drag and drop answers are checked once their options are saved.
     """
-"""     question_answer = Question.objects.get_subclass(
-        id=instance.question_id).expected_value
-    if question_answer == instance.value:
-        instance.valid = True
-    else:
-        instance.valid = False """
+    score_answer(instance)
+
 
 @receiver(m2m_changed, sender=AnswerSort.category_A.through)
 @receiver(m2m_changed, sender=AnswerSort.category_B.through)
 def check_answer_sort_validity(sender, instance=None, action=None, pk_set=None, **kwargs):
     """
-    Check answer validity for question input.
+    Check answer validity for question sort.
     Triggered when many-to-many relationship on category_A or category_B is changed.
     """
     if action == 'post_add':
-        if 'category_A' in sender.__name__:
-            category_name = Question.objects.get_subclass(
-                id=instance.question_id).category_A
-        else:
-            category_name = Question.objects.get_subclass(
-                id=instance.question_id).category_B
-
-        count_selected = SortOption.objects.filter(
-            id__in=pk_set, category=category_name).count()
-        count_expected = SortOption.objects.filter(
-            category=category_name).count()
-
-        if count_selected != count_expected:
-            instance.valid = False
-        else:
-            instance.valid = True
-        instance.save()
+        category = 'category_A' if 'category_A' in sender.__name__ else 'category_B'
+        if score_answer(instance, categories={category: pk_set}):
+            # Only the validity changed, no need to save (and validate) the whole answer again
+            Answer.objects.filter(id=instance.id).update(valid=instance.valid)
+
+
+def invalidate_question_answer_key(sender, instance=None, **kwargs):
+    """
+    Remove the answer key of the question from the cache when it is changed.
+    """
+    answer_keys.invalidate(instance.id)
+
+
+for question_model in (Question, *Question.__subclasses__()):
+    post_save.connect(invalidate_question_answer_key, sender=question_model)
+    post_delete.connect(invalidate_question_answer_key, sender=question_model)
+
+
+@receiver(post_save, sender=SelectOption)
+@receiver(post_delete, sender=SelectOption)
+def invalidate_select_option_answer_key(sender, instance=None, **kwargs):
+    """
+    Remove the answer key of the option question from the cache when the option is changed.
+    """
+    answer_keys.invalidate(instance.question_select_id)
+
+
+@receiver(post_save, sender=DraggableOption)
+@receiver(post_delete, sender=DraggableOption)
+def invalidate_draggable_option_answer_key(sender, instance=None, **kwargs):
+    """
+    Remove the answer key of the option question from the cache when the option is changed.
+    """
+    answer_keys.invalidate(instance.question_drag_and_drop_id)
+
+
+@receiver(post_save, sender=DominoOption)
+@receiver(post_delete, sender=DominoOption)
+def invalidate_domino_option_answer_key(sender, instance=None, **kwargs):
+    """
+    Remove the answer key of the option question from the cache when the option is changed.
+    """
+    answer_keys.invalidate(instance.question_domino_id)
+
+
+@receiver(post_save, sender=SortOption)
+@receiver(post_delete, sender=SortOption)
+def invalidate_sort_option_answer_keys(sender, instance=None, **kwargs):
+    """
+    Sort options are matched by category name across the questions,
+    so all the answer keys are removed from the cache when one is changed.
+    """
+    answer_keys.clear()
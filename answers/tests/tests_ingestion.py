@@ -0,0 +1,127 @@
+from datetime import date
+
+from answers.models import Answer, AnswerInput, AnswerSelect, AnswerSession, QuestionSetAnswer
+from assessments.models import QuestionSetAccess
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from visualization.models import AnswerFact, QuestionSetScoreSummary
+
+
+class AnswersIngestionTests(APITestCase):
+    """
+    Bulk answers ingestion tests, from a student account: a session with its question_set answers
+    and answers to the question_set 3 (question 1 input, question 2 select with the valid option 1).
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up authentication, and the access of the student 1 to the question_set 3.
+        """
+        token = Token.objects.get(user=1)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.access = QuestionSetAccess.objects.create(
+            student_id=1, question_set_id=3, start_date=date.today(), end_date=date.today()
+        )
+        self.url = reverse('answer-session-create-all', kwargs={'student_id': 1})
+
+    def create_session(self, answers):
+        return self.client.post(self.url, {
+            'student': 1,
+            'start_date': '2024-01-01T10:00:00Z',
+            'end_date': '2024-01-01T10:10:00Z',
+            'question_set_answers': [{
+                'question_set': 3,
+                'start_date': '2024-01-01T10:00:00Z',
+                'end_date': '2024-01-01T10:05:00Z',
+                'answers': answers
+            }]
+        }, format='json')
+
+    def test_create_session(self):
+        """
+        Ensure that the answers of all types are created with their subclass rows, scored server side,
+        with the score summary and answer facts of the question_set answer.
+        """
+        response = self.create_session([
+            {
+                'question': 1, 'value': 'Mr and Mrs Dursley', 'valid': False,
+                'start_datetime': '2024-01-01T10:00:00Z', 'end_datetime': '2024-01-01T10:00:02.500Z'
+            },
+            {'question': 2, 'selected_option': 2, 'valid': True}
+        ])
+        self.assertEqual(response.status_code, 201)
+
+        question_set_answer = QuestionSetAnswer.objects.get(session=response.data['id'])
+        self.assertEqual(question_set_answer.question_set_access, self.access)
+        self.assertTrue(question_set_answer.complete)
+        answers = {answer.question_id: answer for answer in question_set_answer.answers.select_subclasses()}
+        self.assertIsInstance(answers[1], AnswerInput)
+        self.assertEqual(answers[1].value, 'Mr and Mrs Dursley')
+        self.assertEqual(answers[1].answer_type, 'INPUT')
+        self.assertEqual(answers[1].duration_ms, 2500)
+        self.assertTrue(answers[1].valid)
+        self.assertIsInstance(answers[2], AnswerSelect)
+        self.assertEqual(answers[2].selected_option_id, 2)
+        self.assertFalse(answers[2].valid)
+
+        summary = QuestionSetScoreSummary.objects.get(question_set=3, student=1)
+        self.assertEqual(summary.first_attempt_answers_count, 2)
+        self.assertEqual(summary.first_attempt_correct_answers_count, 1)
+        self.assertEqual(AnswerFact.objects.filter(answer__in=answers.values()).count(), 2)
+
+    def test_create_session_invalid(self):
+        """
+        Ensure that invalid answers are rejected with errors keyed by answer index and field, and nothing is saved.
+        """
+        response = self.create_session([
+            {'question': 999, 'value': '42', 'valid': False},
+            {'question': 1, 'value': '42', 'valid': False, 'start_datetime': 'yesterday'}
+        ])
+        self.assertEqual(response.status_code, 400)
+        answers_errors = response.data['question_set_answers'][0]['answers']
+        self.assertEqual(set(answers_errors), {0, 1})
+        self.assertIn('question', answers_errors[0])
+        self.assertIn('start_datetime', answers_errors[1])
+        self.assertFalse(AnswerSession.objects.exists())
+
+    def test_create_session_invalid_related(self):
+        """
+        Ensure that missing related objects are rejected with errors keyed by answer index and field.
+        """
+        response = self.create_session([
+            {'question': 1, 'value': '42', 'valid': False},
+            {'question': 2, 'selected_option': 999, 'valid': False}
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['question_set_answers'], [
+            {'answers': {1: {'selected_option': ['Invalid pk "999" - object does not exist.']}}}
+        ])
+        self.assertFalse(AnswerSession.objects.exists())
+        self.assertFalse(Answer.objects.exists())
+
+    def test_create_session_duplicates(self):
+        """
+        Ensure that several answers to the same question are all created, and that a missing related
+        object referenced by several answers is reported for each of them.
+        """
+        response = self.create_session([
+            {'question': 2, 'selected_option': 999, 'valid': False},
+            {'question': 2, 'selected_option': 999, 'valid': False}
+        ])
+        self.assertEqual(response.status_code, 400)
+        error = ['Invalid pk "999" - object does not exist.']
+        self.assertEqual(response.data['question_set_answers'], [
+            {'answers': {0: {'selected_option': error}, 1: {'selected_option': error}}}
+        ])
+
+        response = self.create_session([
+            {'question': 1, 'value': '42', 'valid': False},
+            {'question': 1, 'value': 'Mr and Mrs Dursley', 'valid': False}
+        ])
+        self.assertEqual(response.status_code, 201)
+        answers = AnswerInput.objects.filter(question_set_answer__session=response.data['id']).order_by('id')
+        self.assertEqual([(answer.value, answer.valid) for answer in answers], [
+            ('42', False), ('Mr and Mrs Dursley', True)
+        ])
@@ -0,0 +1,150 @@
+from datetime import date
+
+from answers.models import (Answer, AnswerCalcul, AnswerCustomizedDragAndDrop, AnswerDomino, AnswerDragAndDrop,
+                            AnswerFindHotspot, AnswerInput, AnswerNumberLine, AnswerSEL, AnswerSelect, AnswerSession,
+                            AnswerSort, QuestionSetAnswer)
+from assessments.models import QuestionSetAccess
+from django.db.models import F
+from django.test import TestCase
+
+
+class AnswersLoadingTests(TestCase):
+    """
+    Answers loading tests: select_subclasses downcasts the answers with their answer_type,
+    reading each subclass table once instead of joining all of them.
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up a question_set answer of the student 1 to the question_set 3.
+        """
+        access = QuestionSetAccess.objects.create(
+            student_id=1, question_set_id=3, start_date=date.today(), end_date=date.today()
+        )
+        session = AnswerSession.objects.create(student_id=1)
+        self.question_set_answer = QuestionSetAnswer.objects.create(question_set_access=access, session=session)
+
+    def create_answer(self, model, **values):
+        return model.objects.create(question_set_answer=self.question_set_answer, valid=False, **values)
+
+    def assertLoaded(self, model, answer_type, **values):
+        """
+        Ensure that an answer of the model is loaded as an instance of the model with its values,
+        with a query on the base table and one on the subclass table (if it has its own columns).
+        """
+        answer = self.create_answer(model, **values)
+        self.assertEqual(answer.answer_type, answer_type)
+        with self.assertNumQueries(2 if values else 1):
+            loaded_answer, = Answer.objects.filter(id=answer.id).select_subclasses()
+        self.assertIs(type(loaded_answer), model)
+        self.assertEqual(loaded_answer.pk, answer.pk)
+        self.assertEqual(loaded_answer.question_set_answer_id, self.question_set_answer.id)
+        for name, value in values.items():
+            self.assertEqual(getattr(loaded_answer, name), value)
+
+    def test_load_input(self):
+        """
+        Ensure that input answers are loaded as input answers.
+        """
+        self.assertLoaded(AnswerInput, 'INPUT', value='42')
+
+    def test_load_number_line(self):
+        """
+        Ensure that number line answers are loaded as number line answers.
+        """
+        self.assertLoaded(AnswerNumberLine, 'NUMBER_LINE', value=8)
+
+    def test_load_select(self):
+        """
+        Ensure that select answers are loaded as select answers.
+        """
+        self.assertLoaded(AnswerSelect, 'SELECT', selected_option_id=1)
+
+    def test_load_sort(self):
+        """
+        Ensure that sort answers are loaded as sort answers.
+        """
+        self.assertLoaded(AnswerSort, 'SORT')
+
+    def test_load_drag_and_drop(self):
+        """
+        Ensure that drag and drop answers are loaded as drag and drop answers.
+        """
+        self.assertLoaded(AnswerDragAndDrop, 'DRAG_AND_DROP')
+
+    def test_load_sel(self):
+        """
+        Ensure that SEL answers are loaded as SEL answers.
+        """
+        self.assertLoaded(AnswerSEL, 'SEL', statement='A_LOT')
+
+    def test_load_domino(self):
+        """
+        Ensure that domino answers are loaded as domino answers.
+        """
+        self.assertLoaded(AnswerDomino, 'DOMINO', selected_domino_id=None)
+
+    def test_load_calcul(self):
+        """
+        Ensure that calcul answers are loaded as calcul answers.
+        """
+        self.assertLoaded(AnswerCalcul, 'CALCUL', value=12)
+
+    def test_load_customized_drag_and_drop(self):
+        """
+        Ensure that customized drag and drop answers are loaded as customized drag and drop answers.
+        """
+        self.assertLoaded(
+            AnswerCustomizedDragAndDrop, 'CUSTOMIZED_DRAG_AND_DROP', left_value=3, right_value=4, final_value=7
+        )
+
+    def test_load_find_hotspot(self):
+        """
+        Ensure that find hotspot answers are loaded as find hotspot answers.
+        """
+        self.assertLoaded(AnswerFindHotspot, 'FIND_HOTSPOT')
+
+    def test_load_mixed(self):
+        """
+        Ensure that answers of several types keep their order, annotations and related instances,
+        with one query per answer type with its own columns.
+        """
+        answers = [
+            self.create_answer(AnswerInput, value='42'),
+            self.create_answer(AnswerSEL, statement='A_LITTLE'),
+            self.create_answer(AnswerSort),
+            self.create_answer(AnswerInput, value='24')
+        ]
+        with self.assertNumQueries(3):
+            loaded_answers = list(Answer.objects.filter(id__in=[answer.id for answer in answers]).select_related(
+                'question_set_answer'
+            ).annotate(session_id=F('question_set_answer__session')).order_by('id').select_subclasses())
+            self.assertEqual(
+                [type(answer) for answer in loaded_answers], [AnswerInput, AnswerSEL, AnswerSort, AnswerInput]
+            )
+            self.assertEqual([loaded_answers[0].value, loaded_answers[1].statement, loaded_answers[3].value],
+                             ['42', 'A_LITTLE', '24'])
+            for answer in loaded_answers:
+                self.assertEqual(answer.question_set_answer, self.question_set_answer)
+                self.assertEqual(answer.session_id, self.question_set_answer.session_id)
+
+    def test_load_chunked(self):
+        """
+        Ensure that iterating the answers in chunks downcasts each chunk.
+        """
+        answers = [self.create_answer(AnswerInput, value=str(index)) for index in range(5)]
+        loaded_answers = list(Answer.objects.filter(
+            id__in=[answer.id for answer in answers]
+        ).order_by('id').select_subclasses().iterator(chunk_size=2))
+        self.assertEqual([answer.value for answer in loaded_answers], ['0', '1', '2', '3', '4'])
+
+    def test_load_without_answer_type(self):
+        """
+        Ensure that answers without answer type (e.g. from fixtures) are downcast by joining the subclass tables.
+        """
+        answer = self.create_answer(AnswerInput, value='42')
+        Answer.objects.filter(id=answer.id).update(answer_type=None)
+        loaded_answer, = Answer.objects.filter(id=answer.id).select_subclasses()
+        self.assertIs(type(loaded_answer), AnswerInput)
+        self.assertEqual(loaded_answer.value, '42')
@@ -0,0 +1,150 @@
+from datetime import date
+from io import StringIO
+
+from answers.models import AnswerInput, AnswerSelect, AnswerSession, QuestionSetAnswer, RescoreJob
+from answers.scoring import rescore_questions, run_rescore_job
+from assessments.models import QuestionInput, QuestionSetAccess, SelectOption
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from visualization.models import QuestionSetScoreSummary
+
+
+class AnswersRescoringTests(APITestCase):
+    """
+    Answers rescoring tests, after the answer keys of the questions of the question_set 3
+    (input question 1 and select question 2) are edited.
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up authentication, answers of the student 1 to both questions (valid ones first), then change
+        the valid answer of the input question and the valid option of the select question.
+        """
+        token = Token.objects.get(user__username='supervisor')  # id: 4
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+        access = QuestionSetAccess.objects.create(
+            student_id=1, question_set_id=3, start_date=date.today(), end_date=date.today()
+        )
+        question_set_answer = QuestionSetAnswer.objects.create(
+            question_set_access=access, session=AnswerSession.objects.create(student_id=1)
+        )
+        self.input_answers = [
+            AnswerInput.objects.create(question_set_answer=question_set_answer, question_id=1, value=value, valid=False)
+            for value in ('Mr and Mrs Dursley', 'Harry')
+        ]
+        self.select_answers = [
+            AnswerSelect.objects.create(
+                question_set_answer=question_set_answer, question_id=2, selected_option_id=option_id, valid=False
+            )
+            for option_id in (1, 2)
+        ]
+        question_set_answer.complete = True
+        question_set_answer.save()
+        self.assertEqual(self.get_validity(), [True, False, True, False])
+
+        # Edits which don't send the signals invalidating the answer keys
+        QuestionInput.objects.filter(id=1).update(valid_answer='Harry')
+        SelectOption.objects.filter(id=1).update(valid=False)
+        SelectOption.objects.filter(id=2).update(valid=True)
+
+    def get_validity(self):
+        return [
+            *AnswerInput.objects.filter(id__in=[answer.id for answer in self.input_answers]).order_by('id').values_list(
+                'valid', flat=True
+            ),
+            *AnswerSelect.objects.filter(id__in=[answer.id for answer in self.select_answers]).order_by('id').values_list(
+                'valid', flat=True
+            )
+        ]
+
+    def test_rescore_questions(self):
+        """
+        Ensure that rescoring updates the validity of the answers chunk by chunk, with their score summary.
+        """
+        progress = []
+        changed_count = rescore_questions([1, 2], chunk_size=3, progress=lambda *counts: progress.append(counts))
+        self.assertEqual(changed_count, 4)
+        self.assertEqual(progress, [(3, 3), (4, 4)])
+        self.assertEqual(self.get_validity(), [False, True, False, True])
+        self.assertEqual(QuestionSetScoreSummary.objects.get(question_set=3, student=1).correct_answers_count, 2)
+
+        # Rescoring again changes nothing
+        self.assertEqual(rescore_questions([1, 2]), 0)
+
+    def test_rescore_question(self):
+        """
+        Ensure that supervisors can rescore the answers to a question of their assessment.
+        """
+        url = reverse('question-sets-questions-rescore', args=[2, 3, 1])
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'answers_changed': 2})
+        self.assertEqual(self.get_validity(), [False, True, True, False])
+
+    def test_rescore_assessment(self):
+        """
+        Ensure that supervisors can rescore the answers to all the questions of their assessment.
+        """
+        url = reverse('assessments-rescore', args=[2])
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'answers_changed': 4})
+        self.assertEqual(self.get_validity(), [False, True, False, True])
+
+    def test_rescore_no_access(self):
+        """
+        Ensure that supervisors cannot rescore the answers to an assessment they haven't created.
+        """
+        url = reverse('assessment-question-sets-rescore', args=[1, 1])
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(RESCORE_REQUEST_MAX_ANSWERS=3)
+    def test_rescore_job(self):
+        """
+        Ensure that larger rescores are run by a rescore job, whose status and progress can be polled.
+        """
+        url = reverse('assessment-question-sets-rescore', args=[2, 3])
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertIsNone(response.data['answers_changed'])
+        self.assertEqual(response.data['job']['status'], RescoreJob.Status.PENDING)
+        self.assertEqual(response.data['job']['answers_count'], 4)
+        # The job is started once committed
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.get_validity(), [True, False, True, False])
+
+        job_id = response.data['job']['id']
+        run_rescore_job(job_id)
+        response = self.client.get(reverse('rescore-job-detail', args=[job_id]), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], RescoreJob.Status.DONE)
+        self.assertEqual((response.data['rescored_count'], response.data['changed_count']), (4, 4))
+        self.assertEqual(self.get_validity(), [False, True, False, True])
+
+    def test_rescore_job_other_supervisor(self):
+        """
+        Ensure that supervisors cannot see the rescore jobs of other supervisors.
+        """
+        job = RescoreJob.objects.create(question_ids=[1], answers_count=2, created_by_id=5)
+        response = self.client.get(reverse('rescore-job-detail', args=[job.id]), format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rescore_jobs_command(self):
+        """
+        Ensure that rescore_answers --jobs runs the jobs interrupted by a stopped server.
+        """
+        job = RescoreJob.objects.create(
+            question_ids=[1, 2], answers_count=4, status=RescoreJob.Status.RUNNING, rescored_count=1
+        )
+        call_command('rescore_answers', jobs=True, chunk_size=2, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, RescoreJob.Status.DONE)
+        self.assertEqual((job.rescored_count, job.changed_count), (4, 4))
+        self.assertEqual(self.get_validity(), [False, True, False, True])
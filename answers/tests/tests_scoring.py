@@ -0,0 +1,268 @@
+from unittest import mock
+
+from answers.answer_keys import AnswerKey
+from answers.models import (AnswerCalcul, AnswerCustomizedDragAndDrop, AnswerDomino, AnswerDragAndDrop, AnswerInput,
+                            AnswerNumberLine, AnswerSEL, AnswerSelect, AnswerSort, DragAndDropAreaEntry)
+from answers.scoring import (PreparedAnswer, score_answers, score_calcul_answers,
+                             score_customized_drag_and_drop_answers, score_domino_answers,
+                             score_drag_and_drop_answers, score_input_answers, score_number_line_answers,
+                             score_select_answers, score_sort_answers)
+from assessments.models import (QuestionCalcul, QuestionCustomizedDragAndDrop, QuestionDomino, QuestionDragAndDrop,
+                                QuestionInput, QuestionNumberLine, QuestionSelect, QuestionSort)
+from django.test import SimpleTestCase
+
+QUESTION_ID = 1
+
+
+class AnswersScoringTests(SimpleTestCase):
+    """
+    Answers scoring tests, against answer keys built in memory.
+    """
+
+    def score(self, scorer, key, instance, **prepared_values):
+        """
+        Validity of a single answer to the question QUESTION_ID, given by the scorer.
+        """
+        instance.question_id = QUESTION_ID
+        return scorer([PreparedAnswer(instance, **prepared_values)], {QUESTION_ID: key})[0]
+
+    # INPUT
+
+    def test_input_valid(self):
+        """
+        Ensure that an input answer equal to the valid answer is valid.
+        """
+        key = AnswerKey(QuestionInput(id=QUESTION_ID, valid_answer='42'))
+        self.assertTrue(self.score(score_input_answers, key, AnswerInput(value='42', valid=False)))
+
+    def test_input_invalid(self):
+        """
+        Ensure that an input answer different from the valid answer is invalid.
+        """
+        key = AnswerKey(QuestionInput(id=QUESTION_ID, valid_answer='42'))
+        self.assertFalse(self.score(score_input_answers, key, AnswerInput(value='24', valid=True)))
+
+    # NUMBER LINE
+
+    def test_number_line_valid(self):
+        """
+        Ensure that a number line answer equal to the expected value is valid.
+        """
+        key = AnswerKey(QuestionNumberLine(id=QUESTION_ID, expected_value=7))
+        self.assertTrue(self.score(score_number_line_answers, key, AnswerNumberLine(value=7, valid=False)))
+
+    def test_number_line_invalid(self):
+        """
+        Ensure that a number line answer different from the expected value is invalid.
+        """
+        key = AnswerKey(QuestionNumberLine(id=QUESTION_ID, expected_value=7))
+        self.assertFalse(self.score(score_number_line_answers, key, AnswerNumberLine(value=8, valid=True)))
+
+    # SELECT
+
+    def test_select_valid(self):
+        """
+        Ensure that a select answer with a valid option is valid.
+        """
+        key = AnswerKey(QuestionSelect(id=QUESTION_ID))
+        key.valid_select_options = frozenset({10, 11})
+        self.assertTrue(self.score(score_select_answers, key, AnswerSelect(selected_option_id=11, valid=False)))
+
+    def test_select_invalid(self):
+        """
+        Ensure that a select answer with an invalid (or without) option is invalid.
+        """
+        key = AnswerKey(QuestionSelect(id=QUESTION_ID))
+        key.valid_select_options = frozenset({10})
+        self.assertFalse(self.score(score_select_answers, key, AnswerSelect(selected_option_id=12, valid=True)))
+        self.assertFalse(self.score(score_select_answers, key, AnswerSelect(selected_option_id=None, valid=True)))
+
+    # DOMINO
+
+    def test_domino_valid(self):
+        """
+        Ensure that a domino answer with a valid domino is valid.
+        """
+        key = AnswerKey(QuestionDomino(id=QUESTION_ID, expected_value=5))
+        key.valid_domino_options = frozenset({20})
+        self.assertTrue(self.score(score_domino_answers, key, AnswerDomino(selected_domino_id=20, valid=False)))
+
+    def test_domino_invalid(self):
+        """
+        Ensure that a domino answer with an invalid domino is invalid.
+        """
+        key = AnswerKey(QuestionDomino(id=QUESTION_ID, expected_value=5))
+        key.valid_domino_options = frozenset({20})
+        self.assertFalse(self.score(score_domino_answers, key, AnswerDomino(selected_domino_id=21, valid=True)))
+
+    # CALCUL
+
+    def test_calcul_valid(self):
+        """
+        Ensure that a calcul answer equal to the result of the operation is valid.
+        """
+        key = AnswerKey(QuestionCalcul(
+            id=QUESTION_ID, first_value=12, second_value=4, operator=QuestionCalcul.OperatorType.DIVISION
+        ))
+        self.assertTrue(self.score(score_calcul_answers, key, AnswerCalcul(value=3, valid=False)))
+
+    def test_calcul_invalid(self):
+        """
+        Ensure that a calcul answer different from the result of the operation is invalid.
+        """
+        key = AnswerKey(QuestionCalcul(
+            id=QUESTION_ID, first_value=3, second_value=5, operator=QuestionCalcul.OperatorType.SUBTRACTION
+        ))
+        self.assertFalse(self.score(score_calcul_answers, key, AnswerCalcul(value=2, valid=True)))
+        self.assertTrue(self.score(score_calcul_answers, key, AnswerCalcul(value=-2, valid=False)))
+
+    def test_calcul_keeps_validity(self):
+        """
+        Ensure that calcul answers keep their validity when the operation has no integer result.
+        """
+        for first_value, second_value in ((7, 2), (7, 0)):
+            key = AnswerKey(QuestionCalcul(
+                id=QUESTION_ID, first_value=first_value, second_value=second_value,
+                operator=QuestionCalcul.OperatorType.DIVISION
+            ))
+            self.assertTrue(self.score(score_calcul_answers, key, AnswerCalcul(value=3, valid=True)))
+            self.assertFalse(self.score(score_calcul_answers, key, AnswerCalcul(value=3, valid=False)))
+
+    # CUSTOMIZED DRAG AND DROP
+
+    def get_customized_drag_and_drop_key(self, first_value, second_value, operator):
+        return AnswerKey(QuestionCustomizedDragAndDrop(
+            id=QUESTION_ID, first_value=first_value, second_value=second_value, operator=operator
+        ))
+
+    def test_customized_drag_and_drop_valid(self):
+        """
+        Ensure that a customized drag and drop answer with the operands and the result of the operation is valid.
+        """
+        key = self.get_customized_drag_and_drop_key(3, 4, QuestionCustomizedDragAndDrop.OperatorType.MULTIPLICATION)
+        answer = AnswerCustomizedDragAndDrop(left_value=3, right_value=4, final_value=12, valid=False)
+        self.assertTrue(self.score(score_customized_drag_and_drop_answers, key, answer))
+
+    def test_customized_drag_and_drop_invalid(self):
+        """
+        Ensure that a customized drag and drop answer is invalid if an operand or the result is wrong.
+        """
+        key = self.get_customized_drag_and_drop_key(3, 4, QuestionCustomizedDragAndDrop.OperatorType.MULTIPLICATION)
+        for values in ((3, 4, 13), (4, 3, 12), (2, 6, 12)):
+            answer = AnswerCustomizedDragAndDrop(
+                left_value=values[0], right_value=values[1], final_value=values[2], valid=True
+            )
+            self.assertFalse(self.score(score_customized_drag_and_drop_answers, key, answer))
+
+    def test_customized_drag_and_drop_keeps_validity(self):
+        """
+        Ensure that customized drag and drop answers keep their validity when the operation has no integer result.
+        """
+        key = self.get_customized_drag_and_drop_key(3, 0, QuestionCustomizedDragAndDrop.OperatorType.DIVISION)
+        for valid in (True, False):
+            answer = AnswerCustomizedDragAndDrop(left_value=3, right_value=0, final_value=0, valid=valid)
+            self.assertEqual(self.score(score_customized_drag_and_drop_answers, key, answer), valid)
+
+    # SORT
+
+    def get_sort_key(self):
+        key = AnswerKey(QuestionSort(id=QUESTION_ID, category_A='FRUITS', category_B='BUGS'))
+        key.categories = {'category_A': 'FRUITS', 'category_B': 'BUGS'}
+        key.sort_options = {'FRUITS': frozenset({1, 2}), 'BUGS': frozenset({3})}
+        return key
+
+    def test_sort_valid(self):
+        """
+        Ensure that a sort answer with all the options of its categories is valid.
+        """
+        key = self.get_sort_key()
+        categories = {'category_A': {1, 2}, 'category_B': {3}}
+        self.assertTrue(self.score(score_sort_answers, key, AnswerSort(valid=False), categories=categories))
+
+    def test_sort_invalid(self):
+        """
+        Ensure that a sort answer missing an option of its last category is invalid.
+        """
+        key = self.get_sort_key()
+        categories = {'category_A': {1}}
+        self.assertFalse(self.score(score_sort_answers, key, AnswerSort(valid=True), categories=categories))
+        # The last non empty category decides the validity
+        categories = {'category_A': {1, 2}, 'category_B': {2}}
+        self.assertFalse(self.score(score_sort_answers, key, AnswerSort(valid=True), categories=categories))
+
+    def test_sort_keeps_validity(self):
+        """
+        Ensure that sort answers without any category keep their validity.
+        """
+        key = self.get_sort_key()
+        for valid in (True, False):
+            self.assertEqual(self.score(score_sort_answers, key, AnswerSort(valid=valid)), valid)
+
+    # DRAG AND DROP
+
+    def get_drag_and_drop_key(self, draggable_areas):
+        key = AnswerKey(QuestionDragAndDrop(id=QUESTION_ID))
+        key.draggable_areas = draggable_areas
+        return key
+
+    def get_area_entries(self, dropped_areas):
+        return [
+            DragAndDropAreaEntry(selected_draggable_option_id=option_id, area_id=area_id)
+            for option_id, area_id in dropped_areas
+        ]
+
+    def test_drag_and_drop_valid(self):
+        """
+        Ensure that a drag and drop answer with every option dropped on its area is valid.
+        """
+        key = self.get_drag_and_drop_key({1: 10, 2: 20, 3: None})
+        area_entries = self.get_area_entries([(1, 10), (2, 20), (None, 30)])
+        self.assertTrue(self.score(
+            score_drag_and_drop_answers, key, AnswerDragAndDrop(valid=False), area_entries=area_entries
+        ))
+
+    def test_drag_and_drop_invalid(self):
+        """
+        Ensure that a drag and drop answer with a missing, misplaced or extra option is invalid.
+        """
+        key = self.get_drag_and_drop_key({1: 10, 2: 20, 3: None})
+        for dropped_areas in ([(1, 10)], [(1, 20), (2, 10)], [(1, 10), (2, 20), (3, 10)]):
+            self.assertFalse(self.score(
+                score_drag_and_drop_answers, key, AnswerDragAndDrop(valid=True),
+                area_entries=self.get_area_entries(dropped_areas)
+            ))
+
+    def test_drag_and_drop_keeps_validity(self):
+        """
+        Ensure that drag and drop answers keep their validity when the question has no expected area.
+        """
+        key = self.get_drag_and_drop_key({1: None})
+        for valid in (True, False):
+            self.assertEqual(self.score(
+                score_drag_and_drop_answers, key, AnswerDragAndDrop(valid=valid),
+                area_entries=self.get_area_entries([(1, 10)])
+            ), valid)
+
+    # BATCH
+
+    def test_score_answers(self):
+        """
+        Ensure that a batch of answers of mixed types is scored against the answer keys of their questions,
+        and that answers without answer key keep their validity.
+        """
+        keys = {
+            1: AnswerKey(QuestionInput(id=1, valid_answer='42')),
+            2: AnswerKey(QuestionNumberLine(id=2, expected_value=7))
+        }
+        answers = [
+            AnswerInput(question_id=1, value='42', valid=False),
+            AnswerNumberLine(question_id=2, value=8, valid=True),
+            AnswerNumberLine(question_id=2, value=7, valid=True),
+            # Unknown question and answer type without answer key
+            AnswerInput(question_id=3, value='42', valid=False),
+            AnswerSEL(question_id=1, statement='A_LOT', valid=True)
+        ]
+        with mock.patch('answers.scoring.answer_keys.get_many', return_value=keys):
+            changed = score_answers([PreparedAnswer(answer) for answer in answers])
+        self.assertEqual(changed, answers[:2])
+        self.assertEqual([answer.valid for answer in answers], [True, False, True, False, True])
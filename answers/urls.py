@@ -5,6 +5,9 @@ from . import views
 
 # Create a router and register our viewsets with it.
 router = SimpleRouter()
+router.register(r'rescore-jobs', views.RescoreJobsViewSet, basename='rescore-job')
+# /answers/rescore-jobs/
+# /answers/rescore-jobs/{job_pk}/
 router.register(r'(?P<student_id>\d+)/sessions',
                 views.AnswerSessionsViewSet, basename='answer-session')
 # /answers/<student_id>/sessions/
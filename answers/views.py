@@ -5,20 +5,23 @@ from gamification.signals import on_question_set_answer_submission
 
 from assessments.models import QuestionSetAccess, Question
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
+from django.db.models import Count, Q
 from rest_framework.decorators import action
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from users.permissions import HasAccess, IsStudent
+from rest_framework.viewsets import GenericViewSet
+from users.permissions import HasAccess, IsStudent, IsSupervisor
 from gamification.models import Profile, QuestionSetCompetency
 
 from admin.lib.viewsets import ModelViewSet
+from visualization.utils import append_answer_facts, refresh_question_set_score_summaries
 
-from .models import Answer, AnswerSession, QuestionSetAnswer
+from .models import Answer, AnswerSession, QuestionSetAnswer, RescoreJob
 from .serializers import (AnswerSerializer, AnswerSessionFullSerializer,
                           AnswerSessionSerializer,
                           QuestionSetAnswerFullSerializer,
-                          QuestionSetAnswerSerializer)
+                          QuestionSetAnswerSerializer, RescoreJobSerializer)
 
 
 class AnswersViewSet(ModelViewSet):
@@ -72,6 +75,16 @@ class AnswersViewSet(ModelViewSet):
 
         return super().create(request, **kwargs)
 
+    def perform_create(self, serializer):
+        """
+        Create the answer, refresh the score summary of its question_set answer and append its fact.
+        """
+        answer = serializer.save()
+        question_set_access = answer.question_set_answer.question_set_access_id
+        if question_set_access:
+            refresh_question_set_score_summaries([question_set_access])
+            append_answer_facts([answer])
+
     def update(self, request, pk=None):
         return Response('Cannot update answer', status=403)
 
@@ -124,34 +137,52 @@ class AnswerSessionsViewSet(ModelViewSet):
         """
         student_id = int(self.kwargs.get('student_id', None))
         request_data = request.data.copy()
-
-        for question_set_answer in request_data.get('question_set_answers', []):
+        question_set_answers = request_data.get('question_set_answers', [])
+
+        # Get all the question_set accesses and questions counts at once
+        accesses = {
+            access.question_set_id: access for access in QuestionSetAccess.objects.filter(
+                Q(question_set__in=[
+                    question_set_answer.get('question_set') for question_set_answer in question_set_answers
+                    if question_set_answer.get('question_set', None)
+                ]),
+                Q(student=student_id),
+                Q(start_date__lte=date.today()) | Q(
+                    start_date__isnull=True),
+                Q(end_date__gte=date.today()) | Q(end_date__isnull=True)
+            )
+        }
+        accesses_question_sets = dict(QuestionSetAccess.objects.filter(id__in=[
+            question_set_answer.get('question_set_access') for question_set_answer in question_set_answers
+            if not question_set_answer.get('question_set', None) and question_set_answer.get('question_set_access')
+        ]).values_list('id', 'question_set'))
+
+        question_set_ids = []
+        for question_set_answer in question_set_answers:
             question_set_id = None
 
             # Get question_set_access
             if question_set_answer.get('question_set', None):
-                question_set_id = question_set_answer.get('question_set')
-                try:
-                    question_set_access = QuestionSetAccess.objects.get(
-                        Q(question_set=question_set_id),
-                        Q(student=student_id),
-                        Q(start_date__lte=date.today()) | Q(
-                            start_date__isnull=True),
-                        Q(end_date__gte=date.today()) | Q(end_date__isnull=True)
-                    )
-                    question_set_answer['question_set_access'] = question_set_access
-                    question_set_answer.pop('question_set')
-                except ObjectDoesNotExist:
+                question_set_id = int(question_set_answer.get('question_set'))
+                if question_set_id not in accesses:
                     return Response('Student does not have access to this question_set', status=400)
+                question_set_answer['question_set_access'] = accesses[question_set_id]
+                question_set_answer.pop('question_set')
 
-            if not question_set_answer['question_set_access']:
+            if not question_set_answer.get('question_set_access'):
                 return Response('No question_set access defined', status=400)
 
-            # Check if question_set answer is complete
             if question_set_id is None:
-                question_set_id = QuestionSetAccess.objects.values_list(
-                    'question_set__id', flat=True).get(id=question_set_answer.get('question_set_access'))
-            count_questions_in_question_set = Question.objects.filter(question_set=question_set_id).count()
+                question_set_id = accesses_question_sets.get(int(question_set_answer.get('question_set_access')))
+            question_set_ids.append(question_set_id)
+
+        questions_count = dict(Question.objects.filter(
+            question_set__in=question_set_ids
+        ).order_by().values('question_set').annotate(count=Count('id')).values_list('question_set', 'count'))
+
+        for question_set_answer, question_set_id in zip(question_set_answers, question_set_ids):
+            # Check if question_set answer is complete
+            count_questions_in_question_set = questions_count.get(question_set_id, 0)
             count_questions_answered = len(question_set_answer['answers'])
             question_set_answer['complete'] = (count_questions_answered == count_questions_in_question_set)
 
@@ -326,3 +357,15 @@ class QuestionSetAnswersViewSet(ModelViewSet):
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=201, headers=headers)
+
+
+class RescoreJobsViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
+    """
+    Rescore jobs viewset: status and progress of the rescore jobs started by the supervisor.
+    """
+
+    serializer_class = RescoreJobSerializer
+    permission_classes = [IsAuthenticated, IsSupervisor]
+
+    def get_queryset(self):
+        return RescoreJob.objects.filter(created_by=self.request.user).order_by('-id')
@@ -0,0 +1,44 @@
+from django.utils import timezone
+
+from visualization.cache import CONTENT_DATA_VERSION, bump_data_versions
+from visualization.models import AnswerFact, QuestionSetScoreSummary
+
+from .models import Assessment, Question, QuestionSet, Tombstone
+from .sync import get_question_sets_attachments
+
+
+def mark_question_sets_pending_delete(question_sets):
+    """
+    Mark the question_sets as pending deletion: they are hidden at once, and purged with their questions,
+    accesses and answers later by purge_pending_deletes. The tombstones of their content are recorded now,
+    the purge does not send the deletion signals. Their score summaries and answer facts are removed now
+    (and no longer computed), so that the dashboards stop showing them.
+    """
+    question_set_ids = list(question_sets.values_list('id', flat=True))
+    QuestionSet.all_objects.filter(id__in=question_set_ids).update(pending_delete=True, updated_at=timezone.now())
+    QuestionSetScoreSummary.objects.filter(question_set__in=question_set_ids).delete()
+    AnswerFact.objects.filter(question_set__in=question_set_ids).delete()
+
+    Tombstone.objects.bulk_create([
+        *(Tombstone(content_type=Tombstone.ContentType.QUESTION_SET, object_id=question_set_id)
+          for question_set_id in question_set_ids),
+        *(Tombstone(content_type=Tombstone.ContentType.QUESTION, object_id=question_id)
+          for question_id in Question.objects.filter(question_set__in=question_set_ids).values_list('id', flat=True)),
+        *(Tombstone(content_type=Tombstone.ContentType.ATTACHMENT, object_id=attachment_id)
+          for attachment_id in get_question_sets_attachments(question_set_ids).values_list('id', flat=True))
+    ])
+    # The content signals are not sent by the update
+    bump_data_versions([CONTENT_DATA_VERSION])
+
+
+def mark_assessments_pending_delete(assessments):
+    """
+    Mark the assessments and their question_sets as pending deletion (see mark_question_sets_pending_delete)
+    """
+    assessment_ids = list(assessments.values_list('id', flat=True))
+    Assessment.all_objects.filter(id__in=assessment_ids).update(pending_delete=True, updated_at=timezone.now())
+    Tombstone.objects.bulk_create([
+        Tombstone(content_type=Tombstone.ContentType.ASSESSMENT, object_id=assessment_id)
+        for assessment_id in assessment_ids
+    ])
+    mark_question_sets_pending_delete(QuestionSet.objects.filter(assessment__in=assessment_ids))
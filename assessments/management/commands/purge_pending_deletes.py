@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from admin.lib.deletion import purge_pending_deletes
+from assessments.models import Assessment, QuestionSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Purge the students, assessments and question_sets marked as pending deletion, with all their data.
+    """
+
+    help = 'Delete the students, assessments and question_sets pending deletion, in bounded chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help='Number of students, assessments or question_sets purged per transaction')
+
+    def handle(self, *args, **options):
+        for model in (User, Assessment, QuestionSet):
+            def progress(purged_count):
+                self.stdout.write(f'{purged_count} {model._meta.verbose_name_plural} purged')
+
+            purged_count = purge_pending_deletes(model, chunk_size=options['chunk_size'], progress=progress)
+            self.stdout.write(self.style.SUCCESS(f'{model._meta.verbose_name_plural.capitalize()} purged, {purged_count} deleted'))
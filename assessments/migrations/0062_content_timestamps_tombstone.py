@@ -0,0 +1,68 @@
+# Generated by Django 4.0.5 on 2026-10-17 20:59
+# Migration adding the content timestamps, backfilled with the migration date, and the content tombstones
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assessments', '0061_questionsetaccess_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='created_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='updated_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='created_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='updated_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='questionset',
+            name='created_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='questionset',
+            name='updated_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('ASSESSMENT', 'Assessment'), ('QUESTION_SET', 'Set of questions'), ('QUESTION', 'Question'), ('ATTACHMENT', 'Attachment')], max_length=32)),
+                ('object_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('student', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        # Existing contents are considered updated when the timestamps are introduced
+        migrations.RunSQL(
+            """
+            UPDATE assessments_assessment SET updated_at = NOW() WHERE updated_at IS NULL;
+            UPDATE assessments_questionset SET updated_at = NOW() WHERE updated_at IS NULL;
+            UPDATE assessments_question SET updated_at = NOW() WHERE updated_at IS NULL;
+            UPDATE assessments_attachment SET updated_at = NOW() WHERE updated_at IS NULL;
+            """,
+            migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.5 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0062_content_timestamps_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='pending_delete',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='questionset',
+            name='pending_delete',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.core.validators import MinValueValidator
 from django.db import models
 from model_utils.managers import InheritanceManager
+from admin.lib.deletion import PendingDeleteManager
 from users.models import User
 from django.utils import timezone
 
@@ -82,6 +83,31 @@ class Assessment(models.Model):
         null=True
     )
 
+    created_at = models.DateTimeField(
+        editable=False,
+        null=True
+    )
+
+    updated_at = models.DateTimeField(
+        null=True
+    )
+
+    # Deleted assessments are hidden until they are purged (see purge_pending_deletes)
+    pending_delete = models.BooleanField(
+        default=False,
+        db_index=True
+    )
+
+    objects = PendingDeleteManager()
+    all_objects = models.Manager()
+
+    def save(self, *args, **kwargs):
+        ''' On save, update timestamps'''
+        if not self.id:
+            self.created_at = timezone.now()
+        self.updated_at = timezone.now()
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.title}' \
             f' ({self.subject} grade {self.grade}, {self.country} - {self.language})'
@@ -153,9 +179,34 @@ class QuestionSet(models.Model):
         null=True
     )
 
+    created_at = models.DateTimeField(
+        editable=False,
+        null=True
+    )
+
+    updated_at = models.DateTimeField(
+        null=True
+    )
+
+    # Deleted question_sets are hidden until they are purged (see purge_pending_deletes)
+    pending_delete = models.BooleanField(
+        default=False,
+        db_index=True
+    )
+
+    objects = PendingDeleteManager()
+    all_objects = models.Manager()
+
     class Meta:
         ordering = ['order']
 
+    def save(self, *args, **kwargs):
+        ''' On save, update timestamps'''
+        if not self.id:
+            self.created_at = timezone.now()
+        self.updated_at = timezone.now()
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.name} ({self.assessment.id})'
 
@@ -752,6 +803,22 @@ class Attachment(models.Model):
         blank=True
     )
 
+    created_at = models.DateTimeField(
+        editable=False,
+        null=True
+    )
+
+    updated_at = models.DateTimeField(
+        null=True
+    )
+
+    def save(self, *args, **kwargs):
+        ''' On save, update timestamps'''
+        if not self.id:
+            self.created_at = timezone.now()
+        self.updated_at = timezone.now()
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         return f'[{self.attachment_type}] {self.file}'
 
@@ -827,3 +894,39 @@ class LearningObjective(models.Model):
         max_length=255,
         default=''
     )
+
+
+class Tombstone(models.Model):
+    """
+    Record of a content deleted (or of a question_set access revoked for a student),
+    so that the students devices can remove it on their next sync.
+    """
+
+    class ContentType(models.TextChoices):
+        ASSESSMENT = 'ASSESSMENT', 'Assessment'
+        QUESTION_SET = 'QUESTION_SET', 'Set of questions'
+        QUESTION = 'QUESTION', 'Question'
+        ATTACHMENT = 'ATTACHMENT', 'Attachment'
+
+    content_type = models.CharField(
+        max_length=32,
+        choices=ContentType.choices
+    )
+
+    object_id = models.IntegerField()
+
+    # Student whose access was revoked, null if the content was deleted for everyone.
+    # Tombstones outlive the students, hence no database constraint.
+    student = models.ForeignKey(
+        'users.User',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+
+    deleted_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True
+    )
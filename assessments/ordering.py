@@ -0,0 +1,57 @@
+from django.db.models import Case, When
+from django.utils import timezone
+
+from visualization.cache import CONTENT_DATA_VERSION, bump_data_versions
+
+from .models import Question
+
+
+def save_orders(model, instances_orders):
+    """
+    Set the new order of the (instance, order) pairs, and save the instances whose order changed with
+    a single bulk_update (their save methods and signals are skipped, so their updated_at is set here).
+    Returns the changed instances.
+    """
+    now = timezone.now()
+    changed_instances = []
+    for instance, order in instances_orders:
+        if instance.order != order:
+            instance.order = order
+            instance.updated_at = now
+            changed_instances.append(instance)
+    if changed_instances:
+        model.objects.bulk_update(changed_instances, ['order', 'updated_at'])
+        # The content signals are not sent by the bulk update
+        bump_data_versions([CONTENT_DATA_VERSION])
+    return changed_instances
+
+
+def save_orders_by_ids(model, instances, ordered_ids):
+    """
+    Set the order of the instances from the position of their id in ordered_ids (order starts at 1),
+    the instances missing from ordered_ids keep their order.
+    """
+    orders = {}
+    for index, instance_id in enumerate(ordered_ids):
+        orders.setdefault(instance_id, index + 1)
+    return save_orders(model, [
+        (instance, orders[instance.id]) for instance in instances if instance.id in orders
+    ])
+
+
+def move_sel_questions_first(assessment, first_question_set_id):
+    """
+    If the assessment has the “Contains SEL questions” set as true, move its SEL questions to its
+    first question_set, at the beginning of its questions.
+    """
+    sel_questions = Question.objects.filter(question_type='SEL', question_set__assessment=assessment)
+    if not (assessment.sel_question and sel_questions.exists()):
+        return
+    sel_questions.exclude(question_set=first_question_set_id).update(
+        question_set=first_question_set_id, updated_at=timezone.now()
+    )
+    all_questions = Question.objects.filter(question_set=first_question_set_id).order_by(
+        Case(When(question_type='SEL', then=0), default=1), 'order'
+    )
+    # Order of each question is its position + 1 (order can't be zero)
+    save_orders(Question, [(question, index + 1) for index, question in enumerate(all_questions)])
@@ -1,4 +1,7 @@
 from datetime import date
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from django.db.models.query_utils import RegisterLookupMixin
@@ -9,6 +12,7 @@ from users.serializers import (CountrySerializer, LanguageSerializer,
                                UserSerializer)
 
 from admin.lib.serializers import NestedRelatedField, PolymorphicSerializer
+from visualization.cache import bump_students_data_versions
 
 from users.models import Language, Country
 from users.serializers import LanguageSerializer, CountrySerializer
@@ -17,6 +21,7 @@ from .models import (AreaOption, Assessment, QuestionSet, QuestionSetAccess,
                      Attachment, DominoOption, DraggableOption, Hint, Question, QuestionCalcul, QuestionDomino, QuestionDragAndDrop, QuestionFindHotspot, QuestionInput,
                      QuestionNumberLine, QuestionSEL, QuestionSelect, QuestionSort, QuestionCustomizedDragAndDrop,
                      SelectOption, SortOption, Topic, LearningObjective, NumberRange)
+from .ordering import save_orders
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
@@ -330,6 +335,39 @@ class NumberRangeSerializer(serializers.ModelSerializer):
         model = NumberRange
         fields = ('id', 'min', 'max', 'handle')
 
+# Relations of each question type read by its serializer
+QUESTION_CONTENT_LOOKUPS = {
+    QuestionSelect: ('options__attachments',),
+    QuestionSort: ('options__attachments',),
+    QuestionDomino: ('options',),
+    QuestionDragAndDrop: ('drop_areas',),
+}
+
+
+def get_questions_queryset():
+    """
+    Questions downcast to their subclasses, with their hint and whether they have answers
+    """
+    return Question.objects.select_subclasses().select_related('hint').annotate(
+        has_answers=Exists(Answer.objects.filter(question=OuterRef('pk')))
+    )
+
+
+def prefetch_questions_content(questions):
+    """
+    Prefetch the attachments, hints attachments and options of the (downcast) questions,
+    a few queries per question type instead of several per question
+    """
+    questions_by_type = {}
+    for question in questions:
+        questions_by_type.setdefault(type(question), []).append(question)
+    for question_type, typed_questions in questions_by_type.items():
+        prefetch_related_objects(
+            typed_questions, 'attachments', 'hint__attachments', *QUESTION_CONTENT_LOOKUPS.get(question_type, ())
+        )
+    return questions
+
+
 class QuestionSerializer(PolymorphicSerializer):
     """
     Question serializer.
@@ -352,10 +390,6 @@ class QuestionSerializer(PolymorphicSerializer):
             'QuestionFindHotspot': QuestionFindHotspotSerializer
         }
 
-    def to_representation(self, obj):
-        sub_obj = Question.objects.get_subclass(id=obj.id)
-        return super().to_representation(sub_obj)
-
     def to_internal_value(self, data):
         data = data.copy()
         type_dict = {
@@ -393,6 +427,9 @@ class AbstractQuestionSerializer(serializers.ModelSerializer):
     answered = serializers.SerializerMethodField()
 
     def get_answered(self, instance):
+        # Annotated by the querysets loading the whole content tree (see get_questions_queryset)
+        if hasattr(instance, 'has_answers'):
+            return instance.has_answers
         return Answer.objects.filter(question=instance).exists()
 
     def create(self, validated_data):
@@ -420,16 +457,11 @@ class AbstractQuestionSerializer(serializers.ModelSerializer):
 
         # Reorder all other questions to maintain consistent order
         request_order = validated_data['order']
-        questions = Question.objects.filter(question_set=validated_data['question_set']).select_subclasses()
-        # Create an array with the question_sets from the InheritanceQuerySet
-        questions_list = list(questions)
+        questions_list = list(Question.objects.filter(question_set=validated_data['question_set']).exclude(id=question.id))
         # Places the question in the position of the array equivalent to its new order
-        questions_list.remove(question)
         questions_list.insert((request_order - 1) if (request_order > 0) else 0, question)
         # Order of each question is its position in the array + 1 (order can't be zero)
-        for index, question in enumerate(questions_list):
-            question.order = index + 1
-            question.save()
+        save_orders(Question, [(ordered_question, index + 1) for index, ordered_question in enumerate(questions_list)])
 
         if hint_data is not None:
             hint_serializer = HintSerializer(
@@ -493,19 +525,15 @@ class AbstractQuestionSerializer(serializers.ModelSerializer):
         # Check if question order changed to reorder all others questions
         if 'order' in validated_data and instance.order != validated_data['order']:
             request_order = validated_data['order']
-            questions = Question.objects.filter(question_set=validated_data['question_set']).select_subclasses()
-
-            # Create an array with the question_sets from the InheritanceQuerySet
-            questions_list = list(questions)
+            questions_list = list(
+                Question.objects.filter(question_set=validated_data['question_set']).exclude(id=instance.id)
+            )
 
             # Places the question in the position of the array equivalent to its new order
-            questions_list.remove(instance)
             questions_list.insert((request_order - 1) if (request_order > 0) else 0, instance)
 
             # Order of each question is its position in the array + 1 (order can't be zero)
-            for index, question in enumerate(questions_list):
-                question.order = index + 1
-                question.save()
+            save_orders(Question, [(question, index + 1) for index, question in enumerate(questions_list)])
 
         return super().update(instance, validated_data)
 
@@ -760,22 +788,39 @@ class QuestionCustomizedDragAndDropSerializer(AbstractQuestionSerializer):
 
 class QuestionSetAccessListSerializer(serializers.ListSerializer):
     def create(self, validated_data):
-        to_create = []
-        to_update = []
-        for item in validated_data:
-            try:
-                obj = QuestionSetAccess.objects.get(
-                    student=item['student'], question_set=item['question_set'])
-                obj.start_date = item['start_date']
-                obj.end_date = item['end_date']
-                obj.updated_at = timezone.now()
-                to_update.append(obj)
-            except QuestionSetAccess.DoesNotExist:
-                to_create.append(QuestionSetAccess(**item, created_at = timezone.now(), updated_at = timezone.now()))
-        created = QuestionSetAccess.objects.bulk_create(to_create)
-        QuestionSetAccess.objects.bulk_update(
-            to_update, ['start_date', 'end_date', 'updated_at'])
-        return (created if created is not None else []) + to_update
+        """
+        Create the accesses, or update the dates of the existing ones (same student and question_set),
+        with a single INSERT ... ON CONFLICT statement.
+        """
+        # The last item of a student and question_set wins, a row cannot be upserted twice by a statement
+        items = {(item['student'].id, item['question_set'].id): item for item in validated_data}
+        if not items:
+            return []
+        query = f"""
+            INSERT INTO {QuestionSetAccess._meta.db_table} (
+                student_id, question_set_id, start_date, end_date, created_at, updated_at
+            )
+            SELECT item.student_id, item.question_set_id, item.start_date, item.end_date, %s, %s
+            FROM unnest(%s::integer[], %s::integer[], %s::date[], %s::date[])
+                AS item(student_id, question_set_id, start_date, end_date)
+            ON CONFLICT ON CONSTRAINT unique_access_per_student_and_question_set DO UPDATE SET
+                start_date = EXCLUDED.start_date, end_date = EXCLUDED.end_date, updated_at = EXCLUDED.updated_at
+            RETURNING id
+        """
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(query, [
+                now, now,
+                [student_id for student_id, question_set_id in items],
+                [question_set_id for student_id, question_set_id in items],
+                [item.get('start_date') for item in items.values()],
+                [item.get('end_date') for item in items.values()]
+            ])
+            access_ids = [row[0] for row in cursor.fetchall()]
+        # The accesses signals are not sent by the raw statement
+        bump_students_data_versions(id__in={student_id for student_id, question_set_id in items})
+        accesses = QuestionSetAccess.objects.in_bulk(access_ids)
+        return [accesses[access_id] for access_id in access_ids]
 
 
 class QuestionSetAccessSerializer(serializers.ModelSerializer):
@@ -804,7 +849,11 @@ class QuestionSetDeepSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_has_sel_question(self, instance):
-        return instance.order == 1 and instance.assessment.sel_question and Question.objects.filter(question_type='SEL', question_set=instance).exists()
+        if not (instance.order == 1 and instance.assessment.sel_question):
+            return False
+        if 'question_set' in getattr(instance, '_prefetched_objects_cache', {}):
+            return any(question.question_type == 'SEL' for question in instance.question_set.all())
+        return Question.objects.filter(question_type='SEL', question_set=instance).exists()
 
 class AssessmentDeepSerializer(serializers.ModelSerializer):
 
@@ -815,15 +864,53 @@ class AssessmentDeepSerializer(serializers.ModelSerializer):
         model = Assessment
         fields = '__all__'
 
+    @staticmethod
+    def prefetch_tree(assessments, student_pk):
+        """
+        Load the assessments with their whole content tree for the student in a constant number of queries:
+        the accessible question_sets, their downcast questions with hints, options and attachments,
+        and the question_sets counts of all_question_sets_complete.
+        """
+        accesses = QuestionSetAccess.objects.filter(student=student_pk, question_set__assessment=OuterRef('pk'))
+        assessments = list(assessments.annotate(
+            accessible_question_sets_count=Coalesce(Subquery(
+                accesses.values('question_set__assessment').annotate(
+                    count=Count('question_set', distinct=True)
+                ).values('count')
+            ), 0),
+            complete_question_sets_count=Coalesce(Subquery(
+                accesses.filter(question_set_answers__complete=True).values('question_set__assessment').annotate(
+                    count=Count('question_set', distinct=True)
+                ).values('count')
+            ), 0)
+        ).prefetch_related(
+            Prefetch('questionset_set', queryset=QuestionSet.objects.filter(
+                questionsetaccess__student=student_pk,
+                questionsetaccess__start_date__lte=date.today(),
+                questionsetaccess__end_date__gte=date.today()
+            ).distinct(), to_attr='accessible_question_sets'),
+            Prefetch('accessible_question_sets__question_set', queryset=get_questions_queryset())
+        ))
+        prefetch_questions_content([
+            question
+            for assessment in assessments
+            for question_set in assessment.accessible_question_sets
+            for question in question_set.question_set.all()
+        ])
+        return assessments
+
     def get_question_sets(self, instance):
-        student_pk = self.context['student_pk']
+        if hasattr(instance, 'accessible_question_sets'):
+            accessible_question_sets = instance.accessible_question_sets
+        else:
+            student_pk = self.context['student_pk']
 
-        accessible_question_sets = QuestionSet.objects.filter(
-            assessment=instance,
-            questionsetaccess__student=student_pk,
-            questionsetaccess__start_date__lte=date.today(),
-            questionsetaccess__end_date__gte=date.today()
-        ).distinct()
+            accessible_question_sets = QuestionSet.objects.filter(
+                assessment=instance,
+                questionsetaccess__student=student_pk,
+                questionsetaccess__start_date__lte=date.today(),
+                questionsetaccess__end_date__gte=date.today()
+            ).distinct()
 
         serializer = QuestionSetDeepSerializer(
             accessible_question_sets, many=True, read_only=True
@@ -836,6 +923,10 @@ class AssessmentDeepSerializer(serializers.ModelSerializer):
         if not ('student_pk' in self.context):
             return None
 
+        # Annotated by prefetch_tree
+        if hasattr(instance, 'complete_question_sets_count'):
+            return instance.complete_question_sets_count == instance.accessible_question_sets_count
+
         student_pk = self.context['student_pk']
 
         completed_question_sets = QuestionSet.objects.filter(
@@ -851,3 +942,17 @@ class AssessmentDeepSerializer(serializers.ModelSerializer):
         ).distinct().count()
 
         return (completed_question_sets == total_assessment_accessible_question_sets)
+
+
+class QuestionSetSyncSerializer(QuestionSetDeepSerializer):
+    """
+    Question set of the synced changes, without its questions (which are synced on their own).
+    """
+    questions = None
+
+
+class AssessmentSyncSerializer(AssessmentDeepSerializer):
+    """
+    Assessment of the synced changes, without its question sets (which are synced on their own).
+    """
+    question_sets = None
@@ -0,0 +1,61 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (AreaOption, Assessment, Attachment, DominoOption, DraggableOption, Hint, Question, QuestionSet,
+                     QuestionSetAccess, SelectOption, SortOption, Tombstone)
+
+TOMBSTONE_CONTENT_TYPES = {
+    Assessment: Tombstone.ContentType.ASSESSMENT,
+    QuestionSet: Tombstone.ContentType.QUESTION_SET,
+    Question: Tombstone.ContentType.QUESTION,
+    Attachment: Tombstone.ContentType.ATTACHMENT
+}
+
+# Field of the question of each model included in the question representation
+QUESTION_PARTS_FIELDS = {
+    Hint: ('question_id',),
+    SelectOption: ('question_select_id',),
+    SortOption: ('question_sort_id',),
+    DominoOption: ('question_domino_id',),
+    DraggableOption: ('question_drag_and_drop_id',),
+    AreaOption: ('question_drag_and_drop_id', 'question_find_hotspot_id')
+}
+
+
+def create_content_tombstone(sender, instance=None, **kwargs):
+    """
+    Record the deletion of a content, to be synced by the students devices.
+    Questions subclasses are not connected: their base question deletion is sent too.
+    """
+    Tombstone.objects.create(content_type=TOMBSTONE_CONTENT_TYPES[sender], object_id=instance.id)
+
+
+for content_model in TOMBSTONE_CONTENT_TYPES:
+    post_delete.connect(create_content_tombstone, sender=content_model)
+
+
+@receiver(post_delete, sender=QuestionSetAccess)
+def create_access_tombstone(sender, instance=None, **kwargs):
+    """
+    Record the revocation of the question_set for the student, to be synced by the student devices.
+    """
+    Tombstone.objects.create(
+        content_type=Tombstone.ContentType.QUESTION_SET, object_id=instance.question_set_id,
+        student_id=instance.student_id
+    )
+
+
+def touch_question(sender, instance=None, **kwargs):
+    """
+    Update the timestamp of the question when one of its options or its hint is changed.
+    """
+    question_ids = [getattr(instance, field) for field in QUESTION_PARTS_FIELDS[sender]]
+    Question.objects.filter(id__in=[question_id for question_id in question_ids if question_id]).update(
+        updated_at=timezone.now()
+    )
+
+
+for part_model in QUESTION_PARTS_FIELDS:
+    post_save.connect(touch_question, sender=part_model)
+    post_delete.connect(touch_question, sender=part_model)
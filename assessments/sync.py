@@ -0,0 +1,123 @@
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Assessment, Attachment, Question, QuestionSet, QuestionSetAccess, Tombstone
+
+# Sync tokens are dated a bit before the sync, so that the contents saved by transactions
+# still running during the sync are sent again on the next one
+SYNC_TOKEN_MARGIN = datetime.timedelta(seconds=30)
+
+# Key of each content type in the synced changes
+SYNC_CONTENT_KEYS = {
+    Tombstone.ContentType.ASSESSMENT: 'assessments',
+    Tombstone.ContentType.QUESTION_SET: 'question_sets',
+    Tombstone.ContentType.QUESTION: 'questions',
+    Tombstone.ContentType.ATTACHMENT: 'attachments'
+}
+
+
+def get_sync_token(now=None):
+    """
+    Token to send on the next sync: the (ISO 8601) date from which the changes will be sent
+    """
+    return ((now or timezone.now()) - SYNC_TOKEN_MARGIN).isoformat()
+
+
+def parse_sync_token(value):
+    """
+    Date of a sync token, or of a Unix timestamp in seconds
+    """
+    try:
+        since = datetime.datetime.fromtimestamp(float(value), tz=datetime.timezone.utc)
+    except (ValueError, OverflowError):
+        try:
+            since = parse_datetime(value.replace(' ', '+'))
+        except ValueError:
+            since = None
+    if since is None:
+        raise ValidationError({'since': 'Invalid sync token or timestamp'})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, datetime.timezone.utc)
+    return since
+
+
+def get_question_sets_attachments(question_set_ids):
+    """
+    Attachments of the question_sets, of their questions, and of the hints and options of their questions
+    """
+    return Attachment.objects.filter(
+        Q(question_set__in=question_set_ids) |
+        Q(question__question_set__in=question_set_ids) |
+        Q(hint__question__question_set__in=question_set_ids) |
+        Q(select_option__question_select__question_set__in=question_set_ids) |
+        Q(sort_option__question_sort__question_set__in=question_set_ids) |
+        Q(draggable_option__question_drag_and_drop__question_set__in=question_set_ids)
+    ).distinct()
+
+
+class ContentChanges:
+    """
+    Contents of a student changed since a date: querysets of the created or updated contents,
+    and ids of the deleted or revoked ones (tombstones) per content key.
+    """
+
+    def __init__(self, assessments, question_sets, questions, attachments, tombstones):
+        self.assessments = assessments
+        self.question_sets = question_sets
+        self.questions = questions
+        self.attachments = attachments
+        self.tombstones = tombstones
+
+
+def get_student_content_changes(student, since):
+    """
+    Contents accessible by the student created or updated since the given date, including
+    the whole content of the question_sets that became accessible, and tombstones of the
+    contents deleted or no longer accessible since then.
+    """
+    today = datetime.date.today()
+    accesses = QuestionSetAccess.objects.filter(student=student)
+    accessible_ids = set(accesses.filter(
+        start_date__lte=today, end_date__gte=today, question_set__pending_delete=False
+    ).values_list('question_set', flat=True))
+    # Accesses created, edited or started since the last sync
+    granted_ids = set(accesses.filter(
+        Q(updated_at__gt=since) | Q(start_date__gt=since.date()), question_set__in=accessible_ids
+    ).values_list('question_set', flat=True))
+    # Accesses edited, expired or deleted since the last sync
+    revoked_ids = set(accesses.filter(
+        Q(updated_at__gt=since) | Q(end_date__gte=since.date())
+    ).exclude(question_set__in=accessible_ids).values_list('question_set', flat=True))
+    revoked_ids.update(Tombstone.objects.filter(
+        content_type=Tombstone.ContentType.QUESTION_SET, student=student, deleted_at__gt=since
+    ).exclude(object_id__in=accessible_ids).values_list('object_id', flat=True))
+
+    tombstones = {content_type: set() for content_type in Tombstone.ContentType.values}
+    for content_type, object_id in Tombstone.objects.filter(
+        student__isnull=True, deleted_at__gt=since
+    ).values_list('content_type', 'object_id'):
+        tombstones[content_type].add(object_id)
+    tombstones[Tombstone.ContentType.QUESTION_SET].update(revoked_ids)
+    tombstones[Tombstone.ContentType.ASSESSMENT].update(Assessment.objects.filter(
+        questionset__in=revoked_ids
+    ).exclude(questionset__in=accessible_ids).values_list('id', flat=True))
+
+    return ContentChanges(
+        assessments=Assessment.objects.filter(
+            Q(updated_at__gt=since) | Q(questionset__in=granted_ids), questionset__in=accessible_ids
+        ).distinct(),
+        question_sets=QuestionSet.objects.filter(
+            Q(updated_at__gt=since) | Q(id__in=granted_ids), id__in=accessible_ids
+        ),
+        questions=Question.objects.filter(
+            Q(updated_at__gt=since) | Q(question_set__in=granted_ids), question_set__in=accessible_ids
+        ),
+        attachments=get_question_sets_attachments(accessible_ids).filter(
+            Q(updated_at__gt=since) | Q(id__in=get_question_sets_attachments(granted_ids).values('id'))
+        ),
+        tombstones={SYNC_CONTENT_KEYS[content_type]: sorted(ids) for content_type, ids in tombstones.items()}
+    )
@@ -1,5 +1,11 @@
-from assessments.models import QuestionSetAccess, Assessment
+from datetime import date, timedelta
+
+from assessments.models import Assessment, Attachment, Question, QuestionSet, QuestionSetAccess
+from assessments.sync import get_question_sets_attachments, get_sync_token
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
@@ -72,6 +78,48 @@ class AssessmentsStudentTests(APITestCase):
         response = self.client.delete(url, format='json')
         self.assertEqual(response.status_code, 403)
 
+    def test_get_assessments_queries(self):
+        """
+        Ensure that students get the tree of their assessments with the same number of queries,
+        whatever the number of assessments they have access to.
+        """
+        url = reverse('assessments-get-assessments')
+        end_date = date.today() + timedelta(days=30)
+        QuestionSetAccess.objects.filter(student=1).update(start_date=date.today(), end_date=end_date)
+        # Authenticate once, so that the token is cached in both requests
+        self.client.get(url, format='json')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, format='json')
+        self.assertEqual(len(response.data), 1)
+
+        QuestionSetAccess.objects.bulk_create([
+            QuestionSetAccess(student_id=1, question_set_id=question_set_id, start_date=date.today(), end_date=end_date)
+            for question_set_id in (3, 4, 5, 6, 7, 9, 10, 11, 12, 13)
+        ])
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url, format='json')
+        self.assertEqual(len(response.data), 4)
+
+    def test_get_assessments_etag(self):
+        """
+        Ensure that students get a 304 for their assessments tree with its ETag (strong or weak),
+        and a 200 with a new ETag once their accesses changed.
+        """
+        url = reverse('assessments-get-assessments')
+        etag = self.client.get(url, format='json')['ETag']
+        for if_none_match in (etag, 'W/' + etag):
+            response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+        QuestionSetAccess.objects.create(
+            student_id=1, question_set_id=3, start_date=date.today(), end_date=date.today() + timedelta(days=30)
+        )
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(response['ETag'], etag)
+
     # TOPICS
 
     def test_get_all_question_sets(self):
@@ -180,3 +228,87 @@ class AssessmentsStudentTests(APITestCase):
         data = {'students': [1], 'accesses': [{'question_set': 1, 'start_date': '2021-01-01'}]}
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, 403)
+
+    # SYNC
+
+    def set_up_sync(self):
+        """
+        Make the content and the accesses (to the question_sets 1 and 2) of the student older than
+        the returned sync token, the accesses lasting until next month.
+        """
+        past = timezone.now() - timedelta(days=10)
+        for model in (Assessment, QuestionSet, Question, Attachment, QuestionSetAccess):
+            model.objects.update(updated_at=past)
+        QuestionSetAccess.objects.filter(student=1).update(
+            start_date=past.date(), end_date=date.today() + timedelta(days=30)
+        )
+        return get_sync_token(past + timedelta(days=5))
+
+    def get_assessments_changes(self, since):
+        url = reverse('assessments-get-assessments')
+        return self.client.get(url, {'since': since}, format='json')
+
+    def test_get_assessments_changes_invalid_since(self):
+        """
+        Ensure that students get a 400 for an invalid sync token.
+        """
+        response = self.get_assessments_changes('yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_assessments_changes_unchanged(self):
+        """
+        Ensure that students get no content if nothing changed since the sync token, and the next sync token.
+        """
+        response = self.get_assessments_changes(self.set_up_sync())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sync-Token'], response.data['sync_token'])
+        self.assertIn('X-Sync-Token', response['Access-Control-Expose-Headers'])
+        for key in ('assessments', 'question_sets', 'questions', 'attachments'):
+            self.assertEqual(response.data[key], [])
+            self.assertEqual(response.data['tombstones'][key], [])
+
+    def test_get_assessments_changes_granted(self):
+        """
+        Ensure that students get the whole content of a question_set they were granted since the sync token,
+        including its older questions and attachments.
+        """
+        since = self.set_up_sync()
+        QuestionSetAccess.objects.create(
+            student_id=1, question_set_id=3, start_date=date.today(), end_date=date.today() + timedelta(days=30)
+        )
+        response = self.get_assessments_changes(since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([assessment['id'] for assessment in response.data['assessments']], [1])
+        self.assertEqual([question_set['id'] for question_set in response.data['question_sets']], [3])
+        self.assertEqual(
+            sorted(question['id'] for question in response.data['questions']),
+            sorted(Question.objects.filter(question_set=3).values_list('id', flat=True))
+        )
+        attachment_ids = sorted(get_question_sets_attachments([3]).values_list('id', flat=True))
+        self.assertEqual(len(attachment_ids), 15)
+        self.assertEqual(sorted(attachment['id'] for attachment in response.data['attachments']), attachment_ids)
+
+    def test_get_assessments_changes_revoked(self):
+        """
+        Ensure that students get a question_set tombstone for an access revoked since the sync token.
+        """
+        since = self.set_up_sync()
+        QuestionSetAccess.objects.get(student=1, question_set=2).delete()
+        response = self.get_assessments_changes(since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['question_sets'], [])
+        self.assertEqual(response.data['tombstones']['question_sets'], [2])
+        # The assessment is still accessible through the question_set 1
+        self.assertEqual(response.data['tombstones']['assessments'], [])
+
+    def test_get_assessments_changes_deleted_question(self):
+        """
+        Ensure that students get a question tombstone for a question deleted since the sync token.
+        """
+        since = self.set_up_sync()
+        question_id = Question.objects.filter(question_set=1).values_list('id', flat=True).first()
+        Question.objects.get(id=question_id).delete()
+        response = self.get_assessments_changes(since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tombstones']['questions'], [question_id])
+        self.assertNotIn(question_id, [question['id'] for question in response.data['questions']])
@@ -1,7 +1,15 @@
-from assessments.models import Assessment
+import io
+
+from admin.tests.helpers import count_rows, create_answers
+from answers.models import Answer, QuestionSetAnswer
+from assessments.models import (Assessment, Question, QuestionInput, QuestionSelect, QuestionSet, QuestionSetAccess,
+                                Tombstone)
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
+from visualization.models import AnswerFact, QuestionSetScoreSummary
+from visualization.utils import append_answer_facts
 
 
 class AssessmentsSupervisorTests(APITestCase):
@@ -224,6 +232,22 @@ class AssessmentsSupervisorTests(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, 201)
 
+    def test_update_bulk_question_set_access(self):
+        """
+        Ensure that giving access again to a question_set updates the dates of the existing accesses.
+        """
+        url = reverse('assessment-accesses-bulk-create', args=[2])
+        data = {'students': [1, 3], 'accesses': [{'question_set': 3, 'start_date': '2021-01-01'}]}
+        self.client.post(url, data, format='json')
+        data = {'students': [1, 3], 'accesses': [{'question_set': 3, 'start_date': '2021-02-01', 'end_date': '2021-03-01'}]}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 2)
+        accesses = QuestionSetAccess.objects.filter(student__in=[1, 3], question_set=3)
+        self.assertEqual(accesses.count(), 2)
+        self.assertTrue(all(str(access.start_date) == '2021-02-01' for access in accesses))
+        self.assertTrue(all(str(access.end_date) == '2021-03-01' for access in accesses))
+
     def test_create_bulk_question_set_access_unauthorized_student(self):
         """
         Ensure that supervisors can give access to question_sets they have access to.
@@ -249,4 +273,78 @@ class AssessmentsSupervisorTests(APITestCase):
         url = reverse('assessment-accesses-bulk-create', args=[1])
         data = {'students': [1, 3], 'accesses': [{'question_set': 1, 'start_date': '2021-01-01'}]}
         response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, 400)
\ No newline at end of file
+        self.assertEqual(response.status_code, 400)
+
+class AssessmentsDeletionSupervisorTests(APITestCase):
+    """
+    Assessments and question_sets deletion tests from a supervisor account: they are hidden at once,
+    and purged with their content by purge_pending_deletes.
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up authentication, and answers of the student 1 to the question_sets 1 and 3.
+        """
+        token = Token.objects.get(user__username='supervisor')  # id: 4
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.answer_ids = {question_set_id: create_answers(1, question_set_id)[1] for question_set_id in (1, 3)}
+
+    def test_delete_question_set(self):
+        """
+        Ensure that a deleted question_set is hidden with its tombstone, and removed from the dashboards at once.
+        """
+        self.assertTrue(QuestionSetScoreSummary.objects.filter(question_set=3).exists())
+        self.assertEqual(AnswerFact.objects.filter(question_set=3).count(), len(self.answer_ids[3]))
+        url = reverse('assessment-question-sets-detail', args=[2, 3])
+        response = self.client.delete(url, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(QuestionSet.objects.filter(id=3).exists())
+        self.assertTrue(QuestionSet.all_objects.filter(id=3, pending_delete=True).exists())
+        self.assertTrue(Tombstone.objects.filter(
+            content_type=Tombstone.ContentType.QUESTION_SET, object_id=3, student__isnull=True
+        ).exists())
+        self.assertFalse(QuestionSetScoreSummary.objects.filter(question_set=3).exists())
+        self.assertFalse(AnswerFact.objects.filter(question_set=3).exists())
+        # The derived rows are not computed again for the question_set
+        QuestionSetAnswer.objects.get(answers__in=self.answer_ids[3][:1]).save()
+        self.assertFalse(QuestionSetScoreSummary.objects.filter(question_set=3).exists())
+        append_answer_facts(self.answer_ids[3])
+        self.assertFalse(AnswerFact.objects.filter(question_set=3).exists())
+
+    def test_delete_assessment_hidden(self):
+        """
+        Ensure that a deleted assessment is hidden with its question_sets.
+        """
+        url = reverse('assessments-detail', args=[2])
+        response = self.client.delete(url, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Assessment.objects.filter(id=2).exists())
+        self.assertFalse(QuestionSet.objects.filter(assessment=2).exists())
+        self.assertEqual(QuestionSet.all_objects.filter(assessment=2, pending_delete=True).count(), 1)
+
+    def test_purge_assessment(self):
+        """
+        Ensure that the purge deletes the assessments pending deletion with their content, accesses,
+        score summaries and answer facts, and keeps the answers of the students without their questions.
+        """
+        question_ids = list(Question.objects.filter(question_set=3).values_list('id', flat=True))
+        url = reverse('assessments-detail', args=[2])
+        self.client.delete(url, format='json')
+        call_command('purge_pending_deletes', chunk_size=1, stdout=io.StringIO())
+
+        self.assertFalse(Assessment.all_objects.filter(id=2).exists())
+        self.assertFalse(QuestionSet.all_objects.filter(id=3).exists())
+        for model in (Question, QuestionInput, QuestionSelect):
+            self.assertEqual(count_rows(model, question_ids), 0)
+        self.assertFalse(QuestionSetAccess.objects.filter(question_set=3).exists())
+        self.assertFalse(QuestionSetScoreSummary.objects.filter(question_set=3).exists())
+        self.assertFalse(AnswerFact.objects.filter(question_set=3).exists())
+        self.assertEqual(list(Answer.objects.filter(
+            id__in=self.answer_ids[3]
+        ).values_list('question', 'question_set_answer__question_set_access').distinct()), [(None, None)])
+
+        # The other question_sets are kept with all their data
+        self.assertTrue(QuestionSet.objects.filter(id=1).exists())
+        self.assertEqual(QuestionSetScoreSummary.objects.filter(question_set=1).count(), 1)
+        self.assertEqual(AnswerFact.objects.filter(question_set=1).count(), len(self.answer_ids[1]))
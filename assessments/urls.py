@@ -28,6 +28,7 @@ router.register(r'', views.AssessmentsViewSet, basename='assessments')
 # generates:
 # /assessments/
 # /assessments/{assessment_pk}/
+# /assessments/{assessment_pk}/rescore/
 
 """ router.register(r'attachments', views.AttachmentsViewSet, basename='attachments') """
 # We would like a single route for attachments but this doesn't work because Django thinks that
@@ -45,6 +46,7 @@ assessments_router.register(
 # /assessments/{assessment_pk}/question-sets/
 # /assessments/{assessment_pk}/question-sets/reorder/
 # /assessments/{assessment_pk}/question-sets/{question_set_pk}/
+# /assessments/{assessment_pk}/question-sets/{question_set_pk}/rescore/
 # /assessments/{assessment_pk}/accesses/
 # /assessments/{assessment_pk}/accesses/{question_set_access_pk}/
 # /assessments/{assessment_pk}/attachments/
@@ -62,6 +64,7 @@ question_sets_router.register(r'questions', views.QuestionsViewSet,
 # /assessments/{assessment_pk}/question-sets/{question_set_pk}/questions/
 # /assessments/{assessment_pk}/question-sets/{question_set_pk}/questions/reorder/
 # /assessments/{assessment_pk}/question-sets/{question_set_pk}/questions/{question_pk}/
+# /assessments/{assessment_pk}/question-sets/{question_set_pk}/questions/{question_pk}/rescore/
 
 questions_router = routers.NestedSimpleRouter(
     question_sets_router, r'questions', lookup='question')
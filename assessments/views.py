@@ -1,5 +1,7 @@
 from users.models import User
-from django.db.models import Q, Case, When
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Count, Max
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -9,14 +11,37 @@ from users.permissions import HasAccess, IsSupervisor
 from django.views.generic import CreateView
 from datetime import date
 from django.db.models.functions import Coalesce, Lower
+from admin.lib.etags import compute_etag, is_not_modified, not_modified_response
 from admin.lib.viewsets import ModelViewSet
+from answers.models import Answer, QuestionSetAnswer
+from answers.scoring import rescore_questions, start_rescore_job
+from answers.serializers import RescoreJobSerializer
+from visualization.cache import get_data_versions
 
 from .models import (Assessment, QuestionSet, QuestionSetAccess, NumberRange,
                      Attachment, DraggableOption, LearningObjective, Question, Topic)
-from .serializers import (AssessmentDeepSerializer, AssessmentSerializer,
-                          QuestionSetAccessSerializer,
+from .serializers import (AssessmentDeepSerializer, AssessmentSerializer, AssessmentSyncSerializer,
+                          QuestionSetAccessSerializer, QuestionSetSyncSerializer,
                           QuestionSetSerializer, AttachmentSerializer, DraggableOptionSerializer,
-                          QuestionSerializer, TopicSerializer, LearningObjectiveSerializer, NumberRangeSerializer)
+                          QuestionSerializer, TopicSerializer, LearningObjectiveSerializer, NumberRangeSerializer,
+                          get_questions_queryset, prefetch_questions_content)
+from .deletion import mark_assessments_pending_delete, mark_question_sets_pending_delete
+from .ordering import move_sel_questions_first, save_orders, save_orders_by_ids
+from .sync import get_student_content_changes, get_sync_token, parse_sync_token
+
+
+def get_rescore_response(request, questions):
+    """
+    Rescore the answers to the questions within the request if there are at most RESCORE_REQUEST_MAX_ANSWERS
+    of them (200 with the number of changed answers), with a background rescore job otherwise
+    (202 with the job, whose progress is polled from the rescore jobs endpoint).
+    """
+    question_ids = list(questions.values_list('id', flat=True))
+    max_answers = settings.RESCORE_REQUEST_MAX_ANSWERS
+    if Answer.objects.filter(question__in=question_ids)[:max_answers + 1].count() > max_answers:
+        job = start_rescore_job(question_ids, request.user)
+        return Response({'answers_changed': None, 'job': RescoreJobSerializer(job).data}, status=202)
+    return Response({'answers_changed': rescore_questions(question_ids)}, status=200)
 
 
 class AssessmentsViewSet(ModelViewSet):
@@ -35,7 +60,7 @@ class AssessmentsViewSet(ModelViewSet):
         permission_classes = [IsAuthenticated]
         if self.action == 'retrieve':
             permission_classes.append(HasAccess)
-        elif self.action == 'destroy' or self.action == 'update':
+        elif self.action == 'destroy' or self.action == 'update' or self.action == 'rescore':
             permission_classes.append(HasAccess)
             permission_classes.append(IsSupervisor)
         elif self.action == 'create':
@@ -57,7 +82,8 @@ class AssessmentsViewSet(ModelViewSet):
         return Assessment.objects.filter(
             questionset__questionsetaccess__student=user,
             questionset__questionsetaccess__start_date__lte=date.today(),
-            questionset__questionsetaccess__end_date__gte=date.today()
+            questionset__questionsetaccess__end_date__gte=date.today(),
+            questionset__pending_delete=False
         ).distinct()
 
 
@@ -74,6 +100,12 @@ class AssessmentsViewSet(ModelViewSet):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=201, headers=headers)
 
+    def perform_destroy(self, instance):
+        """
+        Mark the assessment as pending deletion, it is purged with its content by purge_pending_deletes.
+        """
+        mark_assessments_pending_delete(Assessment.objects.filter(id=instance.id))
+
     # THIS IS ONLY TEMPORARY FOR PRE-SEL AND POST-SEL, TODO REMOVE AFTERWARD
 
     def list(self, request, *args, **kwargs):
@@ -88,29 +120,88 @@ class AssessmentsViewSet(ModelViewSet):
         return Response(serializer.data)
     # END OF TEMPORARY
 
+    @action(detail=True, methods=['post'])
+    def rescore(self, request, pk=None):
+        """
+        Recompute the validity of all the answers to the assessment questions.
+        """
+        assessment = self.get_object()
+        return get_rescore_response(request, Question.objects.filter(question_set__assessment=assessment))
+
+    def get_assessments_etag(self):
+        """
+        ETag of the student assessments tree, computed from a cheap watermark of the data it is built from:
+        the accesses of the student, the questions of their question_sets, the complete question_set answers,
+        the assessments content version and the current date (which limits the accessible question_sets).
+        """
+        student = self.request.user
+        accesses = QuestionSetAccess.objects.filter(student=student)
+        return compute_etag(
+            student.id, date.today(), get_data_versions(student.id),
+            accesses.aggregate(count=Count('id'), last_id=Max('id'), last_update=Max('updated_at')),
+            Question.objects.filter(question_set__in=accesses.values('question_set')).aggregate(
+                count=Count('id'), last_id=Max('id'), last_update=Max('updated_at')
+            ),
+            QuestionSetAnswer.objects.filter(question_set_access__student=student, complete=True).aggregate(
+                count=Count('id'), last_id=Max('id')
+            )
+        )
+
+    def get_assessments_changes(self, since):
+        """
+        Contents of the student changed since the date of the given sync token, with the next sync token
+        """
+        sync_token = get_sync_token()
+        changes = get_student_content_changes(self.request.user, parse_sync_token(since))
+        context = {'student_pk': int(self.request.user.id)}
+
+        return Response({
+            'sync_token': sync_token,
+            'assessments': AssessmentSyncSerializer(changes.assessments, many=True, context=context).data,
+            'question_sets': QuestionSetSyncSerializer(changes.question_sets, many=True).data,
+            'questions': QuestionSerializer(prefetch_questions_content(list(
+                get_questions_queryset().filter(pk__in=changes.questions.values('pk'))
+            )), many=True).data,
+            'attachments': AttachmentSerializer(changes.attachments, many=True).data,
+            'tombstones': changes.tombstones
+        }, status=200, headers={
+            'X-Sync-Token': sync_token,
+            'Access-Control-Expose-Headers': 'X-Sync-Token'
+        })
+
     @action(detail=False, methods=['get'], serializer_class=AssessmentDeepSerializer)
     def get_assessments(self, request):
-        # Get assessments ordering by updated_at, but if it's null then use start_date
-        # This duplicates the assessments because each questionsetaccess__updated_at has it own value
-        queryset = self.get_queryset().annotate(date=Coalesce(
+        """
+        Accessible assessments of the student with all their content, or with ?since=<sync token or
+        timestamp> only the contents changed since then (and the tombstones of the removed ones).
+        The sync token of the next sync is sent in the X-Sync-Token header (or the response).
+        """
+        since = request.query_params.get('since')
+        if since:
+            return self.get_assessments_changes(since)
+
+        etag = self.get_assessments_etag()
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        sync_token = get_sync_token()
+        # Get assessments ordering by the last updated_at (or start_date if it's null) of their accesses
+        assessments = self.get_queryset().annotate(date=Max(Coalesce(
             'questionset__questionsetaccess__updated_at', 'questionset__questionsetaccess__start_date'
-        )).order_by('-date')
-        # So is necessary remove the duplicates
-        set_order = set()
-        # Get assessments correct order
-        assessments_order = [a for a in queryset.values_list('id', flat=True) if not (a in set_order or set_order.add(a))]
-        assessments = []
-        for assessment in assessments_order:
-            assessments.append(queryset.filter(id=assessment).first())
+        ))).order_by('-date')
 
         serializer = AssessmentDeepSerializer(
-            assessments, many=True,
+            AssessmentDeepSerializer.prefetch_tree(assessments, self.request.user.id), many=True,
             context={
                 'student_pk': int(self.request.user.id)
             }
         )
 
-        return Response(serializer.data, status=201)
+        return Response(serializer.data, status=201, headers={
+            'ETag': etag,
+            'X-Sync-Token': sync_token,
+            'Access-Control-Expose-Headers': 'ETag, X-Sync-Token'
+        })
 
 
 class QuestionSetsViewSet(ModelViewSet):
@@ -127,7 +218,7 @@ class QuestionSetsViewSet(ModelViewSet):
         Instantiate and return the list of permissions that this view requires.
         """
         permission_classes = [IsAuthenticated, HasAccess]
-        if self.action == 'destroy' or self.action == 'update' or self.action == 'create':
+        if self.action == 'destroy' or self.action == 'update' or self.action == 'create' or self.action == 'rescore':
             permission_classes.append(IsSupervisor)
         return [permission() for permission in permission_classes]
 
@@ -148,6 +239,12 @@ class QuestionSetsViewSet(ModelViewSet):
 
         return QuestionSet.objects.filter(assessment=assessment_pk)
 
+    def perform_destroy(self, instance):
+        """
+        Mark the question_set as pending deletion, it is purged with its content by purge_pending_deletes.
+        """
+        mark_question_sets_pending_delete(QuestionSet.objects.filter(id=instance.id))
+
     def create(self, request, *args, **kwargs):
         """
         Create a new QuestionSet.
@@ -171,33 +268,20 @@ class QuestionSetsViewSet(ModelViewSet):
         # Check if question_set order changed to reorder all others question_sets
         # (do not enter here if instance.order = None (has not been set before))
         if (instance.order and request_order) and instance.order != request_order:
-            question_sets = QuestionSet.objects.filter(assessment=instance.assessment)
-
-            # Create an array with the question_sets from the QuerySet
-            question_sets_list = [question_set for question_set in question_sets]
+            question_sets_list = list(QuestionSet.objects.filter(assessment=instance.assessment))
 
             # Places the question_set in the position of the array equivalent to its new order
             question_set = question_sets_list[instance.order - 1]
             question_sets_list.remove(question_set)
             question_sets_list.insert((request_order - 1) if (request_order > 0) else 0, question_set)
 
-            # Order of each question_set is its position in the array + 1 (order can't be zero)
-            for index, question_set in enumerate(question_sets_list):
-                question_set.order = index + 1
-                question_set.save()
-
-            # If assessment has the “Contains SEL questions” set as true, and if there were SEL questions in the first question_set
-            # make sure the questions are in the first question_set after reordering the question_sets
-            sel_questions = Question.objects.filter(question_type='SEL', question_set__assessment=instance.assessment)
-            if instance.assessment.sel_question and sel_questions:
-                first_question_set = question_sets_list[0]
-                sel_questions.update(question_set=first_question_set)
-                # order question_set's QuerySet all_questions so SEL questions are at the beginning
-                all_questions = Question.objects.filter(question_set=first_question_set).order_by(Case(When(question_type='SEL', then=0), default=1))
-                # Order of each question is its position in the array + 1 (order can't be zero)
-                for index, question in enumerate(all_questions):
-                    question.order = index + 1
-                    question.save()
+            with transaction.atomic():
+                # Order of each question_set is its position in the array + 1 (order can't be zero)
+                save_orders(QuestionSet, [
+                    (question_set, index + 1) for index, question_set in enumerate(question_sets_list)
+                ])
+                # Make sure the SEL questions are still in the first question_set after reordering the question_sets
+                move_sel_questions_first(instance.assessment, question_sets_list[0].id)
 
         serializer = self.get_serializer(instance, data=request_data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -217,30 +301,25 @@ class QuestionSetsViewSet(ModelViewSet):
         question_sets = QuestionSet.objects.filter(assessment=request_data['assessment_id'])
 
         try:
-            for question_set in question_sets:
-                for index, element in enumerate(request_data['question_sets']):
-                    if (question_set.id == element) and (question_set.order != index + 1):
-                        question_set.order = index + 1
-                        question_set.save()
-                        break
-
-            # If assessment has the “Contains SEL questions” set as true, and if there were SEL questions in the first question_set
-            # make sure the questions are in the first question_set after reordering the question_sets
-            sel_questions = Question.objects.filter(question_type='SEL', question_set__assessment__id=request_data['assessment_id'])
-            first_question_set = request_data['question_sets'][0]
-            if question_sets[0].assessment.sel_question and sel_questions:
-                sel_questions.update(question_set_id=first_question_set)
-                # order question_set's QuerySet all_questions so SEL questions are at the beginning
-                all_questions = Question.objects.filter(question_set_id=first_question_set).order_by(Case(When(question_type='SEL', then=0), default=1))
-                # Order of each question is its position in the array + 1 (order can't be zero)
-                for index, question in enumerate(all_questions):
-                    question.order = index + 1
-                    question.save()
+            with transaction.atomic():
+                save_orders_by_ids(QuestionSet, question_sets, request_data['question_sets'])
+                # Make sure the SEL questions are still in the first question_set after reordering the question_sets
+                move_sel_questions_first(
+                    Assessment.objects.get(id=request_data['assessment_id']), request_data['question_sets'][0]
+                )
         except:
             return Response('An error occurred while trying to update the order of assessments question_sets', status=500)
 
         return Response('QuestionSets successfully reordered.', status=200)
 
+    @action(detail=True, methods=['post'])
+    def rescore(self, request, pk=None, **kwargs):
+        """
+        Recompute the validity of all the answers to the question_set questions.
+        """
+        question_set = self.get_object()
+        return get_rescore_response(request, Question.objects.filter(question_set=question_set))
+
 
 class QuestionsViewSet(ModelViewSet):
     """
@@ -254,7 +333,7 @@ class QuestionsViewSet(ModelViewSet):
         Instantiate and return the list of permissions that this view requires.
         """
         permission_classes = [IsAuthenticated, HasAccess]
-        if self.action == 'destroy' or self.action == 'update' or self.action == 'create':
+        if self.action == 'destroy' or self.action == 'update' or self.action == 'create' or self.action == 'rescore':
             permission_classes.append(IsSupervisor)
         return [permission() for permission in permission_classes]
 
@@ -295,20 +374,24 @@ class QuestionsViewSet(ModelViewSet):
         #   'question_set': <question_set'>
         # }
         request_data = request.data.copy()
-        questions = Question.objects.filter(question_set=request_data['assessment_question_set']).select_subclasses()
+        questions = Question.objects.filter(question_set=request_data['assessment_question_set'])
 
         try:
-            for question in questions:
-                for index, element in enumerate(request_data['questions']):
-                    if (question.id == element) and (question.order != index + 1):
-                        question.order = index + 1
-                        question.save()
-                        break
+            with transaction.atomic():
+                save_orders_by_ids(Question, questions, request_data['questions'])
         except:
             return Response('An error occurred while trying to update the order of the questions', status=500)
 
         return Response('Questions successfully reordered.', status=200)
 
+    @action(detail=True, methods=['post'])
+    def rescore(self, request, pk=None, **kwargs):
+        """
+        Recompute the validity of all the answers to the question.
+        """
+        question = self.get_object()
+        return get_rescore_response(request, Question.objects.filter(id=question.id))
+
     @action(detail=False, methods=['get'], url_path='all')
     def get_all_questions_type(self, request):
         accessible_assessments = AssessmentsViewSet.get_queryset(self)
@@ -407,33 +490,42 @@ class QuestionSetAccessesViewSets(ModelViewSet):
         """
         assessment_pk = kwargs.get('assessment_pk')
         user = request.user
-        formatted_data = []
+        students = request.data['students']
+        accesses = request.data['accesses']
 
-        for student in request.data['students']:
+        if students:
             try:
-                User.objects.get(
-                    id=student, created_by=user, role=User.UserRole.STUDENT)
-            except:
+                authorized_students = User.objects.filter(
+                    id__in=students, created_by=user, role=User.UserRole.STUDENT).values_list('id', flat=True)
+                if {str(student) for student in authorized_students} != {str(student) for student in students}:
+                    raise ValueError
+            except (TypeError, ValueError):
                 return Response('Cannot create access for unauthorized students', status=400)
-            for access in request.data['accesses']:
-                try:
-                    QuestionSet.objects.get(
-                        Q(id=access.get('question_set')),
-                        Q(assessment__id=assessment_pk),
-                        Q(assessment__created_by=user) | Q(assessment__private=False))
-                except:
-                    return Response('Cannot create access for unauthorized question_sets \
+
+        if students and accesses:
+            question_set_ids = [access.get('question_set') for access in accesses]
+            try:
+                question_sets = QuestionSet.objects.filter(
+                    Q(id__in=question_set_ids),
+                    Q(assessment__id=assessment_pk),
+                    Q(assessment__created_by=user) | Q(assessment__private=False)
+                ).annotate(questions_count=Count('question')).values_list('id', 'questions_count')
+                questions_counts = {str(question_set_id): count for question_set_id, count in question_sets}
+                if set(questions_counts) != {str(question_set_id) for question_set_id in question_set_ids}:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return Response('Cannot create access for unauthorized question_sets \
                         or question_sets in another assessment', status=400)
 
-                if Question.objects.filter(question_set=access.get('question_set')).count() == 0:
-                    return Response('Cannot create access for question_sets without questions', status=400)
+            if 0 in questions_counts.values():
+                return Response('Cannot create access for question_sets without questions', status=400)
 
-                formatted_data.append({
-                    'student': student,
-                    'question_set': access.get('question_set'),
-                    'start_date': access.get('start_date', None),
-                    'end_date': access.get('end_date', None)
-                })
+        formatted_data = [{
+            'student': student,
+            'question_set': access.get('question_set'),
+            'start_date': access.get('start_date', None),
+            'end_date': access.get('end_date', None)
+        } for student in students for access in accesses]
 
         if len(formatted_data) == 0:
             return Response('No data', status=400)
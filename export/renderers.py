@@ -0,0 +1,74 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """
+    File-like object returning what is written, to stream the csv writer output.
+    """
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Renderer of flat records, which can also stream them one by one with stream(...)
+    (used to answer a StreamingHttpResponse).
+    """
+
+    charset = 'utf-8'
+    streaming = True
+
+    def stream(self, records, fields):
+        """
+        Generator of the rendered lines of the records (dicts with the given fields)
+        """
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render non streamed data, such as error responses
+        """
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = [data]
+        elif not isinstance(data, list):
+            data = [{'detail': data}]
+        fields = list(dict.fromkeys(field for record in data for field in record))
+        return ''.join(self.stream(data, fields)).encode(self.charset)
+
+
+class CSVStreamingRenderer(StreamingRenderer):
+    """
+    CSV renderer: a header line, then a line per record. Lists are joined with '|'.
+    """
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, records, fields):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for record in records:
+            yield writer.writerow([
+                '|'.join(str(item) for item in value) if isinstance(value, (list, tuple)) else value
+                for value in (record.get(field) for field in fields)
+            ])
+
+
+class NDJSONStreamingRenderer(StreamingRenderer):
+    """
+    Newline delimited JSON renderer: a JSON object per line and per record.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, records, fields):
+        for record in records:
+            yield json.dumps({field: record.get(field) for field in fields}, cls=DjangoJSONEncoder) + '\n'
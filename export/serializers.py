@@ -1,8 +1,8 @@
 from answers.models import Answer
 from rest_framework import serializers
 from admin.lib.serializers import NestedRelatedField, PolymorphicSerializer
-from assessments.models import Question, Assessment, SelectOption, SortOption
-from answers.models import QuestionSetAnswer, AnswerInput, AnswerNumberLine, AnswerSelect, AnswerSort
+from assessments.models import SelectOption, SortOption
+from answers.models import AnswerInput, AnswerNumberLine, AnswerSelect, AnswerSort
 
 class AnswerTableSerializer(PolymorphicSerializer):
 
@@ -34,8 +34,7 @@ class CompleteStudentAnswersSerializer(serializers.ModelSerializer):
         return instance.question_set_answer.question_set_access.student.username
 
     def get_assessment_title(self, instance):
-        question_set = instance.question_set_answer.question_set_access.question_set
-        return Assessment.objects.filter(questionset=question_set).distinct().values()[0]['title']
+        return instance.question_set_answer.question_set_access.question_set.assessment.title
 
     def get_question_set_name(self, instance):
         return instance.question_set_answer.question_set_access.question_set.name
@@ -44,11 +43,8 @@ class CompleteStudentAnswersSerializer(serializers.ModelSerializer):
         return instance.question.value
 
     def get_attempt(self, instance):
-        attempts = QuestionSetAnswer.objects.filter(question_set_access=instance.question_set_answer.question_set_access).order_by('start_date')
-        for index, attempt in enumerate(attempts):
-            if attempt == instance.question_set_answer:
-                attempt_id = index + 1
-        return attempt_id
+        # Annotated by the export querysets (see annotate_answers_export)
+        return instance.attempt
 
 class AnswerInputSerializer(CompleteStudentAnswersSerializer):
     """
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from answers.models import AnswerInput, AnswerSelect, AnswerSession, QuestionSetAnswer
+from assessments.models import Question, QuestionSetAccess
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from export.utils.answers import ANSWER_RECORD_FIELDS
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+# Records of the answers of the student 1, in export order
+STUDENT_RECORDS = [
+    ['111111', 'Literacy Assessment', 'Reading comprehension', 'subject', '1', 'AnswerInput', 'False',
+     '', '', '42', '', '', ''],
+    ['111111', 'Literacy Assessment', 'Reading comprehension', 'missing word', '1', 'AnswerSelect', 'True',
+     '', '', '', 'wizard', '', ''],
+    ['111111', 'Literacy Assessment', 'Reading comprehension', 'subject', '2', 'AnswerInput', 'True',
+     '', '', 'Mr and Mrs Dursley', '', '', ''],
+]
+
+
+class AnswersExportTests(APITestCase):
+    """
+    Answers export tests, from a supervisor account: the student 1 answered the question_set 3
+    twice (questions 1 and 2, then question 1 again).
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up authentication, and the answers of the student 1.
+        """
+        token = Token.objects.get(user__username='supervisor')  # id: 4
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        Question.objects.filter(id=1).update(value='subject')
+        Question.objects.filter(id=2).update(value='missing word')
+
+        start_date = timezone.now() - timedelta(hours=2)
+        first_attempt = self.create_question_set_answer(1, start_date)
+        AnswerInput.objects.create(question_set_answer=first_attempt, question_id=1, value='42', valid=False)
+        AnswerSelect.objects.create(question_set_answer=first_attempt, question_id=2, selected_option_id=1, valid=True)
+        second_attempt = self.create_question_set_answer(1, start_date + timedelta(hours=1))
+        AnswerInput.objects.create(
+            question_set_answer=second_attempt, question_id=1, value='Mr and Mrs Dursley', valid=True
+        )
+
+    def create_question_set_answer(self, student_id, start_date):
+        access, _ = QuestionSetAccess.objects.get_or_create(
+            student_id=student_id, question_set_id=3,
+            defaults={'start_date': date.today(), 'end_date': date.today()}
+        )
+        session = AnswerSession.objects.create(student_id=student_id)
+        return QuestionSetAnswer.objects.create(question_set_access=access, session=session, start_date=start_date)
+
+    def get_streamed_content(self, url):
+        """
+        Consume the streamed export at the url
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        """
+        Ensure that the CSV export streams a header line and a line per answer, in export order.
+        """
+        response, content = self.get_streamed_content(reverse('answers-export-list') + '?format=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="answers_', response['Content-Disposition'])
+
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], list(ANSWER_RECORD_FIELDS))
+        self.assertEqual(rows[1:], STUDENT_RECORDS)
+
+    def test_export_ndjson(self):
+        """
+        Ensure that the NDJSON export streams a JSON object per answer.
+        """
+        response, content = self.get_streamed_content(reverse('answers-export-list') + '?format=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(list(records[0]), list(ANSWER_RECORD_FIELDS))
+        self.assertEqual(records[1]['selected_option'], 'wizard')
+        self.assertIs(records[1]['valid'], True)
+        self.assertEqual(records[2]['value'], 'Mr and Mrs Dursley')
+        self.assertEqual(records[2]['attempt'], 2)
+        self.assertEqual(records[2]['category_A'], [])
+
+    def test_export_csv_empty(self):
+        """
+        Ensure that the CSV export of no answers only has the header line.
+        """
+        QuestionSetAnswer.objects.all().delete()
+        response, content = self.get_streamed_content(reverse('answers-export-list') + '?format=csv')
+        self.assertEqual(list(csv.reader(io.StringIO(content))), [list(ANSWER_RECORD_FIELDS)])
+
+    def test_supervisor_export_csv(self):
+        """
+        Ensure that the supervisor CSV exports (all the answers, and the answers to an assessment)
+        stream the answers of their students only.
+        """
+        other_attempt = self.create_question_set_answer(2, timezone.now())
+        AnswerInput.objects.create(question_set_answer=other_attempt, question_id=1, value='42', valid=False)
+
+        for url in (
+            reverse('answer-supervisor-list', kwargs={'supervisor_id': 4}),
+            reverse('answer-supervisor-detail', kwargs={'supervisor_id': 4, 'pk': 2})
+        ):
+            response, content = self.get_streamed_content(url + '?format=csv')
+            rows = list(csv.reader(io.StringIO(content)))
+            self.assertEqual(rows[0], list(ANSWER_RECORD_FIELDS))
+            self.assertEqual(rows[1:], STUDENT_RECORDS)
+
+        response, content = self.get_streamed_content(
+            reverse('answer-supervisor-detail', kwargs={'supervisor_id': 4, 'pk': 1}) + '?format=csv'
+        )
+        self.assertIn('filename="answers_1_', response['Content-Disposition'])
+        self.assertEqual(list(csv.reader(io.StringIO(content))), [list(ANSWER_RECORD_FIELDS)])
+
+    def test_supervisor_export_json(self):
+        """
+        Ensure that the serialized supervisor export has the attempt of each answer,
+        with a number of queries which does not depend on the number of answers.
+        """
+        url = reverse('answer-supervisor-detail', kwargs={'supervisor_id': 4, 'pk': 2})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([
+            (answer['question_id'], answer['attempt'], answer['valid']) for answer in response.data
+        ], [('subject', 1, False), ('missing word', 1, True), ('subject', 2, True)])
+        self.assertEqual(response.data[1]['selected_option'], {'value': 'wizard'})
+
+        third_attempt = self.create_question_set_answer(1, timezone.now())
+        AnswerInput.objects.create(question_set_answer=third_attempt, question_id=1, value='42', valid=False)
+        AnswerSelect.objects.create(question_set_answer=third_attempt, question_id=2, selected_option_id=2, valid=False)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url, format='json')
+        self.assertEqual([answer['attempt'] for answer in response.data], [1, 1, 2, 3, 3])
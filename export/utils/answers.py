@@ -0,0 +1,105 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import Case, CharField, Count, F, OuterRef, Q, Subquery, Value, When
+
+from answers.models import Answer, AnswerSort, QuestionSetAnswer
+
+# Fields of the flat answer records, in export order
+ANSWER_RECORD_FIELDS = (
+    'student_id', 'assessment_title', 'question_set_name', 'question_id', 'attempt', 'type', 'valid',
+    'start_datetime', 'end_datetime', 'value', 'selected_option', 'category_A', 'category_B'
+)
+
+# Order of the exported answers
+ANSWERS_EXPORT_ORDERING = (
+    'question_set_answer__question_set_access__student', 'question_set_answer__question_set_access__question_set__assessment',
+    'question_set_answer__question_set_access__question_set', 'question_set_answer__start_date', 'question'
+)
+
+# Record field read from each annotation
+ANSWER_RECORD_ANNOTATIONS = {
+    'student_id': 'student_username',
+    'assessment_title': 'assessment_title',
+    'question_set_name': 'question_set_name',
+    'question_id': 'question_value',
+    'attempt': 'attempt',
+    'type': 'answer_type_name',
+    'valid': 'valid',
+    'start_datetime': 'start_datetime',
+    'end_datetime': 'end_datetime',
+    'selected_option': 'selected_option_value',
+    'category_A': 'category_A_titles',
+    'category_B': 'category_B_titles'
+}
+
+# Annotations holding the answer value, depending on the answer type
+ANSWER_VALUE_ANNOTATIONS = ('input_value', 'number_line_value', 'calcul_value', 'sel_statement')
+
+
+def get_attempt_annotation():
+    """
+    Index (from 1) of the answer question_set answer among the attempts of its access, by start date
+    """
+    return Subquery(
+        QuestionSetAnswer.objects.filter(
+            Q(start_date__lt=OuterRef('question_set_answer__start_date')) |
+            Q(start_date=OuterRef('question_set_answer__start_date'), id__lte=OuterRef('question_set_answer')),
+            question_set_access=OuterRef('question_set_answer__question_set_access')
+        ).order_by().values('question_set_access').annotate(count=Count('id')).values('count')
+    )
+
+
+def get_sort_category_annotation(category):
+    through_model = AnswerSort._meta.get_field(category).remote_field.through
+    return ArraySubquery(
+        through_model.objects.filter(answersort=OuterRef('id')).order_by('sortoption').values('sortoption__title')
+    )
+
+
+def annotate_answers_export(queryset):
+    """
+    Fetch the relations read by the answers export serializers and annotate the attempt index,
+    so that serializing the answers does not run queries per answer.
+    """
+    return queryset.select_related(
+        'question',
+        'question_set_answer__question_set_access__student',
+        'question_set_answer__question_set_access__question_set__assessment'
+    ).annotate(attempt=get_attempt_annotation())
+
+
+def get_answer_records(queryset, chunk_size=2000):
+    """
+    Flat records (dicts with the ANSWER_RECORD_FIELDS) of the answers of the queryset.
+    All the values are read by one query, through a server side cursor, so that the
+    records can be streamed with a constant memory.
+    """
+    if 'attempt' not in queryset.query.annotations:
+        queryset = queryset.annotate(attempt=get_attempt_annotation())
+    queryset = queryset.annotate(
+        student_username=F('question_set_answer__question_set_access__student__username'),
+        assessment_title=F('question_set_answer__question_set_access__question_set__assessment__title'),
+        question_set_name=F('question_set_answer__question_set_access__question_set__name'),
+        question_value=F('question__value'),
+        answer_type_name=Case(
+            *[
+                When(**{f'{model._meta.model_name}__isnull': False}, then=Value(model.__name__))
+                for model in Answer.__subclasses__()
+            ],
+            default=Value(Answer.__name__),
+            output_field=CharField()
+        ),
+        input_value=F('answerinput__value'),
+        number_line_value=F('answernumberline__value'),
+        calcul_value=F('answercalcul__value'),
+        sel_statement=F('answersel__statement'),
+        selected_option_value=F('answerselect__selected_option__value'),
+        category_A_titles=get_sort_category_annotation('category_A'),
+        category_B_titles=get_sort_category_annotation('category_B')
+    ).values(*ANSWER_RECORD_ANNOTATIONS.values(), *ANSWER_VALUE_ANNOTATIONS)
+
+    for row in queryset.iterator(chunk_size=chunk_size):
+        record = {field: row[annotation] for field, annotation in ANSWER_RECORD_ANNOTATIONS.items()}
+        record['value'] = next(
+            (row[annotation] for annotation in ANSWER_VALUE_ANNOTATIONS if row[annotation] is not None), None
+        )
+        yield record
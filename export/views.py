@@ -1,7 +1,8 @@
 from datetime import date
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse
+from django.http import FileResponse, StreamingHttpResponse
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
 from answers.models import Answer
 from assessments.models import Question
@@ -10,40 +11,83 @@ from visualization.serializers import AssessmentTableSerializer
 from assessments.serializers import QuestionSerializer, QuestionSetSerializer
 from visualization.views import AssessmentTableViewSet
 from assessments.views import QuestionsViewSet, QuestionSetsViewSet
+from admin.lib.pagination import CursorPagination
 from admin.lib.viewsets import ModelViewSet
+from .renderers import CSVStreamingRenderer, NDJSONStreamingRenderer
+from .utils.answers import ANSWER_RECORD_FIELDS, ANSWERS_EXPORT_ORDERING, annotate_answers_export, get_answer_records
 from .utils.reports import AssessmentPDFReport
 
 
-class CompleteStudentAnswersViewSet(ModelViewSet):
+class AnswersExportMixin:
+    """
+    Adds a streaming export of the answers as flat records (?format=csv or ?format=ndjson)
+    to the answers list, and an opt-in cursor pagination of the serialized answers.
+    """
+
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVStreamingRenderer, NDJSONStreamingRenderer]
+    pagination_class = CursorPagination
+
+    def is_streaming_export(self):
+        return getattr(self.request.accepted_renderer, 'streaming', False)
+
+    def stream_answers(self, queryset, filename='answers'):
+        """
+        Stream the flat records of the answers, read through a server side cursor
+        """
+        renderer = self.request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(get_answer_records(queryset), ANSWER_RECORD_FIELDS),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}_{date.today()}.{renderer.format}"'
+        response['Access-Control-Expose-Headers'] = 'Content-Disposition'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if self.is_streaming_export():
+            return self.stream_answers(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+
+class CompleteStudentAnswersViewSet(AnswersExportMixin, ModelViewSet):
     """
     Exposes all answers from all students
     """
     serializer_class = AnswerTableSerializer
 
     def get_queryset(self):
-        return Answer.objects.all().select_subclasses().order_by('question_set_answer__question_set_access__student', 'question_set_answer__question_set_access__question_set__assessment', 'question_set_answer__question_set_access__question_set', 'question_set_answer__start_date', 'question')
+        return annotate_answers_export(Answer.objects.all().select_subclasses()).order_by(*ANSWERS_EXPORT_ORDERING)
 
 
     def retrieve(self, request, pk=None):
         return Response('Cannot retrieve export', status=403)
 
 
-class SupervisorStudentAnswerViewSet(ModelViewSet):
+class SupervisorStudentAnswerViewSet(AnswersExportMixin, ModelViewSet):
 
     serializer_class = AnswerTableSerializer
 
     def get_queryset(self):
         supervisor_id = int(self.kwargs.get('supervisor_id', None))
-        return Answer.objects.filter(question_set_answer__question_set_access__student__created_by=supervisor_id).select_subclasses().order_by('question_set_answer__question_set_access__student', 'question_set_answer__question_set_access__question_set__assessment', 'question_set_answer__question_set_access__question_set', 'question_set_answer__start_date', 'question')
+        return annotate_answers_export(
+            Answer.objects.filter(question_set_answer__question_set_access__student__created_by=supervisor_id).select_subclasses()
+        ).order_by(*ANSWERS_EXPORT_ORDERING)
 
     def retrieve(self, request, *args, **kwargs):
         assessment_id = kwargs['pk']
         supervisor_id = int(self.kwargs.get('supervisor_id', None))
-        answers_by_assessment = Answer.objects.filter(question_set_answer__question_set_access__student__created_by=supervisor_id, question_set_answer__question_set_access__question_set__assessment=assessment_id).select_subclasses().order_by('question_set_answer__question_set_access__student', 'question_set_answer__question_set_access__question_set__assessment', 'question_set_answer__question_set_access__question_set', 'question_set_answer__start_date', 'question')
+        answers_by_assessment = annotate_answers_export(
+            Answer.objects.filter(question_set_answer__question_set_access__student__created_by=supervisor_id, question_set_answer__question_set_access__question_set__assessment=assessment_id).select_subclasses()
+        ).order_by(*ANSWERS_EXPORT_ORDERING)
+        if self.is_streaming_export():
+            return self.stream_answers(answers_by_assessment, filename=f'answers_{assessment_id}')
+        page = self.paginate_queryset(answers_by_assessment)
         serializer = AnswerTableSerializer(
-            answers_by_assessment, many=True,
+            answers_by_assessment if page is None else page, many=True,
         )
 
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
 
 
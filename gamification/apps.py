@@ -7,5 +7,6 @@ class GamificationConfig(AppConfig):
 
     def ready(self):
         import answers.signals
+        import gamification.signals
 
         
\ No newline at end of file
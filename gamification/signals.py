@@ -1,9 +1,11 @@
 from  django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from gamification.models import Profile, QuestionSetCompetency
 
 from answers.models import Answer, QuestionSetAnswer
-from assessments.models import QuestionSet, Question
+from assessments.models import QuestionSet, QuestionSetAccess, Question
+from visualization.models import AnswerFact, QuestionSetScoreSummary
+from visualization.utils import refresh_question_set_score_summaries
 
 
 # This is a receiver for post_save on QuestionSetAnswer
@@ -12,6 +14,10 @@ def on_question_set_answer_submission(sender, **kwargs):
 
     question_set_answer = kwargs['instance']
 
+    # Keep the student's score summary on this question_set up to date
+    if question_set_answer.question_set_access_id:
+        refresh_question_set_score_summaries([question_set_answer.question_set_access_id])
+
 """
     if (question_set_answer.complete):
 
@@ -50,6 +56,31 @@ def on_question_set_answer_submission(sender, **kwargs):
         increase_question_set_competency(student_profile, question_set_answer.question_set_access.question_set, submitted_question_set_competency)
 """
 
+# This is a receiver for post_delete on QuestionSetAnswer
+@receiver(post_delete, sender=QuestionSetAnswer)
+def on_question_set_answer_deletion(sender, **kwargs):
+
+    question_set_answer = kwargs['instance']
+
+    if question_set_answer.question_set_access_id:
+        refresh_question_set_score_summaries([question_set_answer.question_set_access_id])
+
+# This is a receiver for post_delete on QuestionSetAccess
+@receiver(post_delete, sender=QuestionSetAccess)
+def on_question_set_access_deletion(sender, **kwargs):
+
+    question_set_access = kwargs['instance']
+
+    # Its question_set answers are kept but no longer linked to the question_set
+    QuestionSetScoreSummary.objects.filter(
+        question_set=question_set_access.question_set_id,
+        student=question_set_access.student_id
+    ).delete()
+    AnswerFact.objects.filter(
+        question_set=question_set_access.question_set_id,
+        student=question_set_access.student_id
+    ).delete()
+
 # Increase the question_set competency for a given profile and question_set
 def increase_question_set_competency(profile, question_set, new_amount):
 
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+# Fields of the users kept in the tokens cache (in the order of the model fields, as expected by from_db),
+# the other fields are loaded on access
+USER_SNAPSHOT_FIELDS = ['id', 'is_active', 'role', 'created_by_id']
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of the token keys and snapshots of their users, each entry expiring after timeout seconds.
+    The cache is local to each process: the entries are invalidated by the users and tokens signals
+    of the same process, the other processes see the changes once their entries expire.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        User snapshot (values of USER_SNAPSHOT_FIELDS) of the token key, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, snapshot):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.timeout, snapshot)
+            self._keys_by_user.setdefault(snapshot[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        """
+        Hits and misses counters, and number of entries of the cache
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            user_keys = self._keys_by_user.get(entry[1][0])
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry[1][0]]
+
+
+token_cache = TokenCache(settings.TOKEN_AUTH_CACHE_MAX_ENTRIES, settings.TOKEN_AUTH_CACHE_TIMEOUT)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication keeping the users of the recently used tokens in token_cache, so that
+    authenticated requests don't query the database. The users are only loaded with their
+    USER_SNAPSHOT_FIELDS, their other fields are deferred (loaded from the database on access).
+    """
+
+    def authenticate_credentials(self, key):
+        snapshot = token_cache.get(key)
+        if snapshot is None:
+            snapshot = Token.objects.filter(key=key).values_list(
+                *[f'user__{field}' for field in USER_SNAPSHOT_FIELDS]
+            ).first()
+            if snapshot is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            token_cache.set(key, snapshot)
+
+        user = User.from_db(DEFAULT_DB_ALIAS, USER_SNAPSHOT_FIELDS, snapshot)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token = Token.from_db(DEFAULT_DB_ALIAS, ['key', 'user_id'], [key, user.id])
+        token.user = user
+        return (user, token)
@@ -0,0 +1,21 @@
+from rest_framework.authtoken.models import Token
+
+from visualization.cache import bump_students_data_versions
+from visualization.models import AnswerFact, QuestionSetScoreSummary
+
+from .models import User
+
+
+def mark_students_pending_delete(students):
+    """
+    Mark the students as pending deletion: they are hidden and their tokens revoked at once,
+    and they are purged with all their answers later by purge_pending_deletes. Their score summaries
+    and answer facts are removed now (and no longer computed), so that the dashboards stop counting them.
+    """
+    student_ids = list(students.values_list('id', flat=True))
+    # The users signals are not sent by the update
+    bump_students_data_versions(id__in=student_ids)
+    User.all_objects.filter(id__in=student_ids).update(pending_delete=True)
+    QuestionSetScoreSummary.objects.filter(student__in=student_ids).delete()
+    AnswerFact.objects.filter(student__in=student_ids).delete()
+    Token.objects.filter(user__in=student_ids).delete()
@@ -0,0 +1,64 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import User
+from users.provisioning import provision_students
+from users.serializers import StudentProvisioningSerializer
+
+# Columns of the students CSV file (grade and group are optional)
+STUDENT_COLUMNS = ['first_name', 'last_name', 'language', 'country', 'grade', 'group']
+
+
+class Command(BaseCommand):
+    """
+    Create students in bulk from a CSV file, and output their generated codes.
+    """
+
+    help = 'Import the students of a CSV file (with a header row: first_name, last_name, language, country, grade, group)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path of the CSV file of the students')
+        parser.add_argument('--supervisor', required=True,
+                            help='Username of the supervisor of the students')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of students created per transaction')
+        parser.add_argument('--output',
+                            help='Path of the CSV file to write the created students and their codes to '
+                                 '(standard output by default)')
+
+    def handle(self, *args, **options):
+        try:
+            supervisor = User.objects.get(username=options['supervisor'], role=User.UserRole.SUPERVISOR)
+        except User.DoesNotExist:
+            raise CommandError(f'Unknown supervisor {options["supervisor"]}')
+
+        with open(options['csv_file'], newline='', encoding='utf-8-sig') as csv_file:
+            rows = [
+                {column: value for column, value in row.items() if column in STUDENT_COLUMNS and value != ''}
+                for row in csv.DictReader(csv_file)
+            ]
+
+        # All the rows are validated before creating any student
+        serializer = StudentProvisioningSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = [f'Line {index + 2}: {dict(error)}' for index, error in enumerate(serializer.errors) if error]
+            raise CommandError('Invalid students:\n' + '\n'.join(errors))
+
+        students_data = [{**student_data, 'created_by': supervisor} for student_data in serializer.validated_data]
+        students = []
+        for start in range(0, len(students_data), options['batch_size']):
+            students.extend(provision_students(students_data[start:start + options['batch_size']]))
+            self.stderr.write(f'{len(students)}/{len(students_data)} students created')
+
+        output_file = open(options['output'], 'w', newline='') if options['output'] else self.stdout
+        try:
+            writer = csv.writer(output_file)
+            writer.writerow(['id', 'username', 'first_name', 'last_name'])
+            writer.writerows(
+                [student.id, student.username, student.first_name, student.last_name] for student in students
+            )
+        finally:
+            if options['output']:
+                output_file.close()
+        self.stderr.write(self.style.SUCCESS(f'Students imported, {len(students)} created'))
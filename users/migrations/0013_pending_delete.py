@@ -0,0 +1,27 @@
+# Generated by Django 4.0.5 on 2026-10-17 21:11
+
+import django.contrib.auth.models
+from django.db import migrations, models
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_skip_intro_for_assessments'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.UserManager()),
+                ('all_objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='pending_delete',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
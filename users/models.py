@@ -1,7 +1,15 @@
-from django.contrib.auth.models import AbstractUser, Group
+from django.contrib.auth.models import AbstractUser, Group, UserManager as BaseUserManager
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
 
+from admin.lib.deletion import PendingDeleteManagerMixin
+
+
+class UserManager(PendingDeleteManagerMixin, BaseUserManager):
+    """
+    Users manager, without the users pending deletion.
+    """
+
 
 class User(AbstractUser):
     """
@@ -81,6 +89,15 @@ class User(AbstractUser):
         blank=True
     )
 
+    # Deleted users are hidden until they are purged (see purge_pending_deletes)
+    pending_delete = models.BooleanField(
+        default=False,
+        db_index=True
+    )
+
+    objects = UserManager()
+    all_objects = BaseUserManager()
+
     def is_student(self):
         """
         Checks user type
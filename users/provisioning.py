@@ -0,0 +1,75 @@
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from gamification.models import Profile
+from visualization.cache import bump_data_versions
+
+from .models import User
+
+# Students log in with a code of STUDENT_CODE_LENGTH digits
+STUDENT_CODE_LENGTH = 6
+# Attempts to provision students when their codes are taken concurrently
+PROVISIONING_ATTEMPTS = 3
+
+
+def allocate_student_codes(count):
+    """
+    Draw count random unused student codes, from the pool of all the codes minus the
+    usernames already used (by any user, including the ones pending deletion), in one query.
+    """
+    query = f"""
+        SELECT code FROM (
+            SELECT lpad(number::text, %s, '0') AS code FROM generate_series(0, %s) AS number
+            EXCEPT
+            SELECT username FROM {User._meta.db_table}
+        ) pool
+        ORDER BY random()
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, [STUDENT_CODE_LENGTH, 10 ** STUDENT_CODE_LENGTH - 1, count])
+        codes = [row[0] for row in cursor.fetchall()]
+    if len(codes) < count:
+        raise ValueError('Not enough student codes available')
+    return codes
+
+
+def create_students(students_data):
+    """
+    Create the students in bulk, with their auth tokens and gamification profiles (the users
+    post_save and pre_save signals are not sent). Each item of students_data holds the fields of a student.
+    """
+    now = timezone.now()
+    students = [
+        User(
+            **student_data, username=code, role=User.UserRole.STUDENT,
+            password=make_password(None), active_status_updated_on=now
+        )
+        for student_data, code in zip(students_data, allocate_student_codes(len(students_data)))
+    ]
+    User.objects.bulk_create(students)
+    Token.objects.bulk_create([Token(user=student, key=Token.generate_key()) for student in students])
+    Profile.objects.bulk_create([Profile(student=student) for student in students])
+    return students
+
+
+def provision_students(students_data):
+    """
+    Create the students in bulk with unique codes, retrying with new codes if some of them
+    were taken meanwhile by another creation.
+    """
+    if not students_data:
+        return []
+    for attempt in range(PROVISIONING_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                students = create_students(students_data)
+            break
+        except IntegrityError:
+            if attempt == PROVISIONING_ATTEMPTS - 1:
+                raise
+    # The users signals are not sent by the bulk creation
+    bump_data_versions({student.created_by_id for student in students})
+    return students
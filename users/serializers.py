@@ -6,6 +6,7 @@ from rest_framework.fields import ListField
 from admin.lib.serializers import NestedRelatedField
 
 from .models import Language, Country, User, Group
+from .provisioning import provision_students
 
 
 class LanguageSerializer(serializers.ModelSerializer):
@@ -129,3 +130,30 @@ class UserSerializer(serializers.ModelSerializer):
 
         instance.save()
         return instance
+
+
+class StudentProvisioningListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        """
+        Create the students in bulk.
+        """
+        return provision_students(validated_data)
+
+
+class StudentProvisioningSerializer(serializers.ModelSerializer):
+    """
+    Serializer of the students created in bulk, with generated codes (usernames).
+    Their supervisor (created_by) is given on save.
+    """
+    language = NestedRelatedField(
+        model=Language, serializer_class=LanguageSerializer)
+    country = NestedRelatedField(
+        model=Country, serializer_class=CountrySerializer)
+    group = NestedRelatedField(
+        model=Group, allow_null=True, required=False, serializer_class=GroupSerializer)
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'group', 'language', 'country', 'grade']
+        read_only_fields = ['id', 'username']
+        list_serializer_class = StudentProvisioningListSerializer
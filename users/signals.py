@@ -1,9 +1,11 @@
 from gamification.models import Profile
 from django.conf import settings
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
+from users.authentication import token_cache
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
@@ -28,3 +30,18 @@ def disable_student_password(sender, instance=None, **kwargs):
     """
     if instance.is_student():
         instance.set_unusable_password()
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_user_cached_tokens(sender, instance=None, **kwargs):
+    """
+    Remove the cached tokens of the user on its update or deletion
+    """
+    token_cache.invalidate_user(instance.pk)
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_cached_token(sender, instance=None, **kwargs):
+    """
+    Remove the token and the other cached tokens of its user on its update or deletion
+    """
+    token_cache.invalidate(instance.key)
+    token_cache.invalidate_user(instance.user_id)
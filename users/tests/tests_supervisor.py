@@ -1,8 +1,17 @@
+import io
+
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient, APITestCase
+from admin.tests.helpers import count_rows, create_answers
+from answers.models import Answer, AnswerInput, AnswerSelect, AnswerSession, QuestionSetAnswer
+from assessments.models import Assessment, Question, QuestionSetAccess
+from gamification.models import Profile
 from users.models import User
+from visualization.models import AnswerFact, QuestionSetScoreSummary
+from visualization.utils import append_answer_facts, get_assessment_table_metrics, get_question_table_metrics
 
 
 class UsersSupervisorTests(APITestCase):
@@ -66,6 +75,43 @@ class UsersSupervisorTests(APITestCase):
         self.assertFalse(user.has_usable_password())
         self.assertTrue(user.is_student())
 
+    def test_bulk_create_students(self):
+        """
+        Ensure that supervisors can create multiple students at once, with unique codes.
+        """
+        url = reverse('user-bulk-create-students')
+        data = {'students': [
+            {'first_name': 'Fred', 'last_name': 'Weasley', 'country': 'JOR', 'language': 'ENG'},
+            {'first_name': 'George', 'last_name': 'Weasley', 'country': 'JOR', 'language': 'ENG', 'grade': '2'}
+        ]}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 2)
+        usernames = [student['username'] for student in response.data]
+        self.assertNotEqual(usernames[0], usernames[1])
+        for student in response.data:
+            self.assertRegex(student['username'], r'^\d{6}$')
+            user = User.objects.get(id=student['id'])
+            self.assertFalse(user.has_usable_password())
+            self.assertTrue(user.is_student())
+            self.assertEqual(user.created_by.username, 'supervisor')
+            self.assertTrue(Token.objects.filter(user=user).exists())
+            self.assertTrue(Profile.objects.filter(student=user).exists())
+
+    def test_bulk_create_students_invalid(self):
+        """
+        Ensure that no student is created if one of them is invalid.
+        """
+        url = reverse('user-bulk-create-students')
+        data = {'students': [
+            {'first_name': 'Fred', 'last_name': 'Weasley', 'country': 'JOR', 'language': 'ENG'},
+            {'first_name': 'George', 'last_name': 'Weasley', 'country': 'JOR', 'language': 'XXX'}
+        ]}
+        users_count = User.objects.count()
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(User.objects.count(), users_count)
+
     def test_create_supervisor(self):
         """
         Ensure that supervisors can create a supervisor.
@@ -154,6 +200,17 @@ class UsersSupervisorTests(APITestCase):
         users = User.objects.filter(id=5)
         self.assertEqual(len(users), 1)
 
+    def test_revoked_token(self):
+        """
+        Ensure that a token can't be used once deleted, even if it was used (and cached) before.
+        """
+        url = reverse('user-get-self')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, 200)
+        Token.objects.get(user__username='supervisor').delete()
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, 401)
+
     def test_update_student_code_on_student(self):
         """
         Ensure that supervisors can update a student code.
@@ -173,3 +230,100 @@ class UsersSupervisorTests(APITestCase):
         url = reverse('user-update-student-code', args=[4])
         response = self.client.post(url, format='json')
         self.assertEqual(response.status_code, 400)
+
+
+class UsersDeletionSupervisorTests(APITestCase):
+    """
+    Students deletion tests from a supervisor account: the students are hidden at once,
+    and purged with all their data by purge_pending_deletes.
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up authentication, and answers of the students 1 and 3 to the question_set 3.
+        """
+        token = Token.objects.get(user__username='supervisor')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.question_set_answer_ids = {}
+        self.answer_ids = {}
+        for student_id in (1, 3):
+            Profile.objects.get_or_create(student_id=student_id)
+            question_set_answer, self.answer_ids[student_id] = create_answers(student_id, 3)
+            self.question_set_answer_ids[student_id] = question_set_answer.id
+
+    def assertStudentsHidden(self, student_ids):
+        self.assertFalse(User.objects.filter(id__in=student_ids).exists())
+        self.assertEqual(User.all_objects.filter(id__in=student_ids, pending_delete=True).count(), len(student_ids))
+        self.assertFalse(Token.objects.filter(user__in=student_ids).exists())
+
+    def test_bulk_delete_students(self):
+        """
+        Ensure that supervisors can delete their students at once: they are hidden and their tokens revoked.
+        """
+        url = reverse('user-bulk-delete-students')
+        response = self.client.delete(url, {'students': [1, 3]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStudentsHidden([1, 3])
+        self.assertEqual(Answer.objects.filter(id__in=self.answer_ids[1]).count(), 2)
+
+    def test_delete_student(self):
+        """
+        Ensure that a deleted student is hidden and their token revoked, until purged.
+        """
+        url = reverse('user-detail', args=[1])
+        response = self.client.delete(url, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertStudentsHidden([1])
+        self.assertTrue(User.objects.filter(id=3).exists())
+
+    def test_delete_student_dashboards(self):
+        """
+        Ensure that a deleted student is removed from the dashboards at once, without waiting for the purge.
+        """
+        self.assertTrue(QuestionSetScoreSummary.objects.filter(student=1).exists())
+        url = reverse('user-detail', args=[1])
+        self.client.delete(url, format='json')
+        self.assertFalse(QuestionSetScoreSummary.objects.filter(student=1).exists())
+        self.assertFalse(AnswerFact.objects.filter(student=1).exists())
+        self.assertEqual(QuestionSetScoreSummary.objects.filter(student=3).count(), 1)
+        self.assertEqual(AnswerFact.objects.filter(student=3).count(), 2)
+
+        metrics = get_assessment_table_metrics(Assessment.objects.filter(id=2))[2]
+        self.assertEqual(metrics['invites'], 1)
+        self.assertEqual(metrics['students_count'], 1)
+        self.assertEqual(metrics['plays'], 1)
+        for question_metrics in get_question_table_metrics(Question.objects.filter(question_set=3)).values():
+            self.assertEqual(question_metrics['invites'], 1)
+            self.assertEqual(question_metrics['plays'], 1)
+
+        # The derived rows are not computed again for the student
+        QuestionSetAnswer.objects.get(id=self.question_set_answer_ids[1]).save()
+        append_answer_facts(self.answer_ids[1])
+        self.assertFalse(QuestionSetScoreSummary.objects.filter(student=1).exists())
+        self.assertFalse(AnswerFact.objects.filter(student=1).exists())
+
+    def test_purge_students(self):
+        """
+        Ensure that the purge deletes the students pending deletion with all their data, and nothing else.
+        """
+        url = reverse('user-detail', args=[1])
+        self.client.delete(url, format='json')
+        call_command('purge_pending_deletes', chunk_size=1, stdout=io.StringIO())
+
+        answer_ids = self.answer_ids[1]
+        self.assertFalse(User.all_objects.filter(id=1).exists())
+        self.assertFalse(AnswerSession.objects.filter(student=1).exists())
+        self.assertEqual(count_rows(QuestionSetAnswer, [self.question_set_answer_ids[1]]), 0)
+        for model in (Answer, AnswerInput, AnswerSelect):
+            self.assertEqual(count_rows(model, answer_ids), 0)
+        self.assertFalse(Profile.objects.filter(student=1).exists())
+        self.assertFalse(QuestionSetAccess.objects.filter(student=1).exists())
+        self.assertFalse(QuestionSetScoreSummary.objects.filter(student=1).exists())
+        self.assertFalse(AnswerFact.objects.filter(student=1).exists())
+
+        # The other student is kept with all their data
+        self.assertTrue(User.objects.filter(id=3).exists())
+        self.assertEqual(count_rows(Answer, self.answer_ids[3]), 2)
+        self.assertEqual(QuestionSetScoreSummary.objects.filter(student=3).count(), 1)
+        self.assertEqual(AnswerFact.objects.filter(student=3).count(), 2)
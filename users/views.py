@@ -9,9 +9,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from admin.lib.viewsets import ModelViewSet
+from users.deletion import mark_students_pending_delete
 from users.models import User, Language,  Country, Group
 from users.permissions import HasAccess, IsSupervisor
-from users.serializers import UserSerializer, LanguageSerializer, CountrySerializer, GroupSerializer
+from users.serializers import (UserSerializer, LanguageSerializer, CountrySerializer, GroupSerializer,
+                               StudentProvisioningSerializer)
 
 
 def student_key_generator():
@@ -19,7 +21,7 @@ def student_key_generator():
     Generate a random 6-digit string of numbers.
     """
     key = ''.join(random.choice(string.digits) for x in range(6))
-    if User.objects.filter(username=key).exists():
+    if User.all_objects.filter(username=key).exists():
         key = student_key_generator()
     return key
 
@@ -123,6 +125,15 @@ class UsersViewSet(ModelViewSet):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=201, headers=headers)
 
+    def perform_destroy(self, instance):
+        """
+        Mark students as pending deletion, they are purged with their answers by purge_pending_deletes.
+        """
+        if instance.is_student():
+            mark_students_pending_delete(User.objects.filter(id=instance.id))
+        else:
+            instance.delete()
+
     @action(detail=True, methods=['post'])
     def update_student_code(self, request, pk=None):
         """
@@ -140,10 +151,26 @@ class UsersViewSet(ModelViewSet):
         """
         Get logged-in user.
         """
-        user = self.request.user
+        # The authenticated user is only partially loaded (see CachedTokenAuthentication)
+        user = User.objects.get(id=self.request.user.id)
         serializer = self.get_serializer(user)
         return Response(serializer.data, status=200)
 
+    @action(detail=False, methods=['post'])
+    def bulk_create_students(self, request):
+        """
+        Create multiple students at once, with generated codes.
+        """
+        students_data = request.data.get('students', None)
+
+        if not students_data:
+            return Response('No student specified', status=400)
+
+        serializer = StudentProvisioningSerializer(data=students_data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(created_by=request.user)
+        return Response(serializer.data, status=201)
+
     @action(detail=False, methods=['delete'])
     def bulk_delete_students(self, request):
         """
@@ -163,7 +190,8 @@ class UsersViewSet(ModelViewSet):
                 'Cannot delete unauthorized students', status=400)
 
         try:
-            users_to_delete.delete()
+            # The students are hidden at once, and purged with their answers by purge_pending_deletes
+            mark_students_pending_delete(users_to_delete)
         except:
             return Response('An error occured while trying to delete students', status=500)
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class VisualizationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'visualization'
+
+    def ready(self):
+        import visualization.signals
@@ -0,0 +1,113 @@
+import functools
+import hashlib
+import pickle
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from admin.lib.etags import compute_etag, is_not_modified, not_modified_response
+from users.models import User
+
+# Data version shared by all the supervisors, bumped when the assessments content changes
+CONTENT_DATA_VERSION = 'content'
+# Data version bumped when the data of any student changes
+ALL_STUDENTS_DATA_VERSION = 'students'
+
+
+def get_data_version_key(scope):
+    return f'dashboard:version:{scope}'
+
+
+def get_data_versions(scope):
+    """
+    Content and supervisor (or ALL_STUDENTS_DATA_VERSION) data versions. Missing versions (never set
+    or evicted) are initialized with a new unique value, so that no previous cache entry can match them.
+    """
+    keys = [get_data_version_key(CONTENT_DATA_VERSION), get_data_version_key(scope)]
+    versions = cache.get_many(keys)
+    missing_keys = [key for key in keys if key not in versions]
+    if missing_keys:
+        for key in missing_keys:
+            cache.add(key, time.time_ns(), timeout=None)
+        versions.update(cache.get_many(missing_keys))
+    return tuple(versions.get(key) for key in keys)
+
+
+def bump_data_versions(supervisor_ids):
+    """
+    Invalidate the cached dashboard responses of the given supervisors (CONTENT_DATA_VERSION for all),
+    and the ones computed from the data of all the students.
+    The versions are bumped once the current transaction is committed (nothing is bumped on rollback),
+    so that a response computed from the data before the commit can't be cached under the new versions.
+    """
+    scopes = {*supervisor_ids, ALL_STUDENTS_DATA_VERSION} - {None}
+    transaction.on_commit(functools.partial(_bump_scopes, scopes))
+
+
+def _bump_scopes(scopes):
+    for scope in scopes:
+        key = get_data_version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_students_data_versions(**filters):
+    """
+    Invalidate the cached dashboard responses of the supervisors of the students matching the filters
+    """
+    bump_data_versions(User.objects.filter(**filters).values_list('created_by', flat=True).distinct())
+
+
+def get_response_cache_key(view, request, all_students=False):
+    """
+    Cache key of a dashboard response: endpoint, supervisor, query params and data versions
+    """
+    versions = get_data_versions(ALL_STUDENTS_DATA_VERSION if all_students else request.user.id)
+    descriptor = repr((
+        type(view).__name__, view.action, sorted(view.kwargs.items()), request.user.id, versions,
+        sorted(request.query_params.lists()), request.accepted_renderer.format
+    ))
+    return 'dashboard:response:' + hashlib.md5(descriptor.encode()).hexdigest()
+
+
+def cache_response(method=None, all_students=False):
+    """
+    Cache the successful responses of a dashboard viewset method, per supervisor and
+    query params, until the data version of the supervisor changes (or the data of any
+    student if the responses are computed from all_students).
+    Responses larger than DASHBOARD_CACHE_MAX_ENTRY_SIZE bytes are not cached.
+    The responses have an ETag computed from the cache key, so that conditional requests
+    are answered with a 304 as long as the data versions did not change.
+    """
+    if method is None:
+        return functools.partial(cache_response, all_students=all_students)
+
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return method(view, request, *args, **kwargs)
+
+        key = get_response_cache_key(view, request, all_students)
+        etag = compute_etag(key)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        data = cache.get(key)
+        if data is not None:
+            response = Response(pickle.loads(data))
+        else:
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                data = pickle.dumps(response.data, protocol=pickle.HIGHEST_PROTOCOL)
+                if len(data) <= settings.DASHBOARD_CACHE_MAX_ENTRY_SIZE:
+                    cache.set(key, data, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+        if response.status_code == 200:
+            response['ETag'] = etag
+        return response
+
+    return wrapper
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from visualization.utils import rebuild_answer_facts
+
+
+class Command(BaseCommand):
+    """
+    Backfill the answer facts from the existing answers.
+    """
+
+    help = 'Rebuild the analytics facts of all the answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Range of answer ids rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        def progress(chunks_done, chunks_count):
+            self.stdout.write(f'{chunks_done}/{chunks_count} answer chunks rebuilt')
+
+        facts_count = rebuild_answer_facts(chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Answer facts rebuilt, {facts_count} facts'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from assessments.models import QuestionSetAccess
+from visualization.utils import refresh_question_set_score_summaries
+
+
+class Command(BaseCommand):
+    """
+    Backfill the question_set score summaries from the existing answers.
+    """
+
+    help = 'Recompute the question_set score summaries of all (or the given) question_set accesses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--question-set', type=int, action='append', dest='question_sets',
+                            help='Only refresh the summaries of this question_set (can be repeated)')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Number of question_set accesses refreshed per transaction')
+
+    def handle(self, *args, **options):
+        accesses = QuestionSetAccess.objects.order_by('id')
+        if options['question_sets']:
+            accesses = accesses.filter(question_set__in=options['question_sets'])
+        access_ids = list(accesses.values_list('id', flat=True))
+
+        chunk_size = options['chunk_size']
+        for start in range(0, len(access_ids), chunk_size):
+            refresh_question_set_score_summaries(access_ids[start:start + chunk_size])
+            self.stdout.write(f'{min(start + chunk_size, len(access_ids))}/{len(access_ids)} question_set accesses refreshed')
+
+        self.stdout.write(self.style.SUCCESS('Score summaries refreshed'))
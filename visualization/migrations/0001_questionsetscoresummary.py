@@ -0,0 +1,45 @@
+# Generated by Django 4.0.5 on 2026-10-17 20:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assessments', '0061_questionsetaccess_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSetScoreSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('complete_attempts', models.IntegerField(default=0)),
+                ('correct_answers_count', models.IntegerField(default=0)),
+                ('wrong_answers_count', models.IntegerField(default=0)),
+                ('first_attempt_correct_answers_count', models.IntegerField(default=0)),
+                ('first_attempt_answers_count', models.IntegerField(default=0)),
+                ('last_attempt_correct_answers_count', models.IntegerField(default=0)),
+                ('last_attempt_answers_count', models.IntegerField(default=0)),
+                ('sel_not_really_count', models.IntegerField(default=0)),
+                ('sel_a_little_count', models.IntegerField(default=0)),
+                ('sel_a_lot_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_summaries', to='assessments.questionset')),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'STUDENT'}, on_delete=django.db.models.deletion.CASCADE, related_name='score_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Question set score summaries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='questionsetscoresummary',
+            constraint=models.UniqueConstraint(fields=('question_set', 'student'), name='unique_score_summary_per_student_and_question_set'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.0.5 on 2026-10-17 20:05
+# Migration backfilling the question_set score summaries from the existing question_set answers, with a single
+# statement computing the same values as refresh_question_set_score_summaries (first and last attempts are the
+# first and last complete question_set answers of each access, SEL answers are not counted as correct or wrong)
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('answers', '0021_rename_topic_answer_answer_question_set_answer'),
+        ('visualization', '0001_questionsetscoresummary'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            """
+            INSERT INTO visualization_questionsetscoresummary (
+                question_set_id, student_id, attempts, complete_attempts, correct_answers_count, wrong_answers_count,
+                first_attempt_correct_answers_count, first_attempt_answers_count,
+                last_attempt_correct_answers_count, last_attempt_answers_count,
+                sel_not_really_count, sel_a_little_count, sel_a_lot_count, updated_at
+            )
+            WITH attempts AS (
+                SELECT
+                    question_set_answer.id,
+                    question_set_answer.question_set_access_id,
+                    question_set_answer.complete,
+                    COUNT(answer.id) AS total,
+                    COUNT(answer.id) FILTER (WHERE answer.valid) AS correct,
+                    COUNT(answer.id) FILTER (
+                        WHERE answer.valid AND question.question_type IS DISTINCT FROM 'SEL'
+                    ) AS evaluated_correct,
+                    COUNT(answer.id) FILTER (
+                        WHERE NOT answer.valid AND question.question_type IS DISTINCT FROM 'SEL'
+                    ) AS evaluated_wrong,
+                    COUNT(answer.id) FILTER (WHERE answer_sel.statement = 'NOT_REALLY') AS sel_not_really,
+                    COUNT(answer.id) FILTER (WHERE answer_sel.statement = 'A_LITTLE') AS sel_a_little,
+                    COUNT(answer.id) FILTER (WHERE answer_sel.statement = 'A_LOT') AS sel_a_lot,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY question_set_answer.question_set_access_id, question_set_answer.complete
+                        ORDER BY question_set_answer.id
+                    ) AS rank,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY question_set_answer.question_set_access_id, question_set_answer.complete
+                        ORDER BY question_set_answer.id DESC
+                    ) AS reverse_rank
+                FROM answers_questionsetanswer question_set_answer
+                LEFT JOIN answers_answer answer ON answer.question_set_answer_id = question_set_answer.id
+                LEFT JOIN assessments_question question ON question.id = answer.question_id
+                LEFT JOIN answers_answersel answer_sel ON answer_sel.answer_ptr_id = answer.id
+                WHERE question_set_answer.question_set_access_id IS NOT NULL
+                GROUP BY question_set_answer.id
+            )
+            SELECT
+                access.question_set_id,
+                access.student_id,
+                COUNT(*),
+                COUNT(*) FILTER (WHERE attempts.complete),
+                SUM(attempts.evaluated_correct),
+                SUM(attempts.evaluated_wrong),
+                COALESCE(MAX(attempts.correct) FILTER (WHERE attempts.complete AND attempts.rank = 1), 0),
+                COALESCE(MAX(attempts.total) FILTER (WHERE attempts.complete AND attempts.rank = 1), 0),
+                COALESCE(MAX(attempts.correct) FILTER (WHERE attempts.complete AND attempts.reverse_rank = 1), 0),
+                COALESCE(MAX(attempts.total) FILTER (WHERE attempts.complete AND attempts.reverse_rank = 1), 0),
+                SUM(attempts.sel_not_really),
+                SUM(attempts.sel_a_little),
+                SUM(attempts.sel_a_lot),
+                NOW()
+            FROM attempts
+            INNER JOIN assessments_questionsetaccess access ON access.id = attempts.question_set_access_id
+            GROUP BY access.id
+            ON CONFLICT (question_set_id, student_id) DO NOTHING
+            """,
+            migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.0.5 on 2026-10-17 20:43
+# Migration adding the answer facts, backfilled from the existing answers linked to a question_set access
+# with the values inserted by _insert_answer_facts (durations in whole milliseconds, rounded down)
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('answers', '0022_answer_answer_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assessments', '0061_questionsetaccess_created_at_and_more'),
+        ('users', '0012_user_skip_intro_for_assessments'),
+        ('visualization', '0002_backfill_score_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerFact',
+            fields=[
+                ('answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fact', serialize=False, to='answers.answer')),
+                ('question_type', models.CharField(blank=True, max_length=32, null=True)),
+                ('valid', models.BooleanField()),
+                ('duration_ms', models.IntegerField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('assessment', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answer_facts', to='assessments.assessment')),
+                ('question', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answer_facts', to='assessments.question')),
+                ('question_set', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answer_facts', to='assessments.questionset')),
+                ('student', models.ForeignKey(db_index=False, limit_choices_to={'role': 'STUDENT'}, on_delete=django.db.models.deletion.CASCADE, related_name='answer_facts', to=settings.AUTH_USER_MODEL)),
+                ('supervisor', models.ForeignKey(blank=True, db_index=False, limit_choices_to={'role': 'SUPERVISOR'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='supervised_answer_facts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='answerfact',
+            index=models.Index(fields=['assessment', 'student'], name='answer_fact_assessment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answerfact',
+            index=models.Index(fields=['question_set', 'student'], name='answer_fact_question_set_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answerfact',
+            index=models.Index(fields=['question'], name='answer_fact_question_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answerfact',
+            index=models.Index(fields=['supervisor', 'date'], name='answer_fact_supervisor_idx'),
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO visualization_answerfact (
+                answer_id, student_id, supervisor_id, assessment_id, question_set_id, question_id,
+                question_type, valid, duration_ms, date
+            )
+            SELECT
+                answer.id, access.student_id, student.created_by_id, question_set.assessment_id,
+                access.question_set_id, answer.question_id, question.question_type, answer.valid,
+                FLOOR(ROUND((EXTRACT(EPOCH FROM answer.end_datetime - answer.start_datetime) * 1000000)::numeric) / 1000),
+                COALESCE(answer.start_datetime, question_set_answer.start_date)::date
+            FROM answers_answer answer
+            INNER JOIN answers_questionsetanswer question_set_answer
+                ON question_set_answer.id = answer.question_set_answer_id
+            INNER JOIN assessments_questionsetaccess access ON access.id = question_set_answer.question_set_access_id
+            INNER JOIN users_user student ON student.id = access.student_id
+            INNER JOIN assessments_questionset question_set ON question_set.id = access.question_set_id
+            LEFT JOIN assessments_question question ON question.id = answer.question_id
+            ON CONFLICT (answer_id) DO NOTHING
+            """,
+            migrations.RunSQL.noop
+        ),
+    ]
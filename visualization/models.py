@@ -1,3 +1,171 @@
 from django.db import models
+from users.models import User
 
-# Create your models here.
+
+class QuestionSetScoreSummary(models.Model):
+    """
+    Question set score summary model.
+    Answer counts of a student on a question set, kept up to date from the
+    question set answers so that dashboards do not have to aggregate the answers.
+    """
+
+    question_set = models.ForeignKey(
+        'assessments.QuestionSet',
+        on_delete=models.CASCADE,
+        related_name='score_summaries'
+    )
+
+    student = models.ForeignKey(
+        'users.User',
+        limit_choices_to={'role': User.UserRole.STUDENT},
+        on_delete=models.CASCADE,
+        related_name='score_summaries'
+    )
+
+    # Number of question set answers (complete or not)
+    attempts = models.IntegerField(
+        default=0
+    )
+
+    complete_attempts = models.IntegerField(
+        default=0
+    )
+
+    # Answers to evaluated (non SEL) questions, over all the attempts
+    correct_answers_count = models.IntegerField(
+        default=0
+    )
+
+    wrong_answers_count = models.IntegerField(
+        default=0
+    )
+
+    # Answers of the first and last complete attempts
+    first_attempt_correct_answers_count = models.IntegerField(
+        default=0
+    )
+
+    first_attempt_answers_count = models.IntegerField(
+        default=0
+    )
+
+    last_attempt_correct_answers_count = models.IntegerField(
+        default=0
+    )
+
+    last_attempt_answers_count = models.IntegerField(
+        default=0
+    )
+
+    # SEL statements, over all the attempts
+    sel_not_really_count = models.IntegerField(
+        default=0
+    )
+
+    sel_a_little_count = models.IntegerField(
+        default=0
+    )
+
+    sel_a_lot_count = models.IntegerField(
+        default=0
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name_plural = 'Question set score summaries'
+        constraints = [
+            models.constraints.UniqueConstraint(
+                fields=['question_set', 'student'],
+                name='unique_score_summary_per_student_and_question_set'
+            )
+        ]
+
+    def __str__(self):
+        return f'Score summary of {self.student} on {self.question_set}'
+
+
+class AnswerFact(models.Model):
+    """
+    Answer fact model.
+    Narrow analytics row per answer (to a question_set accessed by a student), appended
+    on ingestion so that dashboards can aggregate answers without joining the
+    question_set answers, accesses and question_sets. Only the values which can't change
+    once the answer is saved are copied (the group of the student is joined when needed).
+    """
+
+    answer = models.OneToOneField(
+        'answers.Answer',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fact'
+    )
+
+    student = models.ForeignKey(
+        'users.User',
+        limit_choices_to={'role': User.UserRole.STUDENT},
+        on_delete=models.CASCADE,
+        related_name='answer_facts',
+        db_index=False
+    )
+
+    supervisor = models.ForeignKey(
+        'users.User',
+        limit_choices_to={'role': User.UserRole.SUPERVISOR},
+        on_delete=models.SET_NULL,
+        related_name='supervised_answer_facts',
+        null=True,
+        blank=True,
+        db_index=False
+    )
+
+    assessment = models.ForeignKey(
+        'assessments.Assessment',
+        on_delete=models.CASCADE,
+        related_name='answer_facts',
+        db_index=False
+    )
+
+    question_set = models.ForeignKey(
+        'assessments.QuestionSet',
+        on_delete=models.CASCADE,
+        related_name='answer_facts',
+        db_index=False
+    )
+
+    question = models.ForeignKey(
+        'assessments.Question',
+        on_delete=models.SET_NULL,
+        related_name='answer_facts',
+        null=True,
+        blank=True,
+        db_index=False
+    )
+
+    question_type = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True
+    )
+
+    valid = models.BooleanField()
+
+    duration_ms = models.IntegerField(
+        null=True,
+        blank=True
+    )
+
+    date = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['assessment', 'student'], name='answer_fact_assessment_idx'),
+            models.Index(fields=['question_set', 'student'], name='answer_fact_question_set_idx'),
+            models.Index(fields=['question'], name='answer_fact_question_idx'),
+            models.Index(fields=['supervisor', 'date'], name='answer_fact_supervisor_idx')
+        ]
+
+    def __str__(self):
+        return f'Answer fact of {self.student} for {self.question}'
@@ -3,7 +3,8 @@ from rest_framework import serializers
 import datetime
 import time
 from django.db.models.functions import Round
-from django.db.models import Q, Avg, ExpressionWrapper, F, fields, Min, Max, ExpressionWrapper, Count, Sum, Case, When, FloatField, IntegerField
+from django.db.models import Q, Avg, ExpressionWrapper, F, fields, ExpressionWrapper, Count, Sum, Case, When, FloatField, IntegerField
+from django.db import models
 from django.utils import timezone
 from admin.lib.serializers import NestedRelatedField, PolymorphicSerializer
 from users.models import User, Group
@@ -13,7 +14,21 @@ from answers.serializers import DragAndDropAreaEntrySerializer
 from assessments.serializers import (AreaOptionSerializer, DominoOptionSerializer, SelectOptionSerializer, SortOptionSerializer,
                                      HintSerializer, AttachmentSerializer, LearningObjectiveSerializer, TopicSerializer, LearningObjectiveSerializer)
 from users.serializers import GroupSerializer
-from .utils import calculate_student_score, calculate_assessments_score
+from .models import QuestionSetScoreSummary
+from .utils import (calculate_assessments_score, compute_correct_answers_percentage, get_assessment_table_metrics,
+                    get_question_table_metrics, get_score_matrix, get_speed_statistics, get_students_scores)
+
+
+class TableMetricsListSerializer(serializers.ListSerializer):
+    """
+    Table list serializer.
+    Computes the table metrics of all the listed instances at once.
+    """
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, models.Manager) else data)
+        self.child.prefetch_table_metrics(instances)
+        return super().to_representation(instances)
 
 
 class AssessmentTableSerializer(serializers.ModelSerializer):
@@ -50,73 +65,29 @@ class AssessmentTableSerializer(serializers.ModelSerializer):
                   'country_name', 'country_code', 'question_sets_count', 'question_sets', 'topic',
                   'plays', 'students_count', 'grade', 'subject', 'private', 'can_edit',
                   'icon', 'archived', 'downloadable', 'sel_question', 'score')
+        list_serializer_class = TableMetricsListSerializer
 
-    def __get_question_set_correct_answers_percentage(self, question_set):
+    def prefetch_table_metrics(self, assessments):
         """
-        Get the percentage of correct answers for the given question_set
+        Compute the table metrics of the given assessments in a fixed number of queries
         """
-        correct_answers_percentage = 0
-        question_set_total_answers = Question.objects.filter(question_set=question_set).exclude(question_type='SEL').count()
-        question_set_answers = QuestionSetAnswer.objects.filter(question_set_access__question_set=question_set)
-        if not question_set_total_answers or not question_set_answers:
-            return None
-        question_set_total_correct_answers = Answer.objects.filter(
-                question_set_answer__in=question_set_answers,
-                valid=True
-            ).exclude(question__question_type='SEL').count()
-        question_set_total_wrong_answers = 0
-        if question_set_total_correct_answers == 0:
-            question_set_total_wrong_answers = Answer.objects.filter(
-                question_set_answer__in=question_set_answers,
-                valid=False
-            ).exclude(question__question_type='SEL').count()
-        if (question_set_total_answers != 0):
-            if question_set_total_correct_answers != 0:
-                correct_answers_percentage = round((question_set_total_correct_answers / question_set_total_answers) * 100, 1)
-            elif question_set_total_wrong_answers != 0:
-                correct_answers_percentage = 0
-
-        return min(correct_answers_percentage, 100.0)
-
-    def __get_question_set_SEL_average(self, question_set):
-        choices = ['NOT_REALLY', 'A_LITTLE', 'A_LOT']
-        answers = AnswerSEL.objects.filter(question__question_set=question_set).distinct()
+        if not hasattr(self, '_table_metrics'):
+            self._table_metrics = {}
+        missing_assessments = [assessment for assessment in assessments if assessment.id not in self._table_metrics]
+        self._table_metrics.update(get_assessment_table_metrics(missing_assessments))
 
-        if answers:
-            vals = [choices.index(answer.statement) for answer in answers]
-            average = round(sum(vals) / len(vals))
-            return choices[average]
-
-        return None
+    def __get_table_metrics(self, instance):
+        self.prefetch_table_metrics([instance])
+        return self._table_metrics[instance.id]
 
     def get_question_sets_count(self, instance):
-        return QuestionSet.objects.filter(assessment=instance).count()
+        return self.__get_table_metrics(instance)['question_sets_count']
 
     def get_question_sets(self, instance):
-        question_sets = QuestionSet.objects.filter(assessment=instance).values_list('id', 'name', 'description', 'icon', 'order', 'learning_objective')
-
-        question_sets_res = []
-        for question_set in question_sets:
-            learning_objective_data = None
-            if question_set[5]:
-                learning_objective = LearningObjective.objects.get(code=question_set[5])
-                learning_objective_data = LearningObjectiveSerializer(learning_objective).data
-            question_count = Question.objects.filter(question_set=question_set[0]).exclude(
-                Q(question_type='SEL') & (~Q(question_set__order=1) | Q(question_set__assessment__sel_question=False))
-            ).count()
-            correct_answers_percentage = self.__get_question_set_correct_answers_percentage(question_set)
-            sel_average = self.__get_question_set_SEL_average(question_set)
-            question_sets_res.append({"id": question_set[0], "title": question_set[1], "description": question_set[2], "icon": question_set[3], "order": question_set[4], "learning_objective": learning_objective_data,
-                    "questionsCount": question_count, "score": correct_answers_percentage, "sel_average": sel_average})
-
-        return question_sets_res
+        return self.__get_table_metrics(instance)['question_sets']
 
     def get_students_count(self, instance):
-        return User.objects.filter(
-            questionsetaccess__question_set__assessment=instance,
-            questionsetaccess__start_date__lte=datetime.date.today(),
-            questionsetaccess__end_date__gte=datetime.date.today()
-        ).distinct().count()
+        return self.__get_table_metrics(instance)['students_count']
 
     def get_language_name(self, instance):
         return instance.language.name_en
@@ -138,34 +109,19 @@ class AssessmentTableSerializer(serializers.ModelSerializer):
             return None
 
         supervisor = self.context['supervisor']
-        if instance.created_by == supervisor:
+        if instance.created_by_id == supervisor.id:
             return True
         else:
             return False
 
     def get_invites(self, instance):
-        question_sets = QuestionSet.objects.filter(assessment=instance)
-        return User.objects.filter(questionsetaccess__question_set__in=question_sets).distinct().count()
+        return self.__get_table_metrics(instance)['invites']
 
     def get_plays(self, instance):
-        question_sets = QuestionSet.objects.filter(assessment=instance)
-        return QuestionSetAnswer.objects.filter(question_set_access__question_set__in=question_sets).distinct('session').count()
+        return self.__get_table_metrics(instance)['plays']
 
     def get_score(self, instance):
-        question_sets = QuestionSet.objects.filter(assessment=instance)
-        question_sets_answers = []
-
-        for question_set in question_sets:
-            if question_set.evaluated:
-                correct_answers_percentage = self.__get_question_set_correct_answers_percentage(question_set)
-                if correct_answers_percentage is not None:
-                    question_sets_answers.append(correct_answers_percentage)
-
-        score = None
-        if question_sets_answers:
-            score = sum(question_sets_answers) / float(len(question_sets_answers))
-
-        return score
+        return self.__get_table_metrics(instance)['score']
 
 class UserTableSerializer(serializers.ModelSerializer):
     """
@@ -212,6 +168,24 @@ class UserTableSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'full_name', 'first_name', 'last_name', 'last_session', 'completed_question_sets_count', 'active_status_updated_on',
                   'assessments_count', 'language_name', 'language_code', 'country_name', 'country_code', 'group', 'is_active', 'can_delete', 'grade', 'assessment_complete',
                   'assessments', 'speed', 'sel_overview', 'average_score', 'completed_questions_count', 'honey')
+        list_serializer_class = TableMetricsListSerializer
+
+    def prefetch_table_metrics(self, students):
+        """
+        Compute the speeds of the given students in a fixed number of queries
+        """
+        if not hasattr(self, '_table_metrics'):
+            self._table_metrics = {}
+        missing_students = [student.id for student in students if student.id not in self._table_metrics]
+        speeds = get_speed_statistics('student', missing_students, evaluated_only=True)
+        self._table_metrics.update({
+            student_id: {'speed': speeds[student_id]['mean'] / 1000 if student_id in speeds else None}
+            for student_id in missing_students
+        })
+
+    def __get_table_metrics(self, instance):
+        self.prefetch_table_metrics([instance])
+        return self._table_metrics[instance.id]
 
     def get_full_name(self, instance):
         return (instance.first_name + ' ' + instance.last_name)
@@ -311,17 +285,7 @@ class UserTableSerializer(serializers.ModelSerializer):
         return [instance.group.name] if instance.group else []
 
     def get_speed(self, instance):
-        student_speed = None
-        student_answers = Answer.objects.filter(
-            question_set_answer__session__student=instance
-        ).exclude(question__question_type__exact='SEL')
-
-        if student_answers:
-            student_speed = student_answers.annotate(
-                durations = ExpressionWrapper(F('end_datetime') - F('start_datetime'), output_field=fields.DurationField()),
-            ).aggregate(Avg('durations'))['durations__avg'].total_seconds()
-
-        return student_speed
+        return self.__get_table_metrics(instance)['speed']
 
     def get_can_delete(self, instance):
         if instance.is_active == False and instance.active_status_updated_on:
@@ -415,60 +379,21 @@ class StudentLinkedAssessmentsSerializer(serializers.ModelSerializer):
 #        print(f"The execution time of get_question_set_access is: {execution_time}")
         return question_set_access_list
 
-    def __get_question_set_correct_answers_percentage(self, question_set, student):
-        """
-        Get the percentage of correct answers for the given question_set and student
-        """
-        start_time = time.perf_counter()
-        correct_answers_percentage = 0
-        question_set_total_answers = Question.objects.filter(question_set=question_set).exclude(question_type='SEL').count()
-        question_set_answers = QuestionSetAnswer.objects.filter(
-            question_set_access__question_set=question_set,
-            question_set_access__student=student
-        )
-        if not question_set_total_answers or not question_set_answers:
-            return None
-        question_set_total_correct_answers = Answer.objects.filter(
-                question_set_answer__in=question_set_answers,
-                valid=True
-            ).exclude(question__question_type='SEL').count()
-        question_set_total_wrong_answers = 0
-        if question_set_total_correct_answers == 0:
-            question_set_total_wrong_answers = Answer.objects.filter(
-                question_set_answer__in=question_set_answers,
-                valid=False
-            ).exclude(question__question_type='SEL').count()
-        if (question_set_total_answers != 0):
-            if question_set_total_correct_answers != 0:
-                correct_answers_percentage = round((question_set_total_correct_answers / question_set_total_answers) * 100, 1)
-            elif question_set_total_wrong_answers != 0:
-                correct_answers_percentage = 0
-
-        end_time = time.perf_counter()
-        execution_time = end_time - start_time
-        #print(f"The execution time of __get_question_set_correct_answers_percentage is: {execution_time}")
-        return min(correct_answers_percentage, 100.0)
-
-    # to investigate
     def get_student_score(self, instance):
-        start_time = time.perf_counter()
         student_pk = self.context['student_pk']
-        student = User.objects.get(pk=student_pk)
-        question_sets = QuestionSet.objects.filter(
-            assessment=instance,
-            questionsetaccess__student=student,
-        ).distinct()
+        summaries = QuestionSetScoreSummary.objects.filter(
+            question_set__assessment=instance,
+            student=student_pk
+        ).annotate(
+            questions_count=Count('question_set__question', filter=~Q(question_set__question__question_type='SEL'))
+        ).values_list('questions_count', 'attempts', 'correct_answers_count')
         question_set_scores = []
-        for question_set in question_sets:
-            question_set_score = self.__get_question_set_correct_answers_percentage(question_set, student)
+        for questions_count, attempts, correct_answers_count in summaries:
+            question_set_score = compute_correct_answers_percentage(questions_count, attempts, correct_answers_count)
             if question_set_score is not None:
                 question_set_scores.append(question_set_score)
         if len(question_set_scores) == 0:
             return None
-
-        end_time = time.perf_counter()
-        execution_time = end_time - start_time
-        print(f"The execution time of get_student_score is: {execution_time}")
         return sum(question_set_scores) / len(question_set_scores)
 
 
@@ -547,155 +472,79 @@ class QuestionTableSerializer(serializers.ModelSerializer):
     assessment = serializers.SerializerMethodField()
     question_set = serializers.SerializerMethodField()
 
+    # Percentage of correct answers on this question on students' first and last complete try
+    correct_answers_percentage_first = serializers.SerializerMethodField()
+    correct_answers_percentage_last = serializers.SerializerMethodField()
+
     class Meta:
         model = Question
         fields = ('id', 'title', 'order', 'created_at', 'topic', 'question_type', 'plays', 'invites', 'question_set',
-                  'has_attachment', 'score', 'grade', 'subject', 'topic', 'learning_objective', 'assessment', 'speeds')
+                  'has_attachment', 'score', 'grade', 'subject', 'topic', 'learning_objective', 'assessment', 'speeds',
+                  'correct_answers_percentage_first', 'correct_answers_percentage_last')
+        list_serializer_class = TableMetricsListSerializer
+
+    def prefetch_table_metrics(self, questions):
+        """
+        Compute the table metrics of the given questions in a fixed number of queries
+        """
+        if not hasattr(self, '_table_metrics'):
+            self._table_metrics = {}
+        missing_questions = [question for question in questions if question.id not in self._table_metrics]
+        self._table_metrics.update(get_question_table_metrics(
+            missing_questions, self.context.get('accessible_students')))
 
-    def __get_all_answers(self, instance):
-        return Answer.objects.filter(question=instance)
+    def __get_table_metrics(self, instance):
+        self.prefetch_table_metrics([instance])
+        return self._table_metrics[instance.id]
 
     def get_assessment(self, instance):
-        return instance.question_set.assessment.id
+        return instance.question_set.assessment_id
 
     def get_question_set(self, instance):
-        return instance.question_set.id
+        return instance.question_set_id
 
     def get_has_attachment(self, instance):
-        if(Attachment.objects.filter(question=instance)):
-            return True
-        return False
+        return self.__get_table_metrics(instance)['has_attachment']
 
     def get_question_type(self, instance):
         return instance.get_question_type_display()
 
     def get_learning_objective(self, instance):
-        learning_objective = instance.question_set.learning_objective
-        serializer = LearningObjectiveSerializer(learning_objective)
-        return serializer.data
-
-    # NO LONGER USED: Overall percentage of correct answers on this question on first students' try
-    def __get_correct_answers_percentage_first(self, instance):
-
-        accessible_students = self.context.get("accessible_students")
-
-        total_answers = 0
-        total_correct_answers = 0
-
-        for student in accessible_students:
-
-            earliest_question_set_answers = QuestionSetAnswer.objects.filter(
-                question_set_access__student=student,
-                question_set_access__question_set=instance.question_set,
-                complete=True
-            )
-
-            if earliest_question_set_answers:
-
-                earliest_question_set_answer = earliest_question_set_answers.earliest("start_date")
-                answers_list = Answer.objects.filter(
-                    question=instance,
-                    question_set_answer=earliest_question_set_answer
-                )
-                total_answers += answers_list.count()
-                total_correct_answers += answers_list.filter(
-                    valid=True
-                ).count()
-
-        correct_answers_percentage = None
-
-        if total_answers:
-            correct_answers_percentage = round(
-                (100 * total_correct_answers / total_answers), 2)
-
-        return correct_answers_percentage
-
-    # NO LONGER USED:: Overall percentage of correct answers on this question on last students' try
-    def __get_correct_answers_percentage_last(self, instance):
-
-        accessible_students = self.context.get("accessible_students")
-
-        total_answers = 0
-        total_correct_answers = 0
-
-        for student in accessible_students:
-
-            latest_question_set_answers = QuestionSetAnswer.objects.filter(
-                question_set_access__student=student,
-                question_set_access__question_set=instance.question_set,
-                complete=True
-            )
-
-            if latest_question_set_answers:
-
-                latest_question_set_answer = latest_question_set_answers.latest("start_date")
-                answers_list = Answer.objects.filter(
-                    question=instance,
-                    question_set_answer=latest_question_set_answer
-                )
-
-                total_answers += answers_list.count()
-                total_correct_answers += answers_list.filter(
-                    valid=True
-                ).count()
+        # Learning objectives are shared by many questions, serialize each of them once
+        if not hasattr(self, '_learning_objectives'):
+            self._learning_objectives = {}
+        learning_objective_id = instance.question_set.learning_objective_id
+        if learning_objective_id not in self._learning_objectives:
+            serializer = LearningObjectiveSerializer(instance.question_set.learning_objective)
+            self._learning_objectives[learning_objective_id] = serializer.data
+        return self._learning_objectives[learning_objective_id]
 
-        correct_answers_percentage = None
+    def get_correct_answers_percentage_first(self, instance):
+        return self.__get_table_metrics(instance)['correct_answers_percentage_first']
 
-        if total_answers:
-            correct_answers_percentage = round(
-                (100 * total_correct_answers / total_answers), 2)
-
-        return correct_answers_percentage
+    def get_correct_answers_percentage_last(self, instance):
+        return self.__get_table_metrics(instance)['correct_answers_percentage_last']
 
     def get_grade(self, instance):
-        return Assessment.objects.get(id=instance.question_set.assessment.id).grade
+        return instance.question_set.assessment.grade
 
     def get_subject(self, instance):
-        return Assessment.objects.get(id=instance.question_set.assessment.id).subject
-
-    def get_topic(self, instance):
-        topic = Assessment.objects.get(id=instance.question_set.assessment.id).topic
-        serializer = TopicSerializer(topic)
-        return serializer.data
+        return instance.question_set.assessment.subject
 
     def get_speeds(self, instance):
-        speeds = {}
-        answers = Answer.objects.filter(question=instance)
-        if answers:
-            durations = answers.annotate(
-                durations = ExpressionWrapper(F('end_datetime') - F('start_datetime'), output_field=fields.DurationField()))
-            speeds['slowest'] = round(durations.aggregate(Max('durations'))['durations__max'].total_seconds(), 3) * 1000
-            speeds['fastest'] = round(durations.aggregate(Min('durations'))['durations__min'].total_seconds(), 3) * 1000
-            speeds['average'] = round(durations.aggregate(Avg('durations'))['durations__avg'].total_seconds(), 3) * 1000
-        return speeds
+        return self.__get_table_metrics(instance)['speeds']
 
     def get_topic(self, instance):
         return instance.question_set.name
 
     def get_plays(self, instance):
-        return self.__get_all_answers(instance).count()
+        return self.__get_table_metrics(instance)['plays']
 
     def get_invites(self, instance):
-        return QuestionSetAccess.objects.filter(question_set=instance.question_set).count()
+        return self.__get_table_metrics(instance)['invites']
 
     def get_score(self, instance):
-        correct_answers_percentage = 0
-        all_answers = self.__get_all_answers(instance)
-        if not all_answers:
-            return None
-
-        total_answers = all_answers.count()
-        total_correct_answers = all_answers.filter(valid=True).exclude(question__question_type='SEL').count()
-        total_wrong_answers = 0
-        if total_correct_answers == 0:
-            total_wrong_answers = all_answers.filter(valid=False ).exclude(question__question_type='SEL').count()
-
-        if total_correct_answers != 0:
-            correct_answers_percentage = round((total_correct_answers / total_answers) * 100, 1)
-        elif total_wrong_answers != 0:
-            correct_answers_percentage = 0
-
-        return min(correct_answers_percentage, 100.0)
+        return self.__get_table_metrics(instance)['score']
 
 class QuestionDetailsTableSerializer(PolymorphicSerializer):
 
@@ -1106,10 +955,6 @@ class AnswerTableSerializer(PolymorphicSerializer):
             'AnswerCustomizedDragAndDrop': AnswerCustomizedDragAndDropTableSerializer
         }
 
-    def to_representation(self, obj):
-        sub_obj = Answer.objects.get_subclass(id=obj.id)
-        return super().to_representation(sub_obj)
-
 
 class AbstractAnswerTableSerializer(serializers.ModelSerializer):
 
@@ -1237,73 +1082,47 @@ class ScoreByQuestionSetSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'full_name', 'question_sets', 'student_access', 'group')
+        list_serializer_class = TableMetricsListSerializer
+
+    def prefetch_table_metrics(self, students):
+        """
+        Compute the scores of the given students in a fixed number of queries
+        """
+        if not hasattr(self, '_table_metrics'):
+            self._table_metrics = {}
+        missing_students = [student.id for student in students if student.id not in self._table_metrics]
+        if not missing_students:
+            return
+        matrix = get_score_matrix(self.context['assessment_pk'], User.objects.filter(id__in=missing_students))
+        for student_id, scores, student_access in zip(matrix['students'], matrix['scores'], matrix['student_access']):
+            self._table_metrics[student_id] = {
+                'question_sets': [
+                    {question_set['name']: score} for question_set, score in zip(matrix['question_sets'], scores)
+                ],
+                'student_access': student_access
+            }
+
+    def __get_table_metrics(self, instance):
+        self.prefetch_table_metrics([instance])
+        return self._table_metrics[instance.id]
 
     def get_group(self, instance):
-        group = Group.objects.filter(student_group=instance)
-        serializer = GroupSerializer(group, many = True)
-        return serializer.data
+        # Groups are shared by many students, serialize each of them once
+        if not hasattr(self, '_groups'):
+            self._groups = {}
+        if instance.group_id not in self._groups:
+            self._groups[instance.group_id] = GroupSerializer(
+                [instance.group] if instance.group_id else [], many=True).data
+        return self._groups[instance.group_id]
 
     def get_full_name(self, instance):
         return (instance.first_name + ' ' + instance.last_name)
 
     def get_student_access(self, instance):
-        assessment_pk = self.context['assessment_pk']
-
-        question_sets = QuestionSet.objects.filter(assessment=assessment_pk)
-        for access in QuestionSetAccess.objects.filter(student=instance, question_set__in=question_sets):
-            if QuestionSetAnswer.objects.filter(question_set_access=access, session__student=instance, complete=True):
-                return True
-        return False
+        return self.__get_table_metrics(instance)['student_access']
 
     def get_question_sets(self, instance):
-        assessment_pk = self.context['assessment_pk']
-        question_set_score = []
-
-        for question_set in QuestionSet.objects.filter(assessment=assessment_pk):
-
-            if question_set.evaluated:
-                total_answers = Question.objects.filter(question_set=question_set).exclude(question_type='SEL').count()
-                access = QuestionSetAccess.objects.filter(question_set=question_set, student=instance)
-
-                if access:
-                    if QuestionSetAnswer.objects.filter(question_set_access=access.first(), complete=True):
-                        earliest_question_set_answer = QuestionSetAnswer.objects.filter(
-                            question_set_access=access.first(),
-                            complete=True
-                        ).earliest('start_date')
-
-                        total_correct_answers = Answer.objects.filter(
-                            question_set_answer=earliest_question_set_answer,
-                            valid=True
-                        ).exclude(question__question_type='SEL').count()
-
-                        correct_answers_percentage = 0
-
-                        if (total_answers != 0):
-                            correct_answers_percentage = round((total_correct_answers / total_answers) * 100, 1)
-
-                        question_set_score_dict = {
-                            question_set.name: correct_answers_percentage
-                        }
-                        question_set_score.append(question_set_score_dict)
-                    else:
-                        question_set_score_dict = {
-                            question_set.name: 'not_started'
-                        }
-                        question_set_score.append(question_set_score_dict)
-
-                else:
-                    question_set_score_dict = {
-                        question_set.name: None
-                    }
-                    question_set_score.append(question_set_score_dict)
-            else:
-                question_set_score_dict = {
-                    question_set.name: 'not_evaluated'
-                }
-                question_set_score.append(question_set_score_dict)
-
-        return question_set_score
+        return self.__get_table_metrics(instance)['question_sets']
 
 
 class QuestionSetLisForDashboardSerializer(serializers.ModelSerializer):
@@ -1543,6 +1362,32 @@ class GroupTableSerializer(serializers.ModelSerializer):
     class Meta:
         model = Group
         fields = '__all__'
+        list_serializer_class = TableMetricsListSerializer
+
+    def prefetch_table_metrics(self, groups):
+        """
+        Compute the speeds of the given groups in a fixed number of queries.
+        The speed of a group is the average of the mean speeds of its students.
+        """
+        if not hasattr(self, '_table_metrics'):
+            self._table_metrics = {}
+        missing_groups = [group.id for group in groups if group.id not in self._table_metrics]
+        students_groups = dict(User.objects.filter(group__in=missing_groups).values_list('id', 'group'))
+        students_speeds = get_speed_statistics('student', list(students_groups))
+
+        groups_means = {group_id: [] for group_id in missing_groups}
+        for student_id, statistics in students_speeds.items():
+            groups_means[students_groups[student_id]].append(statistics['mean'])
+        self._table_metrics.update({
+            group_id: {
+                'speed': datetime.timedelta(milliseconds=sum(means) / len(means)) if means else None
+            }
+            for group_id, means in groups_means.items()
+        })
+
+    def __get_table_metrics(self, instance):
+        self.prefetch_table_metrics([instance])
+        return self._table_metrics[instance.id]
 
     def __get_question_sets(self, instance):
         if (not hasattr(self, 'get_question_sets')) or (hasattr(self, 'instance_name') and self.instance_name!=instance.name):
@@ -1597,66 +1442,29 @@ class GroupTableSerializer(serializers.ModelSerializer):
         else:
             return None
 
-    # to investigate
     def get_group_average(self, instance):
-        start_time = time.perf_counter()
-        students = User.objects.filter(group=instance)
-        score_list = []
-        for student in students:
-            assessments = list(Assessment.objects.filter(
-                questionset__questionsetaccess__student=student
-            ).distinct().values_list('id', flat=True))
-            for assessment in assessments:
-                assessment_result = calculate_student_score(assessment, student.id)
-                if assessment_result and assessment_result > 0:
-                    score_list.append(assessment_result)
+        score_list = [score for score in get_students_scores(QuestionSetScoreSummary.objects.filter(
+            student__group=instance
+        )).values() if score > 0]
         if len(score_list):
-            end_time = time.perf_counter()
-            execution_time = end_time - start_time
-            print(f"The execution time of get_group_average is: {execution_time}")
             return sum(score_list) / len(score_list)
         return None
 
     def get_grade_average(self, instance):
-        start_time = time.perf_counter()
         student_grades = [grade for grade in User.objects.filter(group=instance).values_list('grade', flat=True).distinct()]
         if len(student_grades) and student_grades.count(student_grades[0]) == len(student_grades):
             grade = student_grades[0]
-            students = User.objects.filter(grade=grade)
-            score_list = []
-            for student in students:
-                assessments = list(Assessment.objects.filter(
-                    grade=grade,
-                    questionset__questionsetaccess__student=student
-                ).distinct().values_list('id', flat=True))
-                for assessment in assessments:
-                    assessment_result = calculate_student_score(assessment, student.id)
-                    if assessment_result and assessment_result > 0:
-                        score_list.append(assessment_result)
+            score_list = [score for score in get_students_scores(QuestionSetScoreSummary.objects.filter(
+                student__grade=grade,
+                question_set__assessment__grade=grade
+            )).values() if score > 0]
             if len(score_list) > 0:
-                end_time = time.perf_counter()
-                execution_time = end_time - start_time
-                print(f"The execution time of get_grade_average is: {execution_time}")
                 return sum(score_list) / len(score_list)
         return None
 
 
     def get_speed(self, instance):
-        students = User.objects.filter(group=instance)
-        students_average = []
-        # get the average speed of each student
-        for student in students:
-            student_answers = Answer.objects.filter(question_set_answer__session__student=student)
-            if student_answers:
-                student_result = student_answers.annotate(
-                    durations = ExpressionWrapper(F('end_datetime') - F('start_datetime'), output_field=fields.DurationField()),
-                ).aggregate(Avg('durations'))['durations__avg']
-                students_average.append(student_result)
-
-        if len(students_average) > 0:
-            return sum(students_average, datetime.timedelta()) / len(students_average)
-        else:
-            return None
+        return self.__get_table_metrics(instance)['speed']
 
     def get_honey(self, instance):
         students = User.objects.filter(group=instance)
@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from answers.models import ANSWER_TYPE_MODELS, Answer, QuestionSetAnswer
+from assessments.models import (AreaOption, Assessment, Attachment, DominoOption, DraggableOption, Hint, LearningObjective,
+                                Question, QuestionSet, QuestionSetAccess, SelectOption, SortOption)
+from users.models import Group, User
+from .cache import CONTENT_DATA_VERSION, bump_data_versions, bump_students_data_versions
+
+
+def invalidate_answer_dashboards(sender, instance=None, **kwargs):
+    """
+    Invalidate the cached dashboards of the supervisor of the student when an answer is changed.
+    """
+    if instance.question_set_answer_id:
+        bump_students_data_versions(questionsetaccess__question_set_answers=instance.question_set_answer_id)
+
+
+for answer_model in (Answer, *ANSWER_TYPE_MODELS.values()):
+    post_save.connect(invalidate_answer_dashboards, sender=answer_model)
+    post_delete.connect(invalidate_answer_dashboards, sender=answer_model)
+
+
+@receiver(post_save, sender=QuestionSetAnswer)
+@receiver(post_delete, sender=QuestionSetAnswer)
+def invalidate_question_set_answer_dashboards(sender, instance=None, **kwargs):
+    """
+    Invalidate the cached dashboards of the supervisor of the student when a question_set answer is changed.
+    """
+    if instance.question_set_access_id:
+        bump_students_data_versions(questionsetaccess=instance.question_set_access_id)
+
+
+@receiver(post_save, sender=QuestionSetAccess)
+@receiver(post_delete, sender=QuestionSetAccess)
+def invalidate_question_set_access_dashboards(sender, instance=None, **kwargs):
+    """
+    Invalidate the cached dashboards of the supervisor of the student when an access is changed.
+    """
+    bump_students_data_versions(id=instance.student_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_dashboards(sender, instance=None, **kwargs):
+    """
+    Invalidate the cached dashboards of the user and of its supervisor when the user is changed.
+    """
+    bump_data_versions([instance.id, instance.created_by_id])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_dashboards(sender, instance=None, **kwargs):
+    """
+    Invalidate the cached dashboards of the supervisor of the group when the group is changed.
+    """
+    bump_data_versions([instance.supervisor_id])
+
+
+def invalidate_all_dashboards(sender, instance=None, **kwargs):
+    """
+    Invalidate the cached dashboards of all the supervisors when the assessments content is changed.
+    """
+    bump_data_versions([CONTENT_DATA_VERSION])
+
+
+for content_model in (
+    Assessment, QuestionSet, Question, *Question.__subclasses__(), Hint, Attachment, LearningObjective,
+    AreaOption, DraggableOption, SelectOption, DominoOption, SortOption
+):
+    post_save.connect(invalidate_all_dashboards, sender=content_model)
+    post_delete.connect(invalidate_all_dashboards, sender=content_model)
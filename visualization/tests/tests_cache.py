@@ -0,0 +1,112 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from users.models import User
+from visualization.cache import bump_data_versions, get_data_versions
+
+
+class DashboardCacheTests(APITestCase):
+    """
+    Dashboard responses cache and conditional requests tests, from a supervisor account.
+    """
+    fixtures = ['languages_countries.json', 'users.json']
+
+    def setUp(self):
+        """
+        Set up authentication, with an empty cache.
+        """
+        cache.clear()
+        token = Token.objects.get(user__username='supervisor')  # id: 4
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.url = reverse('students-visualization-list')
+
+    def test_etag(self):
+        """
+        Ensure that the dashboard responses have an ETag.
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_not_modified(self):
+        """
+        Ensure that a request with a matching If-None-Match (strong or weak) gets a 304 with the ETag.
+        """
+        etag = self.client.get(self.url, format='json')['ETag']
+        for if_none_match in (etag, 'W/' + etag, '"other", ' + etag, '*'):
+            response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified(self):
+        """
+        Ensure that a request with the previous ETag gets a 200 with a new ETag once the data versions are bumped.
+        """
+        etag = self.client.get(self.url, format='json')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(id=1).save()
+        response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def get_first_names(self):
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, 200)
+        return {student['id']: student['first_name'] for student in response.data}
+
+    def test_cache_hit(self):
+        """
+        Ensure that a response is served from the cache as long as the data versions are not bumped.
+        """
+        self.assertEqual(self.get_first_names()[1], 'Harry')
+        # The update does not send the users signals, the data versions are not bumped
+        User.objects.filter(id=1).update(first_name='Updated')
+        self.assertEqual(self.get_first_names()[1], 'Harry')
+
+    def test_cache_bump_on_commit(self):
+        """
+        Ensure that the data versions are bumped on commit, invalidating the cached responses.
+        """
+        self.assertEqual(self.get_first_names()[1], 'Harry')
+        User.objects.filter(id=1).update(first_name='Updated')
+        versions = get_data_versions(4)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_versions([4])
+            # Not bumped before the commit
+            self.assertEqual(get_data_versions(4), versions)
+        self.assertNotEqual(get_data_versions(4), versions)
+        self.assertEqual(self.get_first_names()[1], 'Updated')
+
+    def test_cache_no_bump_on_rollback(self):
+        """
+        Ensure that the data versions are not bumped when the transaction is rolled back.
+        """
+        self.assertEqual(self.get_first_names()[1], 'Harry')
+        versions = get_data_versions(4)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    User.objects.filter(id=1).update(first_name='Updated')
+                    bump_data_versions([4])
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_data_versions(4), versions)
+        self.assertEqual(self.get_first_names()[1], 'Harry')
+
+    @override_settings(DASHBOARD_CACHE_MAX_ENTRY_SIZE=16)
+    def test_cache_max_entry_size(self):
+        """
+        Ensure that the responses larger than the maximum entry size are not cached (but still have an ETag).
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertIn('ETag', response)
+        User.objects.filter(id=1).update(first_name='Updated')
+        self.assertEqual(self.get_first_names()[1], 'Updated')
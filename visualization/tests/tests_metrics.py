@@ -0,0 +1,285 @@
+import datetime
+
+from answers.models import ANSWER_TYPE_MODELS, Answer, AnswerSession, QuestionSetAnswer
+from assessments.models import Assessment, Question, QuestionInput, QuestionSEL, QuestionSet, QuestionSetAccess
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from users.models import User
+from visualization.utils import (append_answer_facts, calculate_student_score, get_assessment_table_metrics,
+                                 get_first_last_attempts_answers_count, get_question_table_metrics, get_score_matrix)
+
+
+class DashboardMetricsTests(APITestCase):
+    """
+    Dashboard metrics tests, against values computed by hand on a small set of answers
+    to the question_set 3 (questions 1 and 2 evaluated, and a SEL question).
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up authentication, with an empty cache and a SEL question in the question_set 3.
+        """
+        cache.clear()
+        token = Token.objects.get(user__username='supervisor')  # id: 4
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.sel_question = QuestionSEL.objects.create(
+            question_set_id=3, order=3, question_type='SEL', sel_type=QuestionSEL.SELType.READ
+        )
+
+    def create_attempt(self, student_id, valid, statement=None, question_set_id=3, start_date=None,
+                       complete=True, access_dates=None):
+        """
+        Create a question_set answer of the student (with its own session and the access if needed),
+        with one answer per evaluated question (with the given validities, by question id) and
+        the given SEL statement, with its score summary and answer facts.
+        """
+        today = datetime.date.today()
+        start, end = access_dates or (today, today)
+        access, _ = QuestionSetAccess.objects.get_or_create(
+            student_id=student_id, question_set_id=question_set_id,
+            defaults={'start_date': start, 'end_date': end}
+        )
+        session = AnswerSession.objects.create(student_id=student_id)
+        question_set_answer = QuestionSetAnswer.objects.create(
+            question_set_access=access, session=session, start_date=start_date or timezone.now()
+        )
+        questions = Question.objects.filter(question_set=question_set_id).exclude(question_type='SEL').order_by('id')
+        answers = []
+        for question, question_valid in zip(questions, valid):
+            answer = ANSWER_TYPE_MODELS[question.question_type].objects.create(
+                question_set_answer=question_set_answer, question=question, valid=question_valid
+            )
+            # The answers are scored on save
+            Answer.objects.filter(id=answer.id).update(valid=question_valid)
+            answers.append(answer)
+        if statement:
+            answers.append(ANSWER_TYPE_MODELS['SEL'].objects.create(
+                question_set_answer=question_set_answer, question=self.sel_question, valid=True, statement=statement
+            ))
+        question_set_answer.complete = complete
+        question_set_answer.save()
+        append_answer_facts([answer.id for answer in answers])
+        return question_set_answer
+
+    def set_up_assessment_answers(self):
+        """
+        Student 1: one attempt (1 correct answer of 2, A_LOT), with a current access.
+        Student 3: one attempt (no correct answer, NOT_REALLY), with an expired access.
+        """
+        self.create_attempt(1, [True, False], 'A_LOT')
+        self.create_attempt(
+            3, [False, False], 'NOT_REALLY', access_dates=(datetime.date(2020, 1, 1), datetime.date(2020, 12, 31))
+        )
+
+    def test_assessment_table_metrics(self):
+        """
+        Ensure that the assessment table metrics match the values computed by hand.
+        """
+        self.set_up_assessment_answers()
+        metrics = get_assessment_table_metrics(Assessment.objects.filter(id__in=[2, 3]).order_by('id'))
+
+        self.assertEqual(metrics[2]['question_sets_count'], 1)
+        self.assertEqual(metrics[2]['invites'], 2)
+        self.assertEqual(metrics[2]['students_count'], 1)
+        self.assertEqual(metrics[2]['plays'], 2)
+        # 1 correct answer over all the attempts, for 2 evaluated questions
+        self.assertEqual(metrics[2]['score'], 50.0)
+        question_set = metrics[2]['question_sets'][0]
+        self.assertEqual(question_set['id'], 3)
+        self.assertEqual(question_set['title'], 'Reading comprehension')
+        self.assertEqual(question_set['questionsCount'], 2)
+        self.assertEqual(question_set['score'], 50.0)
+        # Average of A_LOT (2) and NOT_REALLY (0)
+        self.assertEqual(question_set['sel_average'], 'A_LITTLE')
+
+        self.assertEqual(metrics[3], {
+            'question_sets_count': 0,
+            'question_sets': [],
+            'students_count': 0,
+            'invites': 0,
+            'plays': 0,
+            'score': None
+        })
+
+    def test_assessment_table_metrics_no_answers(self):
+        """
+        Ensure that the question_sets without answers have no score nor SEL average.
+        """
+        metrics = get_assessment_table_metrics(Assessment.objects.filter(id=2))[2]
+        self.assertEqual(metrics['plays'], 0)
+        self.assertIsNone(metrics['score'])
+        self.assertIsNone(metrics['question_sets'][0]['score'])
+        self.assertIsNone(metrics['question_sets'][0]['sel_average'])
+
+    def test_assessments_table(self):
+        """
+        Ensure that the assessments table serializes the same metrics, for the list and the details.
+        """
+        self.set_up_assessment_answers()
+        response = self.client.get(reverse('assessments-visualization-list'), format='json')
+        self.assertEqual(response.status_code, 200)
+        assessments = {assessment['id']: assessment for assessment in response.data}
+        self.assertEqual(set(assessments), {2, 3})
+
+        response = self.client.get(reverse('assessments-visualization-detail', args=[2]), format='json')
+        self.assertEqual(response.status_code, 200)
+        for assessment in (assessments[2], response.data):
+            self.assertEqual(assessment['question_sets_count'], 1)
+            self.assertEqual(assessment['invites'], 2)
+            self.assertEqual(assessment['students_count'], 1)
+            self.assertEqual(assessment['plays'], 2)
+            self.assertEqual(assessment['score'], 50.0)
+            self.assertEqual(assessment['question_sets'][0]['score'], 50.0)
+            self.assertEqual(assessment['question_sets'][0]['sel_average'], 'A_LITTLE')
+        self.assertTrue(assessments[2]['can_edit'])
+        self.assertFalse(assessments[3]['can_edit'])
+        self.assertIsNone(assessments[3]['score'])
+
+    def set_up_attempts(self):
+        """
+        Student 1: first complete attempt (1 correct answer of 2), last complete attempt (2 of 2),
+        and a later incomplete attempt (0 of 2).
+        Student 3: two complete attempts started at the same time (0 of 2, then 1 of 2),
+        the first and the last ones are picked by id.
+        Student 2 (of another supervisor): a single complete attempt (2 of 2).
+        """
+        start_date = timezone.make_aware(datetime.datetime(2024, 1, 1, 10))
+        self.create_attempt(1, [True, False], start_date=start_date)
+        self.create_attempt(1, [True, True], start_date=start_date + datetime.timedelta(days=1))
+        self.create_attempt(1, [False, False], start_date=start_date + datetime.timedelta(days=2), complete=False)
+        self.create_attempt(3, [False, False], start_date=start_date)
+        self.create_attempt(3, [True, False], start_date=start_date)
+        self.create_attempt(2, [True, True], start_date=start_date)
+
+    def test_first_last_attempts_answers_count(self):
+        """
+        Ensure that the answers of the first and last complete attempts are counted per question,
+        with ties broken by id and single attempts counted as both.
+        """
+        self.set_up_attempts()
+        counts = get_first_last_attempts_answers_count([1, 2, self.sel_question.id])
+        self.assertEqual(counts, {
+            1: {'first_total': 3, 'first_correct': 2, 'last_total': 3, 'last_correct': 3},
+            2: {'first_total': 3, 'first_correct': 1, 'last_total': 3, 'last_correct': 2}
+        })
+
+        counts = get_first_last_attempts_answers_count([1, 2], User.objects.filter(id__in=[1, 3]))
+        self.assertEqual(counts, {
+            1: {'first_total': 2, 'first_correct': 1, 'last_total': 2, 'last_correct': 2},
+            2: {'first_total': 2, 'first_correct': 0, 'last_total': 2, 'last_correct': 1}
+        })
+        self.assertEqual(get_first_last_attempts_answers_count([]), {})
+
+    def test_question_table_metrics(self):
+        """
+        Ensure that the question table metrics match the values computed by hand.
+        """
+        self.set_up_attempts()
+        metrics = get_question_table_metrics(Question.objects.filter(question_set=3))
+
+        self.assertEqual(metrics[1]['plays'], 6)
+        self.assertEqual(metrics[1]['invites'], 3)
+        self.assertEqual(metrics[1]['score'], 66.7)
+        self.assertEqual(metrics[1]['correct_answers_percentage_first'], 66.67)
+        self.assertEqual(metrics[1]['correct_answers_percentage_last'], 100.0)
+        self.assertEqual(metrics[2]['score'], 33.3)
+        self.assertEqual(metrics[2]['correct_answers_percentage_first'], 33.33)
+        self.assertEqual(metrics[2]['correct_answers_percentage_last'], 66.67)
+        # Without any answer
+        self.assertEqual(metrics[self.sel_question.id]['plays'], 0)
+        self.assertIsNone(metrics[self.sel_question.id]['correct_answers_percentage_first'])
+        self.assertIsNone(metrics[self.sel_question.id]['correct_answers_percentage_last'])
+
+    def test_questions_table(self):
+        """
+        Ensure that the first and last attempts percentages of the questions table only take
+        the students of the supervisor into account.
+        """
+        self.set_up_attempts()
+        url = reverse('question-visualization-list', kwargs={'assessment_pk': 2, 'question_set_pk': 3})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, 200)
+        questions = {question['id']: question for question in response.data}
+        self.assertEqual(questions[1]['correct_answers_percentage_first'], 50.0)
+        self.assertEqual(questions[1]['correct_answers_percentage_last'], 100.0)
+        self.assertEqual(questions[2]['correct_answers_percentage_first'], 0.0)
+        self.assertEqual(questions[2]['correct_answers_percentage_last'], 50.0)
+
+    def set_up_score_matrix(self):
+        """
+        The attempts of set_up_attempts, with two more question_sets in the assessment 2:
+        an evaluated one only started by the student 1, and a not evaluated one.
+        """
+        self.set_up_attempts()
+        self.started_question_set = QuestionSet.objects.create(assessment_id=2, name='Started')
+        QuestionInput.objects.create(
+            question_set=self.started_question_set, order=1, question_type='INPUT', valid_answer='42'
+        )
+        self.create_attempt(1, [True], question_set_id=self.started_question_set.id, complete=False)
+        self.not_evaluated_question_set = QuestionSet.objects.create(
+            assessment_id=2, name='Not evaluated', evaluated=False
+        )
+
+    def test_score_matrix(self):
+        """
+        Ensure that the score matrix is computed from the first complete attempt of each student
+        (ties broken by id), with the not started, not evaluated and no access cells.
+        """
+        self.set_up_score_matrix()
+        matrix = get_score_matrix(2, User.objects.filter(id__in=[1, 2, 3]).order_by('id'))
+
+        self.assertEqual(matrix['students'], [1, 2, 3])
+        self.assertEqual(matrix['question_sets'], [
+            {'id': 3, 'name': 'Reading comprehension', 'evaluated': True},
+            {'id': self.started_question_set.id, 'name': 'Started', 'evaluated': True},
+            {'id': self.not_evaluated_question_set.id, 'name': 'Not evaluated', 'evaluated': False}
+        ])
+        self.assertEqual(matrix['scores'], [
+            [50.0, 'not_started', 'not_evaluated'],
+            [100.0, None, 'not_evaluated'],
+            [0.0, None, 'not_evaluated']
+        ])
+        self.assertEqual(matrix['student_access'], [True, True, True])
+
+        matrix = get_score_matrix(1, User.objects.filter(id__in=[1, 3]).order_by('id'))
+        self.assertEqual(matrix['scores'], [[None, None], [None, None]])
+        self.assertEqual(matrix['student_access'], [False, False])
+
+    def test_student_score(self):
+        """
+        Ensure that the score of a student is the ratio of correct answers in their first complete attempts.
+        """
+        self.set_up_score_matrix()
+        self.assertEqual(calculate_student_score(2, 1), 0.5)
+        self.assertEqual(calculate_student_score(2, 2), 1.0)
+        self.assertEqual(calculate_student_score(2, 3), 0.0)
+        self.assertIsNone(calculate_student_score(1, 1))
+
+    def test_score_by_question_set(self):
+        """
+        Ensure that the score by question_set list and matrix of the supervisor students match the score matrix.
+        """
+        self.set_up_score_matrix()
+        response = self.client.get(reverse('score-by-question-set-list', kwargs={'assessment_pk': 2}), format='json')
+        self.assertEqual(response.status_code, 200)
+        students = {student['id']: student for student in response.data}
+        self.assertEqual(set(students), {1, 3})
+        self.assertEqual(students[1]['question_sets'], [
+            {'Reading comprehension': 50.0}, {'Started': 'not_started'}, {'Not evaluated': 'not_evaluated'}
+        ])
+        self.assertTrue(students[1]['student_access'])
+        self.assertEqual(students[3]['question_sets'], [
+            {'Reading comprehension': 0.0}, {'Started': None}, {'Not evaluated': 'not_evaluated'}
+        ])
+
+        response = self.client.get(reverse('score-by-question-set-matrix', kwargs={'assessment_pk': 2}), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['students'], [1, 3])
+        self.assertEqual(response.data['scores'], [
+            [50.0, 'not_started', 'not_evaluated'],
+            [0.0, None, 'not_evaluated']
+        ])
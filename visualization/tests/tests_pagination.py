@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from users.models import User
+
+
+class CursorPaginationTests(APITestCase):
+    """
+    Opt-in cursor pagination tests, on the students table of a supervisor account.
+    """
+    fixtures = ['languages_countries.json', 'users.json']
+
+    def setUp(self):
+        """
+        Set up authentication with an empty cache, and 5 more students of the supervisor (7 in all).
+        """
+        cache.clear()
+        token = Token.objects.get(user__username='supervisor')  # id: 4
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.url = reverse('students-visualization-list')
+        for index in range(5):
+            self.create_student(f'student-{index}')
+        self.student_ids = sorted(User.objects.filter(
+            created_by=4, role=User.UserRole.STUDENT
+        ).values_list('id', flat=True))
+
+    def create_student(self, username):
+        return User.objects.create(
+            username=username, role=User.UserRole.STUDENT, created_by_id=4, language_id='ARA', country_id='JOR'
+        )
+
+    def get_pages(self, url):
+        """
+        Follow the next cursors from the url, returns the ids of each page
+        """
+        pages = []
+        while url:
+            response = self.client.get(url, format='json')
+            self.assertEqual(response.status_code, 200)
+            pages.append([student['id'] for student in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_not_paginated(self):
+        """
+        Ensure that the list is not paginated without cursor nor page_size.
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([student['id'] for student in response.data], self.student_ids)
+
+    def test_page_size(self):
+        """
+        Ensure that the pages have the requested size, and the default size without page_size.
+        """
+        response = self.client.get(self.url, {'page_size': 3}, format='json')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(self.url, {'cursor': ''}, format='json')
+        self.assertEqual([student['id'] for student in response.data['results']], self.student_ids)
+        self.assertIsNone(response.data['next'])
+
+    def test_next_cursors(self):
+        """
+        Ensure that following the next cursors returns every row exactly once, ordered by id.
+        """
+        pages = self.get_pages(f'{self.url}?page_size=3')
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([student_id for page in pages for student_id in page], self.student_ids)
+
+    def test_next_cursors_stable(self):
+        """
+        Ensure that the rows created while paging are returned after the existing ones,
+        without returning any row twice.
+        """
+        response = self.client.get(self.url, {'page_size': 3}, format='json')
+        first_page = [student['id'] for student in response.data['results']]
+        student = self.create_student('student-new')
+
+        pages = [first_page, *self.get_pages(response.data['next'])]
+        student_ids = [student_id for page in pages for student_id in page]
+        self.assertEqual(student_ids, [*self.student_ids, student.id])
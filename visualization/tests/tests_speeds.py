@@ -0,0 +1,163 @@
+import datetime
+
+from answers.models import ANSWER_TYPE_MODELS, AnswerSession, QuestionSetAnswer
+from assessments.models import Question, QuestionSEL, QuestionSetAccess
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from users.models import Group, User
+from visualization.utils import append_answer_facts, compute_percentile, compute_speed_statistics, get_speed_statistics
+
+
+class PercentileTests(SimpleTestCase):
+    """
+    Percentile and speed statistics computation tests (Python fallback of the database aggregates).
+    """
+
+    def test_percentile_empty(self):
+        """
+        Ensure that the percentile of no values is None.
+        """
+        self.assertIsNone(compute_percentile([], 0.5))
+
+    def test_percentile_one_value(self):
+        """
+        Ensure that every percentile of a single value is this value.
+        """
+        for fraction in (0, 0.5, 0.9, 1):
+            self.assertEqual(compute_percentile([42], fraction), 42)
+
+    def test_percentile_even_count(self):
+        """
+        Ensure that the percentiles are interpolated between the two nearest values, as percentile_cont.
+        """
+        values = [1, 2, 3, 4]
+        self.assertEqual(compute_percentile(values, 0), 1)
+        self.assertEqual(compute_percentile(values, 0.5), 2.5)
+        self.assertAlmostEqual(compute_percentile(values, 0.9), 3.7)
+        self.assertEqual(compute_percentile(values, 1), 4)
+
+    def test_speed_statistics(self):
+        """
+        Ensure that the speed statistics are computed from the unsorted durations.
+        """
+        self.assertEqual(compute_speed_statistics([5000, 1000, 3000]), {
+            'count': 3, 'mean': 3000, 'median': 3000, 'p90': 4600, 'fastest': 1000, 'slowest': 5000
+        })
+
+
+class SpeedStatisticsTests(APITestCase):
+    """
+    Speed statistics tests, against values computed by hand on answers of the students 1 and 3
+    (of a same group) to the question_set 3, with a SEL question.
+    """
+    fixtures = ['languages_countries.json', 'users.json', 'assessments-test.json']
+
+    def setUp(self):
+        """
+        Set up authentication with an empty cache, and the answers durations (in milliseconds):
+        student 1: 1000 (question 1), 3000 (question 2) and 5000 (SEL question),
+        student 3: 2000 and 6000 in a first attempt, 8000 and 8000 in a second one.
+        """
+        cache.clear()
+        token = Token.objects.get(user__username='supervisor')  # id: 4
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.group = Group.objects.create(name='Group', supervisor_id=4)
+        User.objects.filter(id__in=[1, 3]).update(group=self.group)
+
+        sel_question = QuestionSEL.objects.create(
+            question_set_id=3, order=3, question_type='SEL', sel_type=QuestionSEL.SELType.READ
+        )
+        self.create_answers(1, {1: 1000, 2: 3000, sel_question.id: 5000})
+        self.create_answers(3, {1: 2000, 2: 6000})
+        self.create_answers(3, {1: 8000, 2: 8000})
+
+    def create_answers(self, student_id, durations):
+        """
+        Create a complete question_set answer of the student, with the answers durations by question id
+        """
+        access, _ = QuestionSetAccess.objects.get_or_create(
+            student_id=student_id, question_set_id=3,
+            defaults={'start_date': datetime.date.today(), 'end_date': datetime.date.today()}
+        )
+        session = AnswerSession.objects.create(student_id=student_id)
+        question_set_answer = QuestionSetAnswer.objects.create(
+            question_set_access=access, session=session, complete=True
+        )
+        start_datetime = timezone.now()
+        answers = [
+            ANSWER_TYPE_MODELS[question.question_type].objects.create(
+                question_set_answer=question_set_answer, question=question, valid=False,
+                start_datetime=start_datetime,
+                end_datetime=start_datetime + datetime.timedelta(milliseconds=durations[question.id]),
+                **({'statement': 'A_LOT'} if question.question_type == 'SEL' else {})
+            )
+            for question in Question.objects.filter(id__in=durations)
+        ]
+        append_answer_facts(answers)
+
+    def assertStatisticsEqual(self, statistics, expected):
+        self.assertEqual(set(statistics), set(expected))
+        for key, value in expected.items():
+            self.assertAlmostEqual(statistics[key], value, places=3, msg=key)
+
+    def test_speed_statistics(self):
+        """
+        Ensure that the speed statistics of each dimension match the values computed by hand.
+        """
+        speeds = get_speed_statistics('student', [1, 3])
+        self.assertStatisticsEqual(speeds[1], {
+            'count': 3, 'mean': 3000, 'median': 3000, 'p90': 4600, 'fastest': 1000, 'slowest': 5000
+        })
+        self.assertStatisticsEqual(speeds[3], {
+            'count': 4, 'mean': 6000, 'median': 7000, 'p90': 8000, 'fastest': 2000, 'slowest': 8000
+        })
+        self.assertStatisticsEqual(get_speed_statistics('student', [1], evaluated_only=True)[1], {
+            'count': 2, 'mean': 2000, 'median': 2000, 'p90': 2800, 'fastest': 1000, 'slowest': 3000
+        })
+        self.assertStatisticsEqual(get_speed_statistics('question', [1])[1], {
+            'count': 3, 'mean': 11000 / 3, 'median': 2000, 'p90': 6800, 'fastest': 1000, 'slowest': 8000
+        })
+        # Over all the answers of the group and of the assessment
+        self.assertAlmostEqual(get_speed_statistics('group', [self.group.id])[self.group.id]['mean'], 33000 / 7)
+        self.assertAlmostEqual(get_speed_statistics('assessment', [2])[2]['mean'], 33000 / 7)
+        self.assertEqual(get_speed_statistics('student', [2]), {})
+
+    def test_speed_statistics_fallback(self):
+        """
+        Ensure that the database statistics match the Python computation from the same durations.
+        """
+        self.assertStatisticsEqual(
+            get_speed_statistics('student', [3])[3], compute_speed_statistics([2000, 6000, 8000, 8000])
+        )
+
+    def test_speed_statistics_unknown_dimension(self):
+        """
+        Ensure that an unknown dimension is rejected.
+        """
+        with self.assertRaises(ValueError):
+            get_speed_statistics('question_set')
+
+    def test_students_table_speed(self):
+        """
+        Ensure that the speed of the students table is their mean speed on evaluated questions, in seconds.
+        """
+        response = self.client.get(reverse('students-visualization-list'), format='json')
+        self.assertEqual(response.status_code, 200)
+        students = {student['id']: student for student in response.data}
+        self.assertAlmostEqual(students[1]['speed'], 2.0)
+        self.assertAlmostEqual(students[3]['speed'], 6.0)
+
+    def test_groups_table_speed(self):
+        """
+        Ensure that the speed of the groups table is the average of the mean speeds of its students
+        (not the mean over all the answers of the group).
+        """
+        response = self.client.get(reverse('groups-visualization-list'), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        # (3000 + 6000) / 2
+        self.assertEqual(response.data[0]['speed'], datetime.timedelta(milliseconds=4500))
@@ -1,72 +1,684 @@
-from assessments.models import QuestionSetAccess, QuestionSet, Question
+import datetime
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import Aggregate, Avg, Count, F, FloatField, Max, Min, OuterRef, Q, Subquery, Sum
+
+from assessments.models import Attachment, QuestionSetAccess, QuestionSet, Question, LearningObjective
+from assessments.serializers import LearningObjectiveSerializer
 from answers.models import QuestionSetAnswer, Answer
+from users.models import User
 
-def get_question_set_correct_answers_percentage(question_set):
-        """
-        Get the percentage of correct answers for the given question_set
-        """
-        correct_answers_percentage = 0
-        question_set_total_answers = Question.objects.filter(question_set=question_set).exclude(question_type='SEL').count()
-        question_set_answers = QuestionSetAnswer.objects.filter(question_set_access__question_set=question_set)
-        if not question_set_total_answers or not question_set_answers:
-            return None
-        question_set_total_correct_answers = Answer.objects.filter(
-                question_set_answer__in=question_set_answers,
-                valid=True
-            ).exclude(question__question_type='SEL').count()
-        question_set_total_wrong_answers = 0
-        if question_set_total_correct_answers == 0:
-            question_set_total_wrong_answers = Answer.objects.filter(
-                question_set_answer__in=question_set_answers,
-                valid=False
-            ).exclude(question__question_type='SEL').count()
-        if (question_set_total_answers != 0):
-            if question_set_total_correct_answers != 0:
-                correct_answers_percentage = round((question_set_total_correct_answers / question_set_total_answers) * 100, 1)
-            elif question_set_total_wrong_answers != 0:
-                correct_answers_percentage = 0
-
-        return min(correct_answers_percentage, 100.0)
+from .models import AnswerFact, QuestionSetScoreSummary
 
-def calculate_student_score(assessment, student_pk):
-        question_set_accesses = QuestionSetAccess.objects.filter(
-            question_set__assessment=assessment,
-            student__id=student_pk
+SEL_STATEMENTS = ['NOT_REALLY', 'A_LITTLE', 'A_LOT']
+
+# Lookups of the answer facts by which speed statistics can be computed (the current group of the students)
+SPEED_DIMENSIONS = {
+    'student': 'student',
+    'question': 'question',
+    'group': 'student__group',
+    'assessment': 'assessment'
+}
+
+
+def compute_correct_answers_percentage(total_questions, has_answers, total_correct_answers):
+    """
+    Percentage of correct answers of a question_set, given its number of evaluated
+    questions and its number of correct answers (capped at 100)
+    """
+    if not total_questions or not has_answers:
+        return None
+    correct_answers_percentage = 0
+    if total_correct_answers:
+        correct_answers_percentage = round((total_correct_answers / total_questions) * 100, 1)
+    return min(correct_answers_percentage, 100.0)
+
+
+def compute_sel_average(statements_count):
+    """
+    Average SEL statement given the number of answers for each statement
+    """
+    total = sum(statements_count.values())
+    if not total:
+        return None
+    values_sum = sum(SEL_STATEMENTS.index(statement) * count for statement, count in statements_count.items())
+    return SEL_STATEMENTS[round(values_sum / total)]
+
+
+def refresh_question_set_score_summaries(question_set_accesses):
+    """
+    Recompute the score summaries of the given question_set accesses (ids or instances)
+    from their question_set answers, with a fixed number of queries.
+    Summaries of accesses without any question_set answer are removed, accesses to question_sets
+    or of students pending deletion are skipped.
+    """
+    access_ids = [getattr(access, 'id', access) for access in question_set_accesses]
+    if not access_ids:
+        return
+
+    with transaction.atomic():
+        # Lock the accesses so that concurrent refreshes of a same summary are serialized
+        accesses = list(QuestionSetAccess.objects.select_for_update(of=('self',)).filter(
+            id__in=access_ids, question_set__pending_delete=False, student__pending_delete=False
+        ).order_by('id').values('id', 'question_set', 'student'))
+        if not accesses:
+            return
+
+        question_set_answers = {}
+        for question_set_answer in QuestionSetAnswer.objects.filter(
+            question_set_access__in=access_ids
+        ).order_by('id').values('id', 'question_set_access', 'complete'):
+            question_set_answers.setdefault(question_set_answer['question_set_access'], []).append(question_set_answer)
+
+        evaluated = ~Q(question__question_type='SEL')
+        answers_count = {
+            row['question_set_answer']: row for row in Answer.objects.filter(
+                question_set_answer__question_set_access__in=access_ids
+            ).order_by().values('question_set_answer').annotate(
+                total=Count('id'),
+                correct=Count('id', filter=Q(valid=True)),
+                evaluated_correct=Count('id', filter=evaluated & Q(valid=True)),
+                evaluated_wrong=Count('id', filter=evaluated & Q(valid=False)),
+                sel_not_really=Count('id', filter=Q(answersel__statement='NOT_REALLY')),
+                sel_a_little=Count('id', filter=Q(answersel__statement='A_LITTLE')),
+                sel_a_lot=Count('id', filter=Q(answersel__statement='A_LOT'))
+            )
+        }
+        empty_count = dict.fromkeys(
+            ('total', 'correct', 'evaluated_correct', 'evaluated_wrong', 'sel_not_really', 'sel_a_little', 'sel_a_lot'), 0
+        )
+
+        summaries = []
+        for access in accesses:
+            attempts = question_set_answers.get(access['id'], [])
+            if not attempts:
+                continue
+            counts = [answers_count.get(attempt['id'], empty_count) for attempt in attempts]
+            complete_counts = [count for attempt, count in zip(attempts, counts) if attempt['complete']]
+            first_attempt = complete_counts[0] if complete_counts else empty_count
+            last_attempt = complete_counts[-1] if complete_counts else empty_count
+            summaries.append(QuestionSetScoreSummary(
+                question_set_id=access['question_set'],
+                student_id=access['student'],
+                attempts=len(attempts),
+                complete_attempts=len(complete_counts),
+                correct_answers_count=sum(count['evaluated_correct'] for count in counts),
+                wrong_answers_count=sum(count['evaluated_wrong'] for count in counts),
+                first_attempt_correct_answers_count=first_attempt['correct'],
+                first_attempt_answers_count=first_attempt['total'],
+                last_attempt_correct_answers_count=last_attempt['correct'],
+                last_attempt_answers_count=last_attempt['total'],
+                sel_not_really_count=sum(count['sel_not_really'] for count in counts),
+                sel_a_little_count=sum(count['sel_a_little'] for count in counts),
+                sel_a_lot_count=sum(count['sel_a_lot'] for count in counts)
+            ))
+
+        QuestionSetScoreSummary.objects.filter(reduce(or_, (
+            Q(question_set=access['question_set'], student=access['student']) for access in accesses
+        ))).delete()
+        QuestionSetScoreSummary.objects.bulk_create(summaries)
+
+
+def _insert_answer_facts(condition, params):
+    """
+    Insert the facts of the answers matching the SQL condition (on the answer table), with a single
+    INSERT ... SELECT statement. Answers which already have a fact, which are not linked to a
+    question_set access, or whose question_set or student is pending deletion, are skipped. Returns the number of inserted facts.
+    """
+    query = f"""
+        INSERT INTO {AnswerFact._meta.db_table} (
+            answer_id, student_id, supervisor_id, assessment_id, question_set_id, question_id,
+            question_type, valid, duration_ms, date
+        )
+        SELECT
+            answer.id, access.student_id, student.created_by_id, question_set.assessment_id,
+            access.question_set_id, answer.question_id, question.question_type, answer.valid,
+            answer.duration_ms,
+            COALESCE(answer.start_datetime, question_set_answer.start_date)::date
+        FROM {Answer._meta.db_table} answer
+        INNER JOIN {QuestionSetAnswer._meta.db_table} question_set_answer
+            ON question_set_answer.id = answer.question_set_answer_id
+        INNER JOIN {QuestionSetAccess._meta.db_table} access ON access.id = question_set_answer.question_set_access_id
+        INNER JOIN {User._meta.db_table} student ON student.id = access.student_id
+        INNER JOIN {QuestionSet._meta.db_table} question_set ON question_set.id = access.question_set_id
+        LEFT JOIN {Question._meta.db_table} question ON question.id = answer.question_id
+        WHERE NOT question_set.pending_delete AND NOT student.pending_delete AND ({condition})
+        ON CONFLICT (answer_id) DO NOTHING
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.rowcount
+
+
+def append_answer_facts(answers):
+    """
+    Append the facts of the given answers (ids or instances), with a single query.
+    """
+    answer_ids = [getattr(answer, 'pk', answer) for answer in answers]
+    if answer_ids:
+        _insert_answer_facts('answer.id = ANY(%s)', [answer_ids])
+
+
+def refresh_answer_facts_validity(answers):
+    """
+    Copy the validity of the given answers (ids or instances) to their facts, after they were rescored.
+    """
+    answer_ids = [getattr(answer, 'pk', answer) for answer in answers]
+    if answer_ids:
+        AnswerFact.objects.filter(answer__in=answer_ids).exclude(
+            valid=F('answer__valid')
+        ).update(valid=Subquery(Answer.objects.filter(id=OuterRef('answer')).values('valid')))
+
+
+def rebuild_answer_facts(chunk_size=10000, progress=None):
+    """
+    Rebuild the facts of all the answers, on chunks of chunk_size answer ids, each chunk
+    (removal of the previous facts and insertion) in its own transaction.
+    progress is called after each chunk with the number of chunks done and the number of chunks.
+    Returns the number of facts.
+    """
+    answer_ids = Answer.objects.aggregate(first=Min('id'), last=Max('id'))
+    if answer_ids['first'] is None:
+        return 0
+
+    chunk_starts = range(answer_ids['first'], answer_ids['last'] + 1, chunk_size)
+    facts_count = 0
+    for index, start in enumerate(chunk_starts):
+        with transaction.atomic():
+            AnswerFact.objects.filter(answer__gte=start, answer__lt=start + chunk_size).delete()
+            facts_count += _insert_answer_facts('answer.id >= %s AND answer.id < %s', [start, start + chunk_size])
+        if progress is not None:
+            progress(index + 1, len(chunk_starts))
+
+    return facts_count
+
+
+class PercentileCont(Aggregate):
+    """
+    PostgreSQL continuous percentile: value at the given fraction of the ordered values,
+    interpolated between the two nearest values.
+    """
+
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def compute_percentile(sorted_values, fraction):
+    """
+    Continuous percentile of sorted values (same interpolation as PostgreSQL percentile_cont)
+    """
+    if not sorted_values:
+        return None
+    position = fraction * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def compute_speed_statistics(durations):
+    """
+    Speed statistics of a list of durations
+    """
+    durations = sorted(durations)
+    return {
+        'count': len(durations),
+        'mean': sum(durations) / len(durations),
+        'median': compute_percentile(durations, 0.5),
+        'p90': compute_percentile(durations, 0.9),
+        'fastest': durations[0],
+        'slowest': durations[-1]
+    }
+
+
+def get_speed_statistics(dimension, ids=None, evaluated_only=False):
+    """
+    Statistics of the answers durations in milliseconds (count, mean, median, 90th percentile,
+    fastest and slowest) per student, question, group or assessment, read from the answer facts
+    with a single grouped query. Percentiles are computed by PostgreSQL, or in Python from the
+    fetched durations on the other database backends.
+    Only the given ids are computed if any, and SEL answers are left out if evaluated_only.
+    Returns a dict keyed by id.
+    """
+    if dimension not in SPEED_DIMENSIONS:
+        raise ValueError(f'Unknown speed dimension "{dimension}"')
+    lookup = SPEED_DIMENSIONS[dimension]
+
+    facts = AnswerFact.objects.filter(duration_ms__isnull=False)
+    if ids is not None:
+        facts = facts.filter(**{f'{lookup}__in': ids})
+    if evaluated_only:
+        facts = facts.exclude(question_type='SEL')
+    facts = facts.order_by().values(lookup)
+
+    if connection.vendor == 'postgresql':
+        return {
+            row[lookup]: {key: value for key, value in row.items() if key != lookup}
+            for row in facts.annotate(
+                count=Count('duration_ms'),
+                mean=Avg('duration_ms'),
+                median=PercentileCont('duration_ms', 0.5),
+                p90=PercentileCont('duration_ms', 0.9),
+                fastest=Min('duration_ms'),
+                slowest=Max('duration_ms')
+            )
+        }
+
+    durations = {}
+    for key, duration in facts.values_list(lookup, 'duration_ms'):
+        durations.setdefault(key, []).append(duration)
+    return {key: compute_speed_statistics(values) for key, values in durations.items()}
+
+
+def get_assessment_table_metrics(assessments):
+    """
+    Compute the metrics displayed in the assessments table for all the given assessments
+    at once, with a fixed number of grouped queries (whatever the number of assessments).
+    Returns a dict keyed by assessment id.
+    """
+    assessment_ids = [assessment.id for assessment in assessments]
+    if not assessment_ids:
+        return {}
+    today = datetime.date.today()
+
+    question_sets = list(QuestionSet.objects.filter(assessment__in=assessment_ids).values(
+        'id', 'name', 'description', 'icon', 'order', 'learning_objective', 'evaluated',
+        'assessment', 'assessment__sel_question'
+    ))
+    question_set_ids = [question_set['id'] for question_set in question_sets]
+
+    questions_count = {
+        row['question_set']: row for row in Question.objects.filter(
+            question_set__in=question_set_ids
+        ).values('question_set').annotate(
+            evaluated=Count('id', filter=~Q(question_type='SEL')),
+            sel=Count('id', filter=Q(question_type='SEL'))
+        )
+    }
+
+    summaries = {
+        row['question_set']: row for row in QuestionSetScoreSummary.objects.filter(
+            question_set__in=question_set_ids
+        ).values('question_set').annotate(
+            attempts=Sum('attempts'),
+            correct=Sum('correct_answers_count'),
+            NOT_REALLY=Sum('sel_not_really_count'),
+            A_LITTLE=Sum('sel_a_little_count'),
+            A_LOT=Sum('sel_a_lot_count')
+        )
+    }
+
+    learning_objectives = LearningObjective.objects.select_related('topic').in_bulk(
+        {question_set['learning_objective'] for question_set in question_sets if question_set['learning_objective']}
+    )
+
+    plays = dict(QuestionSetAnswer.objects.filter(
+        question_set_access__question_set__assessment__in=assessment_ids,
+        question_set_access__student__pending_delete=False
+    ).values('question_set_access__question_set__assessment').annotate(
+        count=Count('session', distinct=True)
+    ).values_list('question_set_access__question_set__assessment', 'count'))
+
+    accesses = QuestionSetAccess.objects.filter(
+        question_set__assessment__in=assessment_ids,
+        student__pending_delete=False
+    ).values('question_set__assessment')
+    invites = dict(accesses.annotate(
+        count=Count('student', distinct=True)
+    ).values_list('question_set__assessment', 'count'))
+    students_count = dict(accesses.filter(
+        start_date__lte=today,
+        end_date__gte=today
+    ).annotate(
+        count=Count('student', distinct=True)
+    ).values_list('question_set__assessment', 'count'))
+
+    metrics = {
+        assessment_id: {
+            'question_sets_count': 0,
+            'question_sets': [],
+            'students_count': students_count.get(assessment_id, 0),
+            'invites': invites.get(assessment_id, 0),
+            'plays': plays.get(assessment_id, 0),
+            'score': None
+        } for assessment_id in assessment_ids
+    }
+    question_sets_scores = {assessment_id: [] for assessment_id in assessment_ids}
+
+    for question_set in question_sets:
+        count = questions_count.get(question_set['id'], {'evaluated': 0, 'sel': 0})
+        questions_count_with_sel = count['evaluated']
+        if question_set['order'] == 1 and question_set['assessment__sel_question']:
+            questions_count_with_sel += count['sel']
+
+        summary = summaries.get(question_set['id'], {'attempts': 0, 'correct': 0})
+        correct_answers_percentage = compute_correct_answers_percentage(
+            count['evaluated'], summary['attempts'], summary['correct']
         )
-        student_score = None
-        if question_set_accesses:
-            total_score = 0
-            total_question_count = 0
-            for question_set_access in question_set_accesses:
-                question_set_answer = QuestionSetAnswer.objects.filter(
-                    question_set_access=question_set_access,
-                    complete=True
+
+        learning_objective_data = None
+        if question_set['learning_objective'] in learning_objectives:
+            learning_objective_data = LearningObjectiveSerializer(
+                learning_objectives[question_set['learning_objective']]).data
+
+        assessment_metrics = metrics[question_set['assessment']]
+        assessment_metrics['question_sets_count'] += 1
+        assessment_metrics['question_sets'].append({
+            'id': question_set['id'],
+            'title': question_set['name'],
+            'description': question_set['description'],
+            'icon': question_set['icon'],
+            'order': question_set['order'],
+            'learning_objective': learning_objective_data,
+            'questionsCount': questions_count_with_sel,
+            'score': correct_answers_percentage,
+            'sel_average': compute_sel_average(
+                {statement: summary.get(statement, 0) for statement in SEL_STATEMENTS}
+            )
+        })
+        if question_set['evaluated'] and correct_answers_percentage is not None:
+            question_sets_scores[question_set['assessment']].append(correct_answers_percentage)
+
+    for assessment_id, scores in question_sets_scores.items():
+        if scores:
+            metrics[assessment_id]['score'] = sum(scores) / float(len(scores))
+
+    return metrics
+
+
+def get_first_last_attempts_answers_count(question_ids, students=None):
+    """
+    Number of answers and correct answers to each of the given questions in the first
+    and last complete attempts of each student (optionally restricted to the given
+    students queryset), in a single query. Students pending deletion are left out.
+    The first and last question_set answers of each access are picked with ROW_NUMBER().
+    Returns a dict keyed by question id.
+    """
+    question_ids = list(question_ids)
+    if not question_ids:
+        return {}
+
+    students_filter, students_params = '', []
+    if students is not None:
+        students_sql, students_params = students.values('id').query.sql_with_params()
+        students_filter = f'AND access.student_id IN ({students_sql})'
+
+    query = f"""
+        WITH ranked_question_set_answers AS (
+            SELECT
+                question_set_answer.id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY question_set_answer.question_set_access_id
+                    ORDER BY question_set_answer.start_date ASC, question_set_answer.id ASC
+                ) AS first_rank,
+                ROW_NUMBER() OVER (
+                    PARTITION BY question_set_answer.question_set_access_id
+                    ORDER BY question_set_answer.start_date DESC, question_set_answer.id DESC
+                ) AS last_rank
+            FROM {QuestionSetAnswer._meta.db_table} question_set_answer
+            INNER JOIN {QuestionSetAccess._meta.db_table} access
+                ON access.id = question_set_answer.question_set_access_id
+            INNER JOIN {User._meta.db_table} student ON student.id = access.student_id
+            WHERE question_set_answer.complete
+                AND NOT student.pending_delete
+                AND access.question_set_id IN (
+                    SELECT question_set_id FROM {Question._meta.db_table} WHERE id = ANY(%s)
                 )
-                if question_set_answer:
-                    question_set_answer = question_set_answer.first()
-                    correct_answers = question_set_answer.answers.filter(valid=True)
-                    total_score += correct_answers.count()
-                    total_question_count += question_set_answer.answers.count()
-            if total_question_count:
-                student_score = total_score / total_question_count
-        return student_score
+                {students_filter}
+        )
+        SELECT
+            answer.question_id,
+            COUNT(*) FILTER (WHERE ranked.first_rank = 1),
+            COUNT(*) FILTER (WHERE ranked.first_rank = 1 AND answer.valid),
+            COUNT(*) FILTER (WHERE ranked.last_rank = 1),
+            COUNT(*) FILTER (WHERE ranked.last_rank = 1 AND answer.valid)
+        FROM {Answer._meta.db_table} answer
+        INNER JOIN ranked_question_set_answers ranked ON ranked.id = answer.question_set_answer_id
+        WHERE answer.question_id = ANY(%s)
+            AND (ranked.first_rank = 1 OR ranked.last_rank = 1)
+        GROUP BY answer.question_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, [question_ids, *students_params, question_ids])
+        return {
+            question_id: {
+                'first_total': first_total,
+                'first_correct': first_correct,
+                'last_total': last_total,
+                'last_correct': last_correct
+            } for question_id, first_total, first_correct, last_total, last_correct in cursor.fetchall()
+        }
 
-def calculate_assessments_score(assessments):
-    assessments_score = []
-    for assessment in assessments:
-        question_sets = QuestionSet.objects.filter(assessment=assessment)
-        question_sets_answers = []
 
+def get_question_table_metrics(questions, students=None):
+    """
+    Compute the metrics displayed in the questions table for all the given questions
+    at once, with a fixed number of grouped queries (whatever the number of questions).
+    First and last attempts scores only take the given students into account.
+    Returns a dict keyed by question id.
+    """
+    question_ids = [question.id for question in questions]
+    if not question_ids:
+        return {}
+    question_set_ids = {question.question_set_id for question in questions}
+
+    answers = Answer.objects.filter(
+        question__in=question_ids,
+        question_set_answer__question_set_access__student__pending_delete=False
+    ).order_by().values('question')
+    answers_count = {
+        row['question']: row for row in answers.annotate(
+            total=Count('id'),
+            correct=Count('id', filter=Q(valid=True) & ~Q(question__question_type='SEL'))
+        )
+    }
+    speeds = get_speed_statistics('question', question_ids)
+    invites = dict(QuestionSetAccess.objects.filter(
+        question_set__in=question_set_ids,
+        student__pending_delete=False
+    ).order_by().values('question_set').annotate(
+        count=Count('id')
+    ).values_list('question_set', 'count'))
+    questions_with_attachment = set(Attachment.objects.filter(
+        question__in=question_ids
+    ).values_list('question', flat=True))
+    first_last_attempts = get_first_last_attempts_answers_count(question_ids, students)
+
+    metrics = {}
+    for question in questions:
+        count = answers_count.get(question.id, {'total': 0, 'correct': 0})
+        speed = speeds.get(question.id)
+        first_last_attempt = first_last_attempts.get(question.id, dict.fromkeys(
+            ('first_total', 'first_correct', 'last_total', 'last_correct'), 0
+        ))
+        metrics[question.id] = {
+            'has_attachment': question.id in questions_with_attachment,
+            'plays': count['total'],
+            'invites': invites.get(question.question_set_id, 0),
+            'score': compute_correct_answers_percentage(count['total'], count['total'], count['correct']),
+            'speeds': {
+                'slowest': speed['slowest'],
+                'fastest': speed['fastest'],
+                'average': round(speed['mean']),
+                'median': round(speed['median']),
+                'p90': round(speed['p90'])
+            } if speed else {},
+            'correct_answers_percentage_first': round(
+                100 * first_last_attempt['first_correct'] / first_last_attempt['first_total'], 2
+            ) if first_last_attempt['first_total'] else None,
+            'correct_answers_percentage_last': round(
+                100 * first_last_attempt['last_correct'] / first_last_attempt['last_total'], 2
+            ) if first_last_attempt['last_total'] else None
+        }
+    return metrics
+
+
+def get_score_matrix(assessment, students):
+    """
+    Score of each of the given students (queryset) on each question_set of the assessment,
+    from their first complete attempt, with one grouped query over the accesses.
+    Each cell is the percentage of correct answers, 'not_started' (access without complete
+    attempt), 'not_evaluated' (question_set not evaluated) or None (no access).
+    Returns a columnar dict: student ids, question_sets, scores (one row per student) and
+    whether each student completed at least one question_set of the assessment.
+    """
+    question_sets = list(QuestionSet.objects.filter(assessment=assessment).annotate(
+        questions_count=Count('question', filter=~Q(question__question_type='SEL'))
+    ).order_by('order', 'id').values('id', 'name', 'evaluated', 'questions_count'))
+    student_ids = list(students.values_list('id', flat=True))
+
+    cells = {}
+    if question_sets and student_ids:
+        query = f"""
+            WITH ranked_question_set_answers AS (
+                SELECT
+                    question_set_answer.id,
+                    question_set_answer.question_set_access_id,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY question_set_answer.question_set_access_id
+                        ORDER BY question_set_answer.start_date ASC, question_set_answer.id ASC
+                    ) AS rank
+                FROM {QuestionSetAnswer._meta.db_table} question_set_answer
+                INNER JOIN {QuestionSetAccess._meta.db_table} access
+                    ON access.id = question_set_answer.question_set_access_id
+                WHERE question_set_answer.complete
+                    AND access.question_set_id = ANY(%s)
+                    AND access.student_id = ANY(%s)
+            )
+            SELECT
+                access.student_id,
+                access.question_set_id,
+                first_attempt.id IS NOT NULL,
+                COUNT(answer.id) FILTER (WHERE question.question_type IS DISTINCT FROM 'SEL')
+            FROM {QuestionSetAccess._meta.db_table} access
+            LEFT JOIN ranked_question_set_answers first_attempt
+                ON first_attempt.question_set_access_id = access.id AND first_attempt.rank = 1
+            LEFT JOIN {Answer._meta.db_table} answer
+                ON answer.question_set_answer_id = first_attempt.id AND answer.valid
+            LEFT JOIN {Question._meta.db_table} question
+                ON question.id = answer.question_id
+            WHERE access.question_set_id = ANY(%s)
+                AND access.student_id = ANY(%s)
+            GROUP BY access.student_id, access.question_set_id, first_attempt.id
+        """
+        question_set_ids = [question_set['id'] for question_set in question_sets]
+        with connection.cursor() as cursor:
+            cursor.execute(query, [question_set_ids, student_ids, question_set_ids, student_ids])
+            cells = {
+                (student_id, question_set_id): (completed, correct)
+                for student_id, question_set_id, completed, correct in cursor.fetchall()
+            }
+
+    scores = []
+    student_access = []
+    for student_id in student_ids:
+        row = []
+        completed_any = False
         for question_set in question_sets:
-            if question_set.evaluated:
-                correct_answers_percentage = get_question_set_correct_answers_percentage(question_set)
-                if correct_answers_percentage is not None:
-                    question_sets_answers.append(correct_answers_percentage)
+            cell = cells.get((student_id, question_set['id']))
+            completed_any = completed_any or bool(cell and cell[0])
+            if not question_set['evaluated']:
+                row.append('not_evaluated')
+            elif cell is None:
+                row.append(None)
+            elif not cell[0]:
+                row.append('not_started')
+            elif question_set['questions_count']:
+                row.append(round((cell[1] / question_set['questions_count']) * 100, 1))
+            else:
+                row.append(0)
+        scores.append(row)
+        student_access.append(completed_any)
+
+    return {
+        'students': student_ids,
+        'question_sets': [
+            {'id': question_set['id'], 'name': question_set['name'], 'evaluated': question_set['evaluated']}
+            for question_set in question_sets
+        ],
+        'scores': scores,
+        'student_access': student_access
+    }
+
+
+def get_question_set_correct_answers_percentage(question_set):
+    """
+    Get the percentage of correct answers for the given question_set
+    """
+    total_questions = Question.objects.filter(question_set=question_set).exclude(question_type='SEL').count()
+    summary = QuestionSetScoreSummary.objects.filter(question_set=question_set).aggregate(
+        attempts=Sum('attempts'),
+        correct=Sum('correct_answers_count')
+    )
+    return compute_correct_answers_percentage(total_questions, summary['attempts'], summary['correct'])
+
 
-        score = None
-        if question_sets_answers:
-            score = sum(question_sets_answers) / float(len(question_sets_answers))
-            
-            assessments_score.append(score)
+def get_students_scores(summaries):
+    """
+    Score of each student on each assessment, from the given score summaries:
+    the ratio of correct answers in the first complete attempt of each question_set.
+    Returns a dict keyed by (student id, assessment id), without the students
+    who did not complete any question_set of the assessment.
+    """
+    scores = summaries.filter(complete_attempts__gt=0).values(
+        'student', 'question_set__assessment'
+    ).annotate(
+        correct=Sum('first_attempt_correct_answers_count'),
+        total=Sum('first_attempt_answers_count')
+    )
+    return {
+        (row['student'], row['question_set__assessment']): row['correct'] / row['total']
+        for row in scores if row['total']
+    }
 
+
+def calculate_student_score(assessment, student_pk):
+    """
+    Score of the student on the given assessment
+    """
+    return get_students_scores(QuestionSetScoreSummary.objects.filter(
+        question_set__assessment=assessment,
+        student=student_pk
+    )).get((int(student_pk), getattr(assessment, 'id', assessment)))
+
+
+def calculate_assessments_score(assessments):
+    """
+    Average score of the evaluated question_sets of each of the given assessments
+    (assessments without any answer are left out)
+    """
+    question_sets = QuestionSet.objects.filter(assessment__in=assessments, evaluated=True)
+    questions_count = dict(Question.objects.filter(
+        question_set__in=question_sets
+    ).exclude(question_type='SEL').order_by().values('question_set').annotate(
+        count=Count('id')
+    ).values_list('question_set', 'count'))
+    summaries = {
+        row['question_set']: row for row in QuestionSetScoreSummary.objects.filter(
+            question_set__in=question_sets
+        ).values('question_set').annotate(
+            attempts=Sum('attempts'),
+            correct=Sum('correct_answers_count')
+        )
+    }
+
+    question_sets_scores = {}
+    for question_set in question_sets.values('id', 'assessment'):
+        summary = summaries.get(question_set['id'], {'attempts': 0, 'correct': 0})
+        correct_answers_percentage = compute_correct_answers_percentage(
+            questions_count.get(question_set['id'], 0), summary['attempts'], summary['correct']
+        )
+        if correct_answers_percentage is not None:
+            question_sets_scores.setdefault(question_set['assessment'], []).append(correct_answers_percentage)
+
+    assessments_score = []
+    for assessment in assessments:
+        scores = question_sets_scores.get(assessment.id)
+        if scores:
+            assessments_score.append(sum(scores) / float(len(scores)))
     return assessments_score
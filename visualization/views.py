@@ -11,8 +11,10 @@ from users.models import User, Group
 from visualization.serializers import GroupTableSerializer, StudentLinkedAssessmentsSerializer, UserTableSerializer, AssessmentTableSerializer, QuestionTableSerializer, QuestionSetTableSerializer, AssessmentAnswerTableSerializer, QuestionSetAnswerTableSerializer, QuestionAnswerTableSerializer, AnswerTableSerializer, QuestionDetailsTableSerializer, ScoreByQuestionSetSerializer, AssessmentListForDashboardSerializer, QuestionSetLisForDashboardSerializer, QuestionOverviewSerializer, StudentsByQuestionSetAccessSerializer, StudentAnswersSerializer
 from assessments.models import Assessment, QuestionSet, Question, QuestionSetAccess
 from answers.models import Answer
+from admin.lib.pagination import CursorPagination
 from admin.lib.viewsets import ModelViewSet
-from .utils import calculate_student_score
+from .cache import cache_response
+from .utils import calculate_student_score, get_score_matrix
 
 
 
@@ -26,6 +28,8 @@ class UserTableViewSet(ModelViewSet):
                         'country', 'language', 'created_by']
     filter_backends = [OrderingFilter]
     ordering_fields = ['id']
+    ordering = ['id']
+    pagination_class = CursorPagination
 
     def get_queryset(self):
         """
@@ -53,6 +57,14 @@ class UserTableViewSet(ModelViewSet):
 
         return users
 
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request):
         return Response('Unauthorized', status=403)
 
@@ -95,12 +107,15 @@ class AssessmentTableViewSet(ModelViewSet):
 
     serializer_class = AssessmentTableSerializer
     filterset_fields = ['grade', 'subject', 'country', 'language']
+    pagination_class = CursorPagination
 
     def get_queryset(self):
         """
         Queryset to get allowed assessments for table.
         """
-        assessments = Assessment.objects.filter(Q(created_by=self.request.user) | Q(private=False))
+        assessments = Assessment.objects.filter(
+            Q(created_by=self.request.user) | Q(private=False)
+        ).select_related('language', 'country')
 
         question_set = self.request.query_params.get('question_set')
         if question_set:
@@ -142,16 +157,22 @@ class AssessmentTableViewSet(ModelViewSet):
 
         return assessments
 
-    
+
+    @cache_response(all_students=True)
     def list(self, request, *args, **kwargs):
+        assessments = self.get_queryset()
+        page = self.paginate_queryset(assessments)
         serializer = AssessmentTableSerializer(
-            self.get_queryset(), many=True,
+            assessments if page is None else page, many=True,
             context={
                 'supervisor': self.request.user
             }
         )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
 
+    @cache_response(all_students=True)
     def retrieve(self, request, *args, **kwargs):
         assessment = self.get_object()
         serializer = AssessmentTableSerializer(assessment)
@@ -216,13 +237,16 @@ class QuestionsTableViewset(ModelViewSet):
     """
 
     serializer_class = QuestionTableSerializer
+    pagination_class = CursorPagination
 
     def get_queryset(self):
         """
         Queryset to get allowed assessment question_sets table.
         """
         accessible_assessments = AssessmentTableViewSet.get_queryset(self)
-        questions = Question.objects.filter(question_set__assessment__in=accessible_assessments)
+        questions = Question.objects.filter(
+            question_set__assessment__in=accessible_assessments
+        ).select_related('question_set__assessment', 'question_set__learning_objective')
 
         question_set_pk = self.kwargs.get('question_set_pk', None)
         assessment_pk = self.kwargs.get('assessment_pk', None)
@@ -256,14 +280,18 @@ class QuestionsTableViewset(ModelViewSet):
     def list(self, request, *args, **kwargs):
 
         accessible_students = UserTableViewSet.get_queryset(self)
+        questions = self.get_queryset()
+        page = self.paginate_queryset(questions)
 
         serializer = QuestionTableSerializer(
-            self.get_queryset(), many=True,
+            questions if page is None else page, many=True,
             context={
                 'accessible_students': accessible_students
             }
         )
 
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
 
     def retrieve(self, request, *args, **kwargs):
@@ -466,8 +494,9 @@ class ScoreByQuestionSetViewSet(ModelViewSet):
         assessment_pk = int(self.kwargs.get('assessment_pk', None))
         user = self.request.user
 
-        return User.objects.filter(created_by=user)
+        return User.objects.filter(created_by=user).select_related('group')
 
+    @cache_response
     def list(self, request, *args, **kwargs):
 
         serializer = ScoreByQuestionSetSerializer(
@@ -479,29 +508,27 @@ class ScoreByQuestionSetViewSet(ModelViewSet):
 
         return Response(serializer.data)
 
-class GroupScoreByQuestionSetViewSet(ModelViewSet):
+    @action(detail=False, methods=['get'])
+    @cache_response
+    def matrix(self, request, *args, **kwargs):
+        """
+        Columnar students x question_sets scores: student ids, question_sets and one row of scores per student.
+        """
+        matrix = get_score_matrix(int(self.kwargs.get('assessment_pk', None)), self.get_queryset().order_by('id'))
+
+        return Response(matrix)
+
+class GroupScoreByQuestionSetViewSet(ScoreByQuestionSetViewSet):
     """
     Score By QuestionSet filtering by group view set.
     TODO evaluate if it is necessary to change the information obtained here or add more information for the dashboard (to do so: create GroupScoreByQuestionSetViewSet own serializer?)
     """
-    serializer_class = ScoreByQuestionSetSerializer
 
     def get_queryset(self):
         group_pk = int(self.kwargs.get('group_pk', None))
         user = self.request.user
 
-        return User.objects.filter(created_by=user, group=group_pk)
-
-    def list(self, request, *args, **kwargs):
-
-        serializer = ScoreByQuestionSetSerializer(
-            self.get_queryset(), many=True,
-            context={
-                'assessment_pk': int(self.kwargs.get('assessment_pk', None))
-            }
-        )
-
-        return Response(serializer.data)
+        return User.objects.filter(created_by=user, group=group_pk).select_related('group')
 
 class AssessmentListForDashboard(ModelViewSet):
 
@@ -513,6 +540,7 @@ class AssessmentListForDashboard(ModelViewSet):
         """
         return Assessment.objects.filter((Q(created_by=self.request.user) | Q(private=False) | ~Q(subject='TUTORIAL')) & Q(archived=False))
 
+    @cache_response(all_students=True)
     def list(self, request, *args, **kwargs):
 
         serializer = AssessmentListForDashboardSerializer(
@@ -535,6 +563,10 @@ class QuestionSetListForDashboard(ModelViewSet):
 
         return QuestionSet.objects.filter(assessment=assessment_pk)
 
+    @cache_response(all_students=True)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class QuestionOverviewViewSet(ModelViewSet):
 
@@ -555,6 +587,7 @@ class QuestionOverviewViewSet(ModelViewSet):
             )
         return questions
 
+    @cache_response
     def list(self, request, *args, **kwargs):
 
         serializer = QuestionOverviewSerializer(
@@ -584,6 +617,10 @@ class StudentsByQuestionSetAccessViewSet(ModelViewSet):
 
         return QuestionSetAccess.objects.filter(question_set=question_set_pk, student__in=students)
 
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class StudentAnswersViewSet(ModelViewSet):
 
@@ -610,8 +647,17 @@ class GroupTableViewSet(ModelViewSet):
     Groups table viewset.
     """
     serializer_class = GroupTableSerializer
+    pagination_class = CursorPagination
 
     def get_queryset(self):
         return Group.objects.filter(
             supervisor=self.request.user
         ).prefetch_related('student_group')
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)